@@ -0,0 +1,179 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+
+# ============================================================================
+# ADMISSION CONTROL (BATAS KONKURENSI + ANTRIAN BOUNDED)
+# ============================================================================
+# Maksimal `max_concurrent` request berat diproses bersamaan per proses.
+# Request berikutnya menunggu di antrian prioritas (biaya terkecil dulu,
+# mis. histori pendek; biaya sama = FIFO) paling lama `max_wait` detik.
+# Antrian penuh: request baru yang lebih murah dari waiter termahal
+# menggantikannya (waiter tersebut ditolak), selain itu request baru ditolak.
+#   429 = antrian penuh, 503 = menunggu terlalu lama
+# Keduanya dengan Retry-After dari estimasi waktu antrian habis.
+
+
+class Overloaded(Exception):
+    """Request ditolak admission control (dikembalikan dengan Retry-After)"""
+
+    def __init__(self, error, message, status, retry_after):
+        super().__init__(message)
+        self.error = error
+        self.message = message
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("cost", "granted", "rejected")
+
+    def __init__(self, cost):
+        self.cost = cost
+        self.granted = False
+        self.rejected = False
+
+
+class _Slot:
+    """Context manager satu slot yang sudah di-admit; exit = release"""
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.controller._release(time.perf_counter() - self.start)
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent, max_queue=32, max_wait=10.0, alpha=0.2):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.alpha = alpha
+        self.active = 0
+        self.service_seconds = None  # EMA durasi request yang di-admit
+        self._waiting = []  # heap (cost, seq, waiter)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+        self.evicted = 0
+
+    @property
+    def enabled(self):
+        return self.max_concurrent > 0
+
+    def queue_depth(self):
+        return len(self._waiting)
+
+    def retry_after(self):
+        """Detik sampai antrian saat ini diperkirakan habis (minimal 1)"""
+        service = self.service_seconds or 1.0
+        backlog = (len(self._waiting) + 1) / max(self.max_concurrent, 1)
+        return max(1, math.ceil(service * backlog))
+
+    def _reject(self, error, message, status):
+        return Overloaded(error, message, status, self.retry_after())
+
+    def acquire(self, cost=0):
+        """Slot untuk satu request (blocking sampai di-admit), atau Overloaded"""
+        if not self.enabled:
+            return _Slot(self)
+
+        with self._cond:
+            if self.active < self.max_concurrent and not self._waiting:
+                self.active += 1
+                self.admitted += 1
+                return _Slot(self)
+
+            waiter = _Waiter(cost)
+            if len(self._waiting) >= self.max_queue:
+                worst = max(self._waiting, key=lambda item: (item[0], item[1]))
+                if self.max_queue == 0 or cost >= worst[0]:
+                    self.rejected_full += 1
+                    raise self._reject(
+                        "TOO_MANY_REQUESTS", "Antrian forecast penuh", 429
+                    )
+                # Request lebih murah menggantikan waiter termahal
+                self._remove(worst)
+                worst[2].rejected = True
+                self.evicted += 1
+                self._cond.notify_all()
+
+            entry = (cost, next(self._seq), waiter)
+            heapq.heappush(self._waiting, entry)
+            self.queued += 1
+            expires = time.perf_counter() + self.max_wait
+
+            while True:
+                if waiter.granted:
+                    self.admitted += 1
+                    return _Slot(self)
+                if waiter.rejected:
+                    self.rejected_full += 1
+                    raise self._reject(
+                        "TOO_MANY_REQUESTS",
+                        "Antrian forecast penuh (digantikan request lebih ringan)",
+                        429,
+                    )
+                remaining = expires - time.perf_counter()
+                if remaining <= 0:
+                    self._remove(entry)
+                    self.rejected_timeout += 1
+                    raise self._reject(
+                        "SERVICE_OVERLOADED",
+                        f"Menunggu antrian forecast lebih dari {self.max_wait:g} detik",
+                        503,
+                    )
+                self._cond.wait(remaining)
+
+    def _remove(self, entry):
+        self._waiting.remove(entry)
+        heapq.heapify(self._waiting)
+
+    def _release(self, seconds):
+        if not self.enabled:
+            return
+        with self._cond:
+            self.service_seconds = (
+                seconds
+                if self.service_seconds is None
+                else self.service_seconds
+                + self.alpha * (seconds - self.service_seconds)
+            )
+            if self._waiting:
+                # Slot langsung diberikan ke waiter termurah (active tetap)
+                _, _, waiter = heapq.heappop(self._waiting)
+                waiter.granted = True
+                self._cond.notify_all()
+            else:
+                self.active -= 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                "enabled": self.enabled,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "max_wait_seconds": self.max_wait,
+                "active": self.active,
+                "queue_depth": len(self._waiting),
+                "admitted": self.admitted,
+                "queued": self.queued,
+                "rejected_full": self.rejected_full,
+                "rejected_timeout": self.rejected_timeout,
+                "evicted": self.evicted,
+                "service_ms": (
+                    round(self.service_seconds * 1000, 2)
+                    if self.service_seconds is not None
+                    else None
+                ),
+            }
@@ -1,15 +1,86 @@
+# Import berat diukur per fase untuk startup report; xgboost di-import tanpa
+# sklearn jika FORECAST_LEAN_IMPORTS=true (lihat startup.py). Import biasa di
+# bawahnya mengambil modul yang sudah dimuat.
+from startup import STARTUP, import_xgboost
+
+STARTUP.import_module("numpy")
+STARTUP.import_module("pandas")
+STARTUP.import_module("flask")
+import_xgboost()
+
 import numpy as np
 import pandas as pd
-import xgboost as xgb
-from flask import Flask, request, jsonify
+from flask import Flask, g, request, jsonify
 from flask_cors import CORS
+import functools
+import hmac
+import logging
+import os
+import threading
+import time
 import traceback
-from datetime import datetime, timedelta
-from sklearn.metrics import r2_score, mean_absolute_error
+from collections import OrderedDict
+from datetime import datetime
 import warnings
 
+from forecast_cache import ForecastCache, make_cache_key
+from forecast_store import ForecastStore, normalize_watermark, variant_key
+from horizon import format_buckets, resolve_horizon
+from admission import AdmissionController, Overloaded
+from cashflow import (
+    cashflow_series,
+    format_cashflow_buckets,
+    format_cashflow_results,
+    parse_cashflow_transactions,
+)
+from category_forecast import (
+    aggregate_categories,
+    allocate_integers,
+    parse_category_transactions,
+    reconcile,
+)
+from feature_state import FeatureState, forecast_recursive
+from deadline import (
+    BASELINES,
+    FALLBACKS_TOTAL,
+    CostEstimator,
+    Deadline,
+    baseline_forecast,
+    baseline_history,
+    resolve_baseline,
+)
+from features import (
+    COL,
+    FEATURE_COLS,
+    LAG_PERIODS,
+    ROLLING_WINDOWS,
+    calendar_features,
+    compute_features,
+)
+from inference import predict_rows
+from micro_batch import MicroBatcher
+from model_registry import ModelLoadError, ModelRegistry
+from payload import COLUMNAR_MIMETYPES, PayloadError, decode_columnar
+from prediction_cache import PredictionCache, ScoringPlan
+from regression_metrics import (
+    mean_absolute_error,
+    mean_absolute_percentage_error,
+    r2_score,
+    root_mean_squared_error,
+)
+from response_encoder import date_strings, day_names, encode_json
+from series_features import series_forecast_features, series_states
+from shadow import ShadowEvaluator
+from telemetry import instrumented, render_metrics, stage
+
 warnings.filterwarnings("ignore")
 
+# Debug per request hanya dicetak jika FORECAST_LOG_LEVEL=DEBUG
+logging.basicConfig(
+    level=os.environ.get("FORECAST_LOG_LEVEL", "INFO").upper(), format="%(message)s"
+)
+logger = logging.getLogger("forecast")
+
 app = Flask(__name__)
 CORS(app)
 
@@ -17,70 +88,456 @@ CORS(app)
 # LOAD XGBOOST MODEL (EXPENSE-ONLY MODE - NATIVE FORMAT)
 # ============================================================================
 
-MODEL_PATH = "models/xgboost_expense_forecast.model"
+MODEL_DIR = os.environ.get("FORECAST_MODEL_DIR", "models")
+MODEL_PATH = os.path.join(MODEL_DIR, "xgboost_expense_forecast.model")
+
+# "static": lag/rolling hari terakhir dipakai untuk semua hari forecast
+# "recursive": setiap prediksi diumpankan kembali ke lag/rolling/EMA
+FORECAST_METHODS = ("static", "recursive")
+
+# Versi model = file xgboost_expense_forecast*.model terbaru di MODEL_DIR.
+# Retrain cukup menaruh file baru lalu POST /admin/reload-model, atau set
+# FORECAST_MODEL_WATCH_INTERVAL (detik) agar folder dipantau otomatis.
+model_registry = ModelRegistry(
+    MODEL_DIR,
+    pattern=os.environ.get("FORECAST_MODEL_PATTERN", "xgboost_expense_forecast*.model"),
+    nthread=int(os.environ.get("FORECAST_NTHREAD", 0)) or None,
+)
+# Endpoint admin (reload model) ditutup jika token tidak di-set (fail closed)
+ADMIN_TOKEN = os.environ.get("FORECAST_ADMIN_TOKEN")
+# Di-set gunicorn.conf.py; reload lewat HTTP hanya mengenai satu worker
+SERVER_WORKERS = int(os.environ.get("FORECAST_WORKERS", 1))
 
 try:
-    # Load sebagai Booster (format native XGBoost)
-    model = xgb.Booster()
-    model.load_model(MODEL_PATH)
-
-    # Ambil feature names dari model
-    feature_names = (
-        model.feature_names
-        if hasattr(model, "feature_names")
-        else [
-            "Transaction_Count",
-            "day",
-            "month",
-            "year",
-            "dayofweek",
-            "dayofyear",
-            "weekofyear",
-            "is_weekend",
-            "is_month_start",
-            "is_month_end",
-            "lag_1",
-            "lag_2",
-            "lag_3",
-            "lag_7",
-            "lag_14",
-            "rolling_mean_3",
-            "rolling_std_3",
-            "rolling_min_3",
-            "rolling_max_3",
-            "rolling_mean_7",
-            "rolling_std_7",
-            "rolling_min_7",
-            "rolling_max_7",
-            "rolling_mean_14",
-            "rolling_std_14",
-            "rolling_min_14",
-            "rolling_max_14",
-            "ema_7",
-            "trend",
-        ]
-    )
+    # Load sebagai Booster (format native XGBoost) + warmup predict
+    with STARTUP.phase("load model + warmup"):
+        active_model, _ = model_registry.reload(os.environ.get("FORECAST_MODEL_FILE"))
 
     print("=" * 80)
     print("✅ XGBoost Expense-Only Forecasting API")
     print("=" * 80)
-    print(f"   Model path: {MODEL_PATH}")
+    print(f"   Model path: {active_model.path}")
+    print(f"   Model version: {active_model.version}")
     print(f"   Model loaded: YES")
-    print(f"   Features: {len(feature_names)}")
+    print(f"   Features: {len(active_model.feature_names)}")
     print(f"   Mode: EXPENSE-ONLY (sesuai Kaggle training)")
     print("=" * 80)
 
 except Exception as e:
     print(f"❌ Load Error: {e}")
     traceback.print_exc()
-    model = None
-    feature_names = None
+
+model_registry.start_watcher(float(os.environ.get("FORECAST_MODEL_WATCH_INTERVAL", 0)))
+
+# Model INCOME (opsional) untuk /analyze-forecast/cashflow, registry terpisah
+# dengan pola file sendiri. Hanya booster dengan attribute target="income"
+# (booster.set_attr(target="income") saat training) yang di-load, sehingga
+# model lain yang kebetulan cocok dengan pola tidak dipakai sebagai model
+# income. Tanpa model ini endpoint lain tetap berjalan dan cashflow -> 501.
+income_registry = ModelRegistry(
+    MODEL_DIR,
+    pattern=os.environ.get(
+        "FORECAST_INCOME_MODEL_PATTERN", "xgboost_income_forecast*.model"
+    ),
+    nthread=int(os.environ.get("FORECAST_NTHREAD", 0)) or None,
+    target="income",
+)
+
+try:
+    with STARTUP.phase("load income model + warmup"):
+        income_model, _ = income_registry.reload(
+            os.environ.get("FORECAST_INCOME_MODEL_FILE")
+        )
+    print(f"   Income model: {income_model.version}")
+except ModelLoadError as e:
+    logger.warning(f"⚠️ Model income tidak di-load ({e.message}), cashflow nonaktif")
+
+income_registry.start_watcher(float(os.environ.get("FORECAST_MODEL_WATCH_INTERVAL", 0)))
+
+# ============================================================================
+# SHADOW MODEL (EVALUASI MODEL KANDIDAT DI BACKGROUND)
+# ============================================================================
+# Kandidat = file terbaru di FORECAST_SHADOW_MODEL_DIR (default models/shadow,
+# mis. output train.py --output-dir models/shadow). Tanpa file kandidat
+# shadow mode nonaktif; watcher mengaktifkannya begitu file muncul.
+
+shadow_registry = ModelRegistry(
+    os.environ.get("FORECAST_SHADOW_MODEL_DIR", os.path.join(MODEL_DIR, "shadow")),
+    pattern=os.environ.get(
+        "FORECAST_SHADOW_MODEL_PATTERN", "xgboost_expense_forecast*.model"
+    ),
+    # Scoring kandidat tidak boleh merebut core dari request
+    nthread=int(os.environ.get("FORECAST_SHADOW_NTHREAD", 1)),
+)
+
+if shadow_registry.candidates():
+    try:
+        with STARTUP.phase("load shadow model + warmup"):
+            shadow_registry.reload()
+    except ModelLoadError as e:
+        logger.warning(f"⚠️ Model shadow tidak di-load: {e.message}")
+
+shadow_registry.start_watcher(float(os.environ.get("FORECAST_MODEL_WATCH_INTERVAL", 0)))
+
+shadow_evaluator = ShadowEvaluator(
+    shadow_registry,
+    workers=int(os.environ.get("FORECAST_SHADOW_WORKERS", 1)),
+    max_queue=int(os.environ.get("FORECAST_SHADOW_QUEUE", 64)),
+    sample_rate=float(os.environ.get("FORECAST_SHADOW_SAMPLE_RATE", 1.0)),
+)
+# Metrik pembanding hanya berlaku untuk satu pasangan model aktif + kandidat
+model_registry.on_swap(shadow_evaluator.reset)
+shadow_registry.on_swap(shadow_evaluator.reset)
+
+# ============================================================================
+# FORECAST RESULT CACHE (CONTENT-ADDRESSED, IN-PROCESS)
+# ============================================================================
+
+CACHE_ENABLED = os.environ.get("FORECAST_CACHE_ENABLED", "true").lower() != "false"
+
+forecast_cache = ForecastCache(
+    max_entries=int(os.environ.get("FORECAST_CACHE_MAX_ENTRIES", 1024)),
+    max_bytes=int(os.environ.get("FORECAST_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    ttl_seconds=float(os.environ.get("FORECAST_CACHE_TTL", 300)),
+)
+
+# ============================================================================
+# PRECOMPUTED FORECAST STORE (SQLITE, DIISI precompute.py)
+# ============================================================================
+# Request dengan userId + watermark dilayani dari store jika watermark dan
+# model sama (key lookup tanpa model run); selain itu forecast dihitung ulang
+# lalu ditulis kembali. FORECAST_STORE_PATH kosong = store nonaktif.
+
+FORECAST_STORE_PATH = os.environ.get(
+    "FORECAST_STORE_PATH", os.path.join("store", "forecasts.sqlite3")
+)
+forecast_store = ForecastStore(FORECAST_STORE_PATH) if FORECAST_STORE_PATH else None
+
+# ============================================================================
+# IN-SAMPLE PREDICTION CACHE (WINDOW EVALUASI PER USER)
+# ============================================================================
+# EVAL_ONLY_PREDICT: histori hanya di-score pada window evaluasi (20% hari
+# terakhir), satu-satunya bagian prediksi histori yang dipakai response.
+# Request dengan userId memakai ulang prediksi hari yang sudah pernah di-score.
+
+EVAL_ONLY_PREDICT = (
+    os.environ.get("FORECAST_EVAL_ONLY_PREDICT", "true").lower() != "false"
+)
+PREDICTION_CACHE_ENABLED = (
+    os.environ.get("FORECAST_PREDICTION_CACHE_ENABLED", "true").lower() != "false"
+)
+
+prediction_cache = PredictionCache(
+    max_bytes=int(
+        os.environ.get("FORECAST_PREDICTION_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+    ),
+)
+
+
+def invalidate_model_caches(version):
+    # Model baru = semua entry lama tidak akan pernah hit lagi (model_id beda)
+    forecast_cache.invalidate()
+    prediction_cache.invalidate()
+
+
+model_registry.on_swap(invalidate_model_caches)
+
+# ============================================================================
+# INCREMENTAL FEATURE STATE (PER USER, IN-MEMORY)
+# ============================================================================
+
+MAX_USER_STATES = 10000  # LRU: user terlama di-evict, client akan full sync ulang
+# State per proses: dengan banyak worker gunicorn, delta harus dirutekan ke
+# worker yang sama (sticky per userId, lihat gunicorn.conf.py)
+
+user_states = OrderedDict()
+user_states_lock = threading.Lock()
+
+
+def cursor_mismatch_response():
+    return (
+        jsonify(
+            {
+                "error": "CURSOR_MISMATCH",
+                "message": "State tidak ditemukan atau cursor kadaluarsa, kirim ulang seluruh histori tanpa cursor",
+                "cursor": None,
+            }
+        ),
+        409,
+    )
+
+
+# ============================================================================
+# MICRO-BATCHING PREDICT (REQUEST KONKUREN)
+# ============================================================================
+# Window 0 = batching mati. Collector tidak menunggu window penuh jika semua
+# request yang sedang berjalan sudah masuk antrian.
+
+micro_batcher = MicroBatcher(
+    window_ms=float(os.environ.get("FORECAST_BATCH_WINDOW_MS", 2)),
+    max_rows=int(os.environ.get("FORECAST_BATCH_MAX_ROWS", 8192)),
+    expected=model_registry.in_flight,
+)
+
+# ============================================================================
+# ADMISSION CONTROL (BACKPRESSURE)
+# ============================================================================
+# Batas request berat yang diproses bersamaan per proses + antrian bounded.
+# Default 4 = jumlah thread request per worker sebelumnya, sehingga
+# micro-batching tetap sama; FORECAST_MAX_CONCURRENT=0 = tanpa batas.
+
+admission = AdmissionController(
+    max_concurrent=int(os.environ.get("FORECAST_MAX_CONCURRENT", 4)),
+    max_queue=int(os.environ.get("FORECAST_MAX_QUEUE", 32)),
+    max_wait=float(os.environ.get("FORECAST_MAX_QUEUE_WAIT", 10)),
+)
+
+# Probe (forecast store / cache hit) sebelum admission juga memakan CPU
+# (decode body, normalisasi transaksi, hash), jadi punya budget sendiri:
+# maksimal PROBE_CONCURRENCY probe bersamaan untuk body <= PROBE_MAX_BYTES.
+# Di luar budget probe dijalankan setelah admission, di dalam slot request.
+PROBE_MAX_BYTES = int(os.environ.get("FORECAST_PROBE_MAX_BYTES", 256 * 1024))
+PROBE_CONCURRENCY = int(os.environ.get("FORECAST_PROBE_CONCURRENCY", 2))
+probe_slots = threading.BoundedSemaphore(max(PROBE_CONCURRENCY, 1))
+
+# ============================================================================
+# DEADLINE PER REQUEST (FALLBACK KE BASELINE)
+# ============================================================================
+# deadline_ms di body request (atau default FORECAST_DEADLINE_MS, 0 = tanpa
+# deadline). Biaya stage model dipelajari dari request yang selesai.
+
+DEADLINE_DEFAULT_MS = float(os.environ.get("FORECAST_DEADLINE_MS", 0))
+DEADLINE_BASELINE = os.environ.get("FORECAST_DEADLINE_BASELINE", "seasonal_naive")
+if DEADLINE_BASELINE not in BASELINES:
+    raise ValueError(f"FORECAST_DEADLINE_BASELINE harus salah satu dari {BASELINES}")
+
+stage_costs = CostEstimator()
 
 # ============================================================================
 # HELPER FUNCTIONS (EXPENSE-ONLY MODE - SESUAI TRAINING)
 # ============================================================================
 
 
+def read_request_data():
+    """
+    Body request sebagai dict: JSON (default) atau payload kolumnar
+    (msgpack / Arrow IPC) yang transaksinya di-decode langsung ke NumPy.
+    Hasil decode disimpan di g (probe admission + route memakai hasil sama)
+    """
+    if "request_data" not in g:
+        if request.mimetype in COLUMNAR_MIMETYPES:
+            g.request_data = decode_columnar(request.get_data(), request.mimetype)
+        else:
+            g.request_data = request.json
+    return g.request_data
+
+
+def payload_error_response(e):
+    return jsonify({"error": e.error, "message": e.message}), e.status
+
+
+def json_response(payload, status=200):
+    """Response JSON dari dict yang boleh berisi array/scalar NumPy (encode_json)"""
+    return app.response_class(
+        encode_json(payload), status=status, mimetype=app.json.mimetype
+    )
+
+
+def overloaded_response(e):
+    response = jsonify(
+        {"error": e.error, "message": e.message, "retry_after": e.retry_after}
+    )
+    response.status_code = e.status
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
+
+def run_probes(probes):
+    for probe in probes:
+        rv = probe()
+        if rv is not None:
+            return rv
+    return None
+
+
+def probe_before_admission():
+    """
+    Slot probe sebelum admission: body diketahui kecil dan budget probe
+    masih ada (non-blocking). False = probe dijalankan setelah admission
+    """
+    size = request.content_length
+    if PROBE_CONCURRENCY <= 0 or size is None or size > PROBE_MAX_BYTES:
+        return False
+    return probe_slots.acquire(blocking=False)
+
+
+def admitted(*probes):
+    """
+    Admission control untuk route berat (lihat admission.py). Biaya request
+    = ukuran body (histori pendek = murah, dilayani lebih dulu). `probes`
+    dicoba berurutan dan boleh mengembalikan response murah (forecast
+    tersimpan / cache hit) tanpa masuk antrian, selama budget probe cukup
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            g.request_start = time.perf_counter()
+            probed = bool(probes) and probe_before_admission()
+            if probed:
+                try:
+                    rv = run_probes(probes)
+                finally:
+                    probe_slots.release()
+                if rv is not None:
+                    return rv
+            try:
+                slot = admission.acquire(request.content_length or 0)
+            except Overloaded as e:
+                return overloaded_response(e)
+            with slot:
+                if probes and not probed:
+                    rv = run_probes(probes)
+                    if rv is not None:
+                        return rv
+                return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def request_store_key(data, mode, forecast_method, periods, bucket, model_id):
+    """
+    Key forecast store (user_id, variant, watermark, model_id) untuk request
+    yang membawa userId + watermark, atau None
+    """
+    watermark = normalize_watermark(data.get("watermark"))
+    user_id = data.get("userId")
+    if forecast_store is None or watermark is None or user_id is None:
+        return None
+    variant = variant_key(mode, forecast_method, periods, bucket)
+    return user_id, variant, watermark, model_id
+
+
+def store_forecast(body):
+    """Write-through body response ke forecast store jika request punya key"""
+    store_key = g.pop("forecast_store_key", None)
+    if store_key is None:
+        return False
+    with stage("analyze_forecast", "store_write"):
+        forecast_store.put(*store_key, body)
+    return True
+
+
+def probe_options():
+    """
+    Opsi /analyze-forecast untuk probe (store / cache):
+    (req_data, mode, forecast_method, periods, bucket). Exception = request
+    tidak valid, diteruskan ke route yang melaporkan error-nya
+    """
+    req_data = read_request_data() or {}
+    mode = req_data.get("mode", "weekly")
+    forecast_method = req_data.get("forecast_method", "static")
+    if forecast_method not in FORECAST_METHODS:
+        raise ValueError(forecast_method)
+    periods, bucket = request_horizon(req_data, mode)
+    request_deadline(req_data, g.request_start)
+    normalize_watermark(req_data.get("watermark"))
+    return req_data, mode, forecast_method, periods, bucket
+
+
+def forecast_store_probe():
+    """
+    Forecast tersimpan untuk userId + watermark yang sama dilayani tanpa
+    model run (sebelum admission jika budget probe cukup). Saat miss/usang, key
+    disimpan di g untuk write-through setelah forecast dihitung ulang
+    """
+    active = model_registry.active
+    if forecast_store is None or active is None:
+        return None
+    try:
+        req_data, mode, forecast_method, periods, bucket = probe_options()
+        store_key = request_store_key(
+            req_data, mode, forecast_method, periods, bucket, active.model_id
+        )
+    except Exception:
+        return None
+    if store_key is None:
+        return None
+
+    with stage("analyze_forecast", "store_lookup"):
+        body = forecast_store.get(*store_key)
+    if body is None:
+        g.forecast_store_key = store_key
+        return None
+    return app.response_class(
+        body, mimetype=app.json.mimetype, headers={"X-Forecast-Store": "HIT"}
+    )
+
+
+def forecast_cache_probe():
+    """
+    Cache hit /analyze-forecast dilayani tanpa model run (sebelum admission
+    jika budget probe cukup).
+    Saat miss, key disimpan di g agar route tidak menghitung hash ulang;
+    request tidak valid diteruskan ke route yang melaporkan error-nya
+    """
+    active = model_registry.active
+    if not CACHE_ENABLED or active is None:
+        return None
+    try:
+        req_data, mode, forecast_method, periods, bucket = probe_options()
+        transactions = req_data.get("transactions", [])
+        if not transactions:
+            return None
+        cache_key = make_cache_key(
+            transactions,
+            active.model_id,
+            mode=mode,
+            forecast_method=forecast_method,
+            horizon_days=periods,
+            bucket=bucket,
+        )
+    except Exception:
+        return None
+
+    with stage("analyze_forecast", "cache_lookup"):
+        cached_body = forecast_cache.get(cache_key)
+    if cached_body is None:
+        g.forecast_cache_probe = (active.model_id, cache_key)
+        return None
+    # Data sama dengan watermark baru: forecast tersimpan ikut diperbarui
+    store_forecast(cached_body)
+    return app.response_class(
+        cached_body, mimetype=app.json.mimetype, headers={"X-Forecast-Cache": "HIT"}
+    )
+
+
+def with_active_model(view):
+    """
+    Pin versi model aktif selama request; view menerima ModelVersion sebagai
+    argumen pertama. Hot-swap di tengah request tidak mengganti model request ini.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with model_registry.acquire() as active:
+            if active is None:
+                return (
+                    jsonify(
+                        {
+                            "error": "MODEL_NOT_LOADED",
+                            "message": "Model XGBoost belum berhasil dimuat.",
+                        }
+                    ),
+                    500,
+                )
+            return view(active, *args, **kwargs)
+
+    return wrapper
+
+
 def prepare_input_data(transactions_raw):
     """
     Feature engineering khusus untuk expense-only forecasting
@@ -97,7 +554,7 @@ def prepare_input_data(transactions_raw):
         df = df[df["Type"].str.upper() == "EXPENSE"].copy()
     else:
         # Jika tidak ada kolom Type, asumsikan semua adalah expense
-        print(
+        logger.warning(
             "⚠️ Warning: No 'Type' column found. Assuming all transactions are EXPENSE."
         )
 
@@ -181,44 +638,14 @@ def prepare_input_data(transactions_raw):
     daily_df["trend"] = range(len(daily_df))
 
     # Fill missing values
-    daily_df = daily_df.fillna(method="ffill").fillna(method="bfill")
+    daily_df = daily_df.ffill().bfill()
 
     # Convert to float32 untuk efisiensi memory
     float_cols = daily_df.select_dtypes(include=["float64"]).columns
     daily_df[float_cols] = daily_df[float_cols].astype("float32")
 
     # Feature columns (29 features sesuai training)
-    feature_cols = [
-        "Transaction_Count",
-        "day",
-        "month",
-        "year",
-        "dayofweek",
-        "dayofyear",
-        "weekofyear",
-        "is_weekend",
-        "is_month_start",
-        "is_month_end",
-        "lag_1",
-        "lag_2",
-        "lag_3",
-        "lag_7",
-        "lag_14",
-        "rolling_mean_3",
-        "rolling_std_3",
-        "rolling_min_3",
-        "rolling_max_3",
-        "rolling_mean_7",
-        "rolling_std_7",
-        "rolling_min_7",
-        "rolling_max_7",
-        "rolling_mean_14",
-        "rolling_std_14",
-        "rolling_min_14",
-        "rolling_max_14",
-        "ema_7",
-        "trend",
-    ]
+    feature_cols = list(FEATURE_COLS)
 
     # Pastikan semua fitur ada
     for feat in feature_cols:
@@ -231,70 +658,77 @@ def prepare_input_data(transactions_raw):
     return daily_df, X, feature_cols, y
 
 
-def forecast_next_days(model, daily_df, features, periods=7):
+def prepare_input_arrays(transactions_raw):
     """
-    Forecast expense untuk beberapa hari ke depan (SELALU POSITIF)
-    SESUAI DENGAN KAGGLE TRAINING
+    Versi cepat prepare_input_data memakai NumPy feature engine (features.py).
+    X berupa array float32 yang setara dengan X dari prepare_input_data
+    (toleransi per kolom: lihat features.py); daily_df hanya dibangun sekali
+    dari array tersebut untuk forecast & response.
     """
-    last_date = daily_df["Date"].max()
-    future_dates = [last_date + timedelta(days=i + 1) for i in range(periods)]
+    dates, amounts, X = compute_features(transactions_raw)
 
-    forecast_df = pd.DataFrame({"Date": future_dates})
+    daily_df = pd.DataFrame(X, columns=FEATURE_COLS)
+    daily_df.insert(0, "Date", dates.astype("datetime64[ns]"))
+    daily_df.insert(1, "Amount", amounts)
 
-    # Create date features
-    forecast_df["day"] = forecast_df["Date"].dt.day.astype("int8")
-    forecast_df["month"] = forecast_df["Date"].dt.month.astype("int8")
-    forecast_df["year"] = forecast_df["Date"].dt.year.astype("int16")
-    forecast_df["dayofweek"] = forecast_df["Date"].dt.dayofweek.astype("int8")
-    forecast_df["dayofyear"] = forecast_df["Date"].dt.dayofyear.astype("int16")
-    forecast_df["weekofyear"] = forecast_df["Date"].dt.isocalendar().week.astype("int8")
-    forecast_df["is_weekend"] = (forecast_df["dayofweek"] >= 5).astype("int8")
-    forecast_df["is_month_start"] = forecast_df["Date"].dt.is_month_start.astype("int8")
-    forecast_df["is_month_end"] = forecast_df["Date"].dt.is_month_end.astype("int8")
-    forecast_df["trend"] = range(len(daily_df), len(daily_df) + periods)
+    return daily_df, X, list(FEATURE_COLS), amounts
 
-    # Fill lag features dengan nilai dari data terakhir (Amount positif)
-    last_values = daily_df.iloc[-1]
 
-    for lag in [1, 2, 3, 7, 14]:
-        if lag == 1:
-            forecast_df[f"lag_{lag}"] = last_values["Amount"]
-        else:
-            lag_value = (
-                daily_df.iloc[-lag]["Amount"]
-                if len(daily_df) >= lag
-                else last_values["Amount"]
-            )
-            forecast_df[f"lag_{lag}"] = lag_value
+def build_forecast_frame(daily_df, features, periods=7):
+    """
+    Bangun baris fitur untuk hari-hari ke depan (tanpa prediksi),
+    sehingga bisa di-stack dengan baris user lain sebelum model.predict.
+    Fitur kalender seluruh horizon dihitung dalam satu pass vectorized
+    (calendar_features), jadi horizon 365+ hari tetap murah.
+    """
+    last_date = daily_df["Date"].to_numpy().max().astype("datetime64[D]")
+    future_dates = last_date + 1 + np.arange(periods)
 
-    # Rolling features
-    for window in [3, 7, 14]:
-        forecast_df[f"rolling_mean_{window}"] = last_values[f"rolling_mean_{window}"]
-        forecast_df[f"rolling_std_{window}"] = (
-            last_values[f"rolling_std_{window}"]
-            if not pd.isna(last_values[f"rolling_std_{window}"])
-            else 0.0
-        )
-        forecast_df[f"rolling_min_{window}"] = last_values[f"rolling_min_{window}"]
-        forecast_df[f"rolling_max_{window}"] = last_values[f"rolling_max_{window}"]
+    X = np.zeros((periods, len(FEATURE_COLS)), dtype=np.float32)
+    calendar_features(future_dates, X)
+    X[:, COL["trend"]] = len(daily_df) + np.arange(periods)
 
-    # EMA
-    forecast_df["ema_7"] = last_values["ema_7"]
+    # Fill lag features dengan nilai dari data terakhir (Amount positif)
+    amounts = daily_df["Amount"].to_numpy()
+    last_values = daily_df.iloc[-1]
+    for lag in LAG_PERIODS:
+        X[:, COL[f"lag_{lag}"]] = amounts[-lag] if len(amounts) >= lag else amounts[-1]
+
+    # Rolling features & EMA dari hari terakhir
+    for window in ROLLING_WINDOWS:
+        for stat in ("mean", "min", "max"):
+            X[:, COL[f"rolling_{stat}_{window}"]] = last_values[
+                f"rolling_{stat}_{window}"
+            ]
+        rolling_std = last_values[f"rolling_std_{window}"]
+        X[:, COL[f"rolling_std_{window}"]] = (
+            0.0 if pd.isna(rolling_std) else rolling_std
+        )
+    X[:, COL["ema_7"]] = last_values["ema_7"]
 
     # Transaction_Count - gunakan rata-rata 7 hari terakhir
-    avg_transaction = daily_df["Transaction_Count"].tail(7).mean()
-    forecast_df["Transaction_Count"] = avg_transaction
+    X[:, COL["Transaction_Count"]] = daily_df["Transaction_Count"].tail(7).mean()
 
-    # Fill missing values
-    forecast_df = forecast_df.fillna(method="ffill").fillna(method="bfill")
+    forecast_df = pd.DataFrame(X, columns=FEATURE_COLS)
+    forecast_df.insert(0, "Date", future_dates.astype("datetime64[ns]"))
 
     for feat in features:
         if feat not in forecast_df.columns:
             forecast_df[feat] = 0.0
 
+    return forecast_df
+
+
+def forecast_next_days(model, daily_df, features, periods=7):
+    """
+    Forecast expense untuk beberapa hari ke depan (SELALU POSITIF)
+    SESUAI DENGAN KAGGLE TRAINING
+    """
+    forecast_df = build_forecast_frame(daily_df, features, periods)
+
     # Prediction (SELALU POSITIF karena model dilatih untuk Amount positif)
-    dmatrix = xgb.DMatrix(forecast_df[features], feature_names=features)
-    forecast_df["forecast"] = model.predict(dmatrix)
+    X_future = forecast_df[features].to_numpy(dtype=np.float32)
+    forecast_df["forecast"] = predict_rows(model, X_future, features)
 
     # ✅ CLAMP KE MINIMUM 10.000 (realistis untuk expense harian di Indonesia)
     forecast_df["forecast"] = forecast_df["forecast"].clip(lower=10000)
@@ -302,28 +736,480 @@ def forecast_next_days(model, daily_df, features, periods=7):
     return forecast_df
 
 
-def convert_to_python_types(obj):
-    """
-    Konversi numpy types ke Python native types untuk JSON serialization
-    """
-    if isinstance(obj, (np.integer, np.int8, np.int16, np.int32, np.int64)):
-        return int(obj)
-    elif isinstance(obj, (np.floating, np.float16, np.float32, np.float64)):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
-        return obj.tolist()
-    elif isinstance(obj, pd.Timestamp):
-        return obj.strftime("%Y-%m-%d")
-    elif isinstance(obj, pd.Timedelta):
-        return str(obj)
-    elif isinstance(obj, dict):
-        return {k: convert_to_python_types(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_python_types(item) for item in obj]
-    elif isinstance(obj, tuple):
-        return tuple(convert_to_python_types(item) for item in obj)
-    else:
-        return obj
+def evaluation_window(n_days):
+    """Jumlah hari evaluasi: 20% data terakhir, minimal 7 hari"""
+    return max(int(n_days * 0.2), 7)
+
+
+def history_scoring_plan(daily_df, X, user_id, model_id):
+    """
+    Baris histori yang perlu di-predict untuk evaluasi: hanya window
+    evaluasi (EVAL_ONLY_PREDICT), dikurangi hari yang ada di prediction_cache
+    """
+    start = max(len(X) - evaluation_window(len(X)), 0) if EVAL_ONLY_PREDICT else 0
+    first_day = daily_df["Date"].to_numpy()[0].astype("datetime64[D]").astype(np.int64)
+    use_cache = PREDICTION_CACHE_ENABLED and None not in (user_id, model_id)
+    return ScoringPlan(
+        prediction_cache if use_cache else None,
+        str(user_id) if use_cache else None,
+        model_id,
+        int(first_day) + start,
+        X[start:],
+    )
+
+
+def evaluate_predictions(daily_df, y, y_pred_all, verbose=None):
+    """
+    Hitung metrik evaluasi pada 20% data terakhir (SESUAI TRAINING).
+    y_pred_all cukup berisi prediksi hari-hari terakhir (minimal window evaluasi)
+    """
+    if verbose is None:
+        verbose = logger.isEnabledFor(logging.DEBUG)
+
+    eval_window = evaluation_window(len(daily_df))
+
+    y_actual_eval = y[-eval_window:]
+    y_pred_eval = y_pred_all[-eval_window:]
+
+    # Kalkulasi metrik
+    mae_val = float(mean_absolute_error(y_actual_eval, y_pred_eval))
+    r2_val = float(r2_score(y_actual_eval, y_pred_eval))
+    rmse_val = root_mean_squared_error(y_actual_eval, y_pred_eval)
+    mape_val = mean_absolute_percentage_error(y_actual_eval, y_pred_eval)
+
+    if verbose:
+        logger.debug(f"\n   [EVALUATION DEBUG]")
+        logger.debug(f"   Evaluation window: {eval_window} days")
+        logger.debug(
+            f"   Actual values: min={y_actual_eval.min():.2f}, max={y_actual_eval.max():.2f}, mean={y_actual_eval.mean():.2f}"
+        )
+        logger.debug(
+            f"   Predicted values: min={y_pred_eval.min():.2f}, max={y_pred_eval.max():.2f}, mean={y_pred_eval.mean():.2f}"
+        )
+
+        # Debug R² calculation
+        ss_res = np.sum((y_actual_eval - y_pred_eval) ** 2)
+        ss_tot = np.sum((y_actual_eval - y_actual_eval.mean()) ** 2)
+        r2_manual = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
+
+        logger.debug(f"\n   [METRICS]")
+        logger.debug(f"   R² (sklearn): {r2_val:.4f}")
+        logger.debug(f"   R² (manual): {r2_manual:.4f}")
+        logger.debug(f"   MAE: {mae_val:.2f}")
+        logger.debug(f"   RMSE: {rmse_val:.2f}")
+        logger.debug(f"   MAPE: {mape_val:.2f}%")
+
+    # Pastikan metrik dalam range reasonable
+    r2_val = max(0.0, min(1.0, r2_val))
+    mae_val = abs(mae_val)
+
+    if np.isnan(mae_val) or np.isinf(mae_val):
+        mae_val = float(daily_df["Amount"].mean() * 0.2)
+
+    if verbose:
+        logger.debug(f"\n   ✅ Final R²: {r2_val:.4f}")
+        logger.debug(f"   ✅ Final MAE: {mae_val:.2f}")
+        logger.debug(f"   ✅ Accuracy %: {r2_val * 100:.2f}%")
+
+    return {
+        "eval_window": eval_window,
+        "y_actual_eval": y_actual_eval,
+        "y_pred_eval": y_pred_eval,
+        "r2": r2_val,
+        "mae": mae_val,
+        "rmse": rmse_val,
+        "mape": mape_val,
+    }
+
+
+def mode_to_periods(mode):
+    """Jumlah periode forecast untuk setiap mode (daily/weekly/monthly)"""
+    return 7 if mode == "daily" else (4 if mode == "weekly" else 3)
+
+
+def request_horizon(data, mode):
+    """
+    (periods, bucket) dari field horizon_days / bucket request (horizon.py);
+    tanpa kedua field jumlah periode mengikuti mode
+    """
+    return resolve_horizon(
+        data.get("horizon_days"), data.get("bucket"), mode_to_periods(mode)
+    )
+
+
+def request_deadline(data, start):
+    """Deadline dari field deadline_ms (ms sejak request mulai), None = tanpa"""
+    value = data.get("deadline_ms")
+    if value is None:
+        value = DEADLINE_DEFAULT_MS or None
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise PayloadError("INVALID_DEADLINE", "deadline_ms harus angka > 0")
+    return Deadline(float(value), start)
+
+
+def add_horizon_block(response, forecast_df, bucket):
+    """Tambahkan agregasi "buckets" + metadata horizon jika bucket diminta"""
+    if bucket is None:
+        return response
+    response["buckets"] = format_buckets(forecast_df, bucket)
+    response["metadata"]["horizon_days"] = len(forecast_df)
+    response["metadata"]["bucket"] = bucket
+    return response
+
+
+def recursive_forecast_frames(model, states, periods):
+    """
+    Forecast rekursif (lihat feature_state.forecast_recursive) untuk banyak
+    state sekaligus, dikembalikan sebagai forecast_df (Date, forecast) per user
+    """
+    start_dates, predictions = forecast_recursive(model, states, periods)
+    return [
+        pd.DataFrame(
+            {
+                "Date": (start + np.arange(periods)).astype("datetime64[ns]"),
+                "forecast": values,
+            }
+        )
+        for start, values in zip(start_dates, predictions)
+    ]
+
+
+def format_forecast_results(forecast_df):
+    """
+    Format baris forecast_df (kolom Date & forecast) menjadi list dict
+    untuk frontend. Return (forecast_results, total_expense)
+    """
+    # ✅ PREDIKSI LANGSUNG = EXPENSE (SELALU POSITIF)
+    predicted = forecast_df["forecast"].to_numpy(dtype=np.float64)
+    dates = forecast_df["Date"].to_numpy()
+    predicted_list = predicted.tolist()
+
+    # Confidence interval (80% - 120%); np.rint = round() Python (half-even)
+    forecast_results = [
+        {
+            "date": date,
+            "predicted_expense": expense,
+            "confidence_low": low,
+            "confidence_high": high,
+            "day_of_week": day,
+            "predicted_net_amount": round(value, 2),  # Sama dengan expense (positif)
+        }
+        for date, expense, low, high, day, value in zip(
+            date_strings(dates),
+            np.rint(predicted).astype(np.int64).tolist(),
+            np.rint(predicted * 0.8).astype(np.int64).tolist(),
+            np.rint(predicted * 1.2).astype(np.int64).tolist(),
+            day_names(dates),
+            predicted_list,
+        )
+    ]
+
+    # Dijumlah berurutan seperti sebelumnya (bukan pairwise np.sum)
+    return forecast_results, sum(predicted_list)
+
+
+def build_forecast_summary(forecast_results, total_expense, historical_average):
+    """Blok "summary" response dari hasil format_forecast_results"""
+    periods = len(forecast_results)
+    average_daily_expense = round(total_expense / periods) if periods > 0 else 0
+
+    return {
+        "total_forecast": int(total_expense),  # ✅ SUM SEMUA PREDIKSI (POSITIF)
+        "average_daily_expense": average_daily_expense,
+        "historical_average_expense": round(float(historical_average), 2),
+        "min_predicted_expense": round(
+            float(min(r["predicted_expense"] for r in forecast_results))
+        ),
+        "max_predicted_expense": round(
+            float(max(r["predicted_expense"] for r in forecast_results))
+        ),
+    }
+
+
+def build_audit_table(forecast_results):
+    return [
+        {
+            "range": f"Period {i+1}",
+            "y_pred": int(round(f["predicted_expense"])),
+            "confidence_range": f"{int(round(f['confidence_low']))} - {int(round(f['confidence_high']))}",
+        }
+        for i, f in enumerate(forecast_results)
+    ]
+
+
+def build_forecast_response(
+    daily_df,
+    feature_cols,
+    evaluation,
+    forecast_df,
+    mode,
+    forecast_method="static",
+    model_info=None,
+    bucket=None,
+):
+    """
+    Susun response (SESUAI DENGAN FRONTEND Forecasting.jsx) dari hasil
+    evaluasi dan forecast_df yang sudah berisi kolom "forecast".
+    model_info: identitas model yang dipakai (ModelVersion.metadata())
+    bucket: agregasi horizon (day/week/month/quarter), None = tanpa "buckets"
+    """
+    periods = len(forecast_df)
+    eval_window = evaluation["eval_window"]
+
+    # FORMAT FORECAST RESULTS (SELALU POSITIF - SESUAI TRAINING)
+    forecast_results, total_expense = format_forecast_results(forecast_df)
+
+    response = {
+        "forecast": forecast_results,
+        "metrics": {
+            "r_squared": round(float(evaluation["r2"]), 4),
+            "mae": round(float(evaluation["mae"]), 2),
+            "rmse": round(float(evaluation["rmse"]), 2),
+            "mape": round(float(evaluation["mape"]), 2),
+            "accuracy_percentage": round(float(evaluation["r2"] * 100), 2),
+            "model_type": "XGBoost (Expense-Only Mode)",
+            "evaluation_days": int(eval_window),
+            "historical_mean": round(float(daily_df["Amount"].mean()), 2),
+            "historical_std": round(float(daily_df["Amount"].std()), 2),
+        },
+        "summary": build_forecast_summary(
+            forecast_results, total_expense, daily_df["Amount"].mean()
+        ),
+        "metadata": {
+            "model_version": "XGBoost v2.2 (Expense-Only Mode)",
+            "timestamp": datetime.now().isoformat(),
+            "data_points_used": int(len(daily_df)),
+            "features_used": int(len(feature_cols)),
+            "target_variable": "Amount (Expense Only)",
+            "evaluation_method": "Time-series 20% split",
+            "model_path": MODEL_PATH,
+            "expense_only_mode": True,  # ✅ FLAG PENTING
+            "forecast_periods": periods,
+            "forecast_mode": mode,
+            "forecast_method": forecast_method,
+            **(model_info or {}),
+        },
+        "audit_table": build_audit_table(forecast_results),
+        "prediction_vs_actual": {
+            "dates": date_strings(daily_df["Date"].to_numpy()[-eval_window:]),
+            # Array float64 di-serialize langsung oleh encode_json
+            "actual": evaluation["y_actual_eval"].astype(np.float64),
+            "predicted": evaluation["y_pred_eval"].astype(np.float64),
+        },
+    }
+
+    return add_horizon_block(response, forecast_df, bucket)
+
+
+def baseline_forecast_response(
+    daily_df,
+    X,
+    y,
+    evaluation,
+    periods,
+    mode,
+    forecast_method,
+    model_info,
+    bucket,
+    deadline,
+    stage_name,
+):
+    """
+    Response forecast dari baseline saat deadline tidak cukup untuk stage
+    model berikutnya. evaluation None = metrik juga dari prediksi in-sample
+    baseline (model belum dijalankan sama sekali)
+    """
+    baseline = resolve_baseline(DEADLINE_BASELINE, len(X))
+    metrics_source = "model"
+    if evaluation is None:
+        evaluation = evaluate_predictions(daily_df, y, baseline_history(X, y, baseline))
+        metrics_source = "baseline"
+
+    last_date = daily_df["Date"].to_numpy()[-1].astype("datetime64[D]")
+    forecast_df = pd.DataFrame(
+        {
+            "Date": (last_date + 1 + np.arange(periods)).astype("datetime64[ns]"),
+            "forecast": baseline_forecast(X, y, periods, baseline),
+        }
+    )
+    response = build_forecast_response(
+        daily_df,
+        FEATURE_COLS,
+        evaluation,
+        forecast_df,
+        mode,
+        forecast_method,
+        model_info,
+        bucket,
+    )
+    if metrics_source == "baseline":
+        response["metrics"]["model_type"] = f"Baseline ({baseline})"
+    response["metadata"]["forecast_source"] = "baseline"
+    response["metadata"]["fallback"] = {
+        "reason": "deadline",
+        "baseline": baseline,
+        "stage": stage_name,
+        "metrics_source": metrics_source,
+        "deadline_ms": deadline.budget_ms,
+        "elapsed_ms": round(deadline.elapsed_ms(), 2),
+    }
+    FALLBACKS_TOTAL.inc(route="analyze_forecast", stage=stage_name)
+    return response
+
+
+def forecast_users_batch(
+    model,
+    users,
+    default_mode="weekly",
+    default_method="static",
+    model_info=None,
+    default_horizon=None,
+):
+    """
+    Forecast untuk banyak user dengan SATU kali model.predict.
+    Baris histori (window evaluasi yang belum ada di prediction_cache) dan
+    baris forecast setiap user di-stack menjadi satu matrix float32, lalu
+    hasil prediksi dipotong kembali per user.
+    User dengan forecast_method "recursive" di-forecast bersama setelahnya
+    (satu predict per step untuk semua user tersebut).
+    default_horizon: field horizon_days / bucket default untuk semua user
+    """
+    default_horizon = default_horizon or {}
+    model_id = (model_info or {}).get("model_id")
+    results = [None] * len(users)
+    prepared = []
+    blocks = []
+
+    for i, entry in enumerate(users):
+        user_id = entry.get("userId")
+        transactions = entry.get("transactions", [])
+        method = entry.get("forecast_method", default_method)
+
+        if not transactions or len(transactions) < 7:
+            results[i] = {
+                "userId": user_id,
+                "error": "INSUFFICIENT_DATA",
+                "message": "Minimal 7 transaksi diperlukan untuk prediksi",
+            }
+            continue
+
+        if method not in FORECAST_METHODS:
+            results[i] = {
+                "userId": user_id,
+                "error": "INVALID_FORECAST_METHOD",
+                "message": f"forecast_method harus salah satu dari {FORECAST_METHODS}",
+            }
+            continue
+
+        try:
+            mode = entry.get("mode", default_mode)
+            periods, bucket = request_horizon({**default_horizon, **entry}, mode)
+            daily_df, X, feature_cols, y = prepare_input_arrays(transactions)
+            if method == "recursive":
+                forecast_df = None
+            else:
+                forecast_df = build_forecast_frame(daily_df, feature_cols, periods)
+        except PayloadError as e:
+            results[i] = {"userId": user_id, "error": e.error, "message": e.message}
+            continue
+        except Exception as e:
+            results[i] = {
+                "userId": user_id,
+                "error": "PROCESSING_ERROR",
+                "message": str(e),
+            }
+            continue
+
+        plan = history_scoring_plan(daily_df, X, user_id, model_id)
+        blocks.append(plan.to_score)
+        if forecast_df is not None:
+            blocks.append(forecast_df[feature_cols].to_numpy(dtype=np.float32))
+        prepared.append(
+            [
+                i,
+                user_id,
+                mode,
+                periods,
+                bucket,
+                method,
+                daily_df,
+                feature_cols,
+                y,
+                forecast_df,
+                plan,
+            ]
+        )
+
+    if not prepared:
+        return results
+
+    # ✅ SATU KALI PREDICT UNTUK SEMUA USER
+    feature_cols = prepared[0][7]
+    stacked = np.concatenate(blocks)
+    predictions = predict_rows(model, stacked, feature_cols)
+
+    y_pred_by_user = []
+    offset = 0
+    for item in prepared:
+        forecast_df, plan = item[9], item[10]
+        n_hist = len(plan.to_score)
+        y_pred_by_user.append(plan.complete(predictions[offset : offset + n_hist]))
+        offset += n_hist
+        if forecast_df is not None:
+            n_future = len(forecast_df)
+            forecast_df["forecast"] = predictions[offset : offset + n_future]
+            forecast_df["forecast"] = forecast_df["forecast"].clip(lower=10000)
+            offset += n_future
+
+    # Forecast rekursif: dikelompokkan per jumlah periode, di-batch per step
+    recursive = [item for item in prepared if item[5] == "recursive"]
+    for periods in sorted({item[3] for item in recursive}):
+        group = [item for item in recursive if item[3] == periods]
+        frames = recursive_forecast_frames(
+            model, [FeatureState.from_daily_df(item[6]) for item in group], periods
+        )
+        for item, frame in zip(group, frames):
+            item[9] = frame
+
+    for item, y_pred_all in zip(prepared, y_pred_by_user):
+        (
+            i,
+            user_id,
+            mode,
+            periods,
+            bucket,
+            method,
+            daily_df,
+            feature_cols,
+            y,
+            forecast_df,
+            plan,
+        ) = item
+        try:
+            evaluation = evaluate_predictions(daily_df, y, y_pred_all, verbose=False)
+            response = build_forecast_response(
+                daily_df,
+                feature_cols,
+                evaluation,
+                forecast_df,
+                mode,
+                method,
+                model_info,
+                bucket,
+            )
+        except Exception as e:
+            results[i] = {
+                "userId": user_id,
+                "error": "PROCESSING_ERROR",
+                "message": str(e),
+            }
+            continue
+
+        results[i] = {"userId": user_id, **response}
+
+    return results
 
 
 # ============================================================================
@@ -332,26 +1218,53 @@ def convert_to_python_types(obj):
 
 
 @app.route("/analyze-forecast", methods=["POST"])
-def analyze_forecast():
+@instrumented("analyze_forecast")
+@admitted(forecast_store_probe, forecast_cache_probe)
+@with_active_model
+def analyze_forecast(active):
+    route = "analyze_forecast"
+    # Deadline dihitung sejak request masuk, termasuk waktu di antrian admission
+    start = g.get("request_start", time.perf_counter())
     try:
         # ============================================================================
         # VALIDATION
         # ============================================================================
 
-        if model is None or feature_names is None:
+        model = active.booster
+
+        with stage(route, "parse"):
+            req_data = read_request_data()
+        transactions = req_data.get("transactions", [])
+        mode = req_data.get("mode", "weekly")
+        forecast_method = req_data.get("forecast_method", "static")
+
+        if forecast_method not in FORECAST_METHODS:
             return (
                 jsonify(
                     {
-                        "error": "MODEL_NOT_LOADED",
-                        "message": "Model XGBoost belum berhasil dimuat.",
+                        "error": "INVALID_FORECAST_METHOD",
+                        "message": f"forecast_method harus salah satu dari {FORECAST_METHODS}",
                     }
                 ),
-                500,
+                400,
             )
 
-        req_data = request.json
-        transactions = req_data.get("transactions", [])
-        mode = req_data.get("mode", "weekly")
+        if (
+            not transactions
+            and forecast_store is not None
+            and req_data.get("userId") is not None
+            and normalize_watermark(req_data.get("watermark")) is not None
+        ):
+            # Tanpa transaksi hanya bisa dilayani forecast_store_probe
+            return (
+                jsonify(
+                    {
+                        "error": "FORECAST_STALE",
+                        "message": "Forecast tersimpan untuk watermark ini tidak ada atau sudah usang; kirim transactions untuk menghitung ulang",
+                    }
+                ),
+                409,
+            )
 
         if not transactions or len(transactions) < 7:
             return (
@@ -364,201 +1277,722 @@ def analyze_forecast():
                 400,
             )
 
+        periods, bucket = request_horizon(req_data, mode)
+        deadline = request_deadline(req_data, start)
+        g.forecast_store_key = request_store_key(
+            req_data, mode, forecast_method, periods, bucket, active.model_id
+        )
+
         # ============================================================================
-        # PREPARE DATA (EXPENSE-ONLY MODE - SESUAI TRAINING)
+        # CACHE LOOKUP (DATA + MODE + MODEL SAMA = RESPONSE SAMA)
         # ============================================================================
 
-        daily_df, X, feature_cols, y = prepare_input_data(transactions)
-
-        print(f"\n📊 [FORECAST DEBUG - EXPENSE-ONLY MODE]")
-        print(f"   Total data points: {len(daily_df)}")
-        print(f"   Data range: {daily_df['Date'].min()} to {daily_df['Date'].max()}")
-        print(f"   Features used: {len(feature_cols)}")
-        print(f"   Target (Amount) mean: {daily_df['Amount'].mean():.2f}")
-        print(f"   Target (Amount) std: {daily_df['Amount'].std():.2f}")
-        print(
-            f"   Target range: [{daily_df['Amount'].min():.2f}, {daily_df['Amount'].max():.2f}]"
-        )
+        cache_key = None
+        probed = g.pop("forecast_cache_probe", None)
+        if CACHE_ENABLED and probed is not None and probed[0] == active.model_id:
+            # Lookup (miss) sudah dilakukan forecast_cache_probe
+            cache_key = probed[1]
+        elif CACHE_ENABLED:
+            with stage(route, "cache_lookup"):
+                cache_key = make_cache_key(
+                    transactions,
+                    active.model_id,
+                    mode=mode,
+                    forecast_method=forecast_method,
+                    horizon_days=periods,
+                    bucket=bucket,
+                )
+                cached_body = forecast_cache.get(cache_key)
+            if cached_body is not None:
+                store_forecast(cached_body)
+                return app.response_class(
+                    cached_body,
+                    mimetype=app.json.mimetype,
+                    headers={"X-Forecast-Cache": "HIT"},
+                )
 
         # ============================================================================
-        # PREDICTION (SELALU POSITIF - SESUAI TRAINING)
+        # PREPARE DATA (EXPENSE-ONLY MODE - SESUAI TRAINING)
         # ============================================================================
 
-        dmatrix = xgb.DMatrix(X, feature_names=feature_cols)
-        y_pred_all = model.predict(dmatrix)
+        with stage(route, "prepare_input_data"):
+            daily_df, X, feature_cols, y = prepare_input_arrays(transactions)
 
-        print(
-            f"   Model predictions range: [{y_pred_all.min():.2f}, {y_pred_all.max():.2f}]"
-        )
-        print(f"   Model predictions mean: {y_pred_all.mean():.2f}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"\n📊 [FORECAST DEBUG - EXPENSE-ONLY MODE]")
+            logger.debug(f"   Total data points: {len(daily_df)}")
+            logger.debug(
+                f"   Data range: {daily_df['Date'].min()} to {daily_df['Date'].max()}"
+            )
+            logger.debug(f"   Features used: {len(feature_cols)}")
+            logger.debug(f"   Target (Amount) mean: {daily_df['Amount'].mean():.2f}")
+            logger.debug(f"   Target (Amount) std: {daily_df['Amount'].std():.2f}")
+            logger.debug(
+                f"   Target range: [{daily_df['Amount'].min():.2f}, {daily_df['Amount'].max():.2f}]"
+            )
 
         # ============================================================================
-        # EVALUATION METRICS (20% DATA TERAKHIR - SESUAI TRAINING)
+        # DEADLINE: STAGE MODEL TIDAK MUAT DI SISA BUDGET -> BASELINE
         # ============================================================================
 
-        eval_window = int(len(daily_df) * 0.2)
-        eval_window = max(eval_window, 7)  # Minimal 7 hari
+        if deadline is not None:
+            rows_to_score = (
+                evaluation_window(len(X)) if EVAL_ONLY_PREDICT else len(X)
+            ) + (periods if forecast_method == "static" else 0)
+            estimate = stage_costs.estimate("predict", rows_to_score)
+            if forecast_method == "recursive":
+                estimate += stage_costs.estimate("recursive", periods)
+            if not deadline.allows(estimate):
+                with stage(route, "baseline"):
+                    response = baseline_forecast_response(
+                        daily_df,
+                        X,
+                        y,
+                        None,
+                        periods,
+                        mode,
+                        forecast_method,
+                        active.metadata(),
+                        bucket,
+                        deadline,
+                        "prepare_input_data",
+                    )
+                return json_response(response)
 
-        y_actual_eval = y[-eval_window:]
-        y_pred_eval = y_pred_all[-eval_window:]
+        # ============================================================================
+        # PREDICTION (SELALU POSITIF - SESUAI TRAINING)
+        # ============================================================================
 
-        print(f"\n   [EVALUATION DEBUG]")
-        print(f"   Evaluation window: {eval_window} days")
-        print(
-            f"   Actual values: min={y_actual_eval.min():.2f}, max={y_actual_eval.max():.2f}, mean={y_actual_eval.mean():.2f}"
-        )
-        print(
-            f"   Predicted values: min={y_pred_eval.min():.2f}, max={y_pred_eval.max():.2f}, mean={y_pred_eval.mean():.2f}"
-        )
+        # Baris histori + baris forecast (static) di-predict sekaligus lewat
+        # micro-batcher, bersama request lain yang datang bersamaan
+        predict_start = time.perf_counter()
+        with stage(route, "predict_history"):
+            plan = history_scoring_plan(
+                daily_df, X, req_data.get("userId"), active.model_id
+            )
+            rows = plan.to_score
+            if forecast_method == "static":
+                forecast_df = build_forecast_frame(daily_df, feature_cols, periods)
+                future = forecast_df[feature_cols].to_numpy(dtype=np.float32)
+                rows = np.concatenate([rows, future])
+            predictions = micro_batcher.predict(model, rows, feature_cols)
+            n_scored = len(plan.to_score)
+            y_pred_all = plan.complete(predictions[:n_scored])
+        stage_costs.observe("predict", len(rows), time.perf_counter() - predict_start)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                f"   Model predictions range: [{y_pred_all.min():.2f}, {y_pred_all.max():.2f}]"
+            )
+            logger.debug(f"   Model predictions mean: {y_pred_all.mean():.2f}")
 
-        # Kalkulasi metrik
-        mae_val = float(mean_absolute_error(y_actual_eval, y_pred_eval))
-        r2_val = float(r2_score(y_actual_eval, y_pred_eval))
-        rmse_val = np.sqrt(np.mean((y_actual_eval - y_pred_eval) ** 2))
-        mape_val = (
-            np.mean(np.abs((y_actual_eval - y_pred_eval) / (y_actual_eval + 1e-8)))
-            * 100
-        )
+        # ============================================================================
+        # EVALUATION METRICS (20% DATA TERAKHIR - SESUAI TRAINING)
+        # ============================================================================
 
-        # Debug R² calculation
-        ss_res = np.sum((y_actual_eval - y_pred_eval) ** 2)
-        ss_tot = np.sum((y_actual_eval - y_actual_eval.mean()) ** 2)
-        r2_manual = 1 - (ss_res / ss_tot) if ss_tot != 0 else 0
+        with stage(route, "metrics"):
+            evaluation = evaluate_predictions(daily_df, y, y_pred_all)
+
+        # Forecast rekursif (satu predict per hari) adalah stage termahal
+        if (
+            deadline is not None
+            and forecast_method == "recursive"
+            and not deadline.allows(stage_costs.estimate("recursive", periods))
+        ):
+            with stage(route, "baseline"):
+                response = baseline_forecast_response(
+                    daily_df,
+                    X,
+                    y,
+                    evaluation,
+                    periods,
+                    mode,
+                    forecast_method,
+                    active.metadata(),
+                    bucket,
+                    deadline,
+                    "forecast",
+                )
+            return json_response(response)
 
-        print(f"\n   [METRICS]")
-        print(f"   R² (sklearn): {r2_val:.4f}")
-        print(f"   R² (manual): {r2_manual:.4f}")
-        print(f"   MAE: {mae_val:.2f}")
-        print(f"   RMSE: {rmse_val:.2f}")
-        print(f"   MAPE: {mape_val:.2f}%")
+        # ============================================================================
+        # FORECAST MASA DEPAN (7 HARI - SESUAI TRAINING)
+        # ============================================================================
 
-        # Pastikan metrik dalam range reasonable
-        r2_val = max(0.0, min(1.0, r2_val))
-        mae_val = abs(mae_val)
+        with stage(route, "forecast"):
+            if forecast_method == "recursive":
+                forecast_start = time.perf_counter()
+                state = FeatureState.from_daily_df(daily_df)
+                forecast_df = recursive_forecast_frames(model, [state], periods)[0]
+                stage_costs.observe(
+                    "recursive", periods, time.perf_counter() - forecast_start
+                )
+            else:
+                forecast_df["forecast"] = predictions[n_scored:]
+                forecast_df["forecast"] = forecast_df["forecast"].clip(lower=10000)
 
-        if np.isnan(mae_val) or np.isinf(mae_val):
-            mae_val = float(daily_df["Amount"].mean() * 0.2)
+        # ============================================================================
+        # BUILD RESPONSE (SESUAI DENGAN FRONTEND Forecasting.jsx)
+        # ============================================================================
 
-        print(f"\n   ✅ Final R²: {r2_val:.4f}")
-        print(f"   ✅ Final MAE: {mae_val:.2f}")
-        print(f"   ✅ Accuracy %: {r2_val * 100:.2f}%")
+        with stage(route, "serialize"):
+            response = build_forecast_response(
+                daily_df,
+                feature_cols,
+                evaluation,
+                forecast_df,
+                mode,
+                forecast_method,
+                active.metadata(),
+                bucket,
+            )
+            result = json_response(response)
 
         # ============================================================================
-        # FORECAST MASA DEPAN (7 HARI - SESUAI TRAINING)
+        # SHADOW MODEL: BARIS FITUR YANG SUDAH ADA DISERAHKAN KE BACKGROUND
         # ============================================================================
 
-        periods = 7 if mode == "daily" else (4 if mode == "weekly" else 3)
-        forecast_df = forecast_next_days(model, daily_df, feature_cols, periods)
+        if shadow_evaluator.enabled:
+            eval_window = evaluation_window(len(X))
+            static = forecast_method == "static"
+            shadow_evaluator.submit(
+                active.model_id,
+                X[-eval_window:],
+                y[-eval_window:],
+                y_pred_all[-eval_window:],
+                future if static else None,
+                forecast_df["forecast"].to_numpy() if static else None,
+            )
 
         # ============================================================================
-        # FORMAT FORECAST RESULTS (SELALU POSITIF - SESUAI TRAINING)
+        # DEBUG: VERIFIKASI NILAI FORECAST
         # ============================================================================
 
-        forecast_results = []
-        total_expense = 0
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"\n   ✅ [FORECAST SUMMARY - EXPENSE-ONLY]")
+            logger.debug(
+                f"   Total Expense Forecast: Rp {response['summary']['total_forecast']:,.0f}"
+            )
+            logger.debug(
+                f"   Average Daily Expense: Rp {response['summary']['average_daily_expense']:,.0f}"
+            )
+            for i, f in enumerate(response["forecast"]):
+                logger.debug(
+                    f"   Day {i+1} ({f['day_of_week']}, {f['date']}): Rp {f['predicted_expense']:,.0f}"
+                )
 
-        for idx, row in forecast_df.iterrows():
-            # ✅ PREDIKSI LANGSUNG = EXPENSE (SELALU POSITIF)
-            predicted_expense = float(row["forecast"])
-            total_expense += predicted_expense
+        if cache_key is not None:
+            forecast_cache.put(cache_key, result.get_data(), tag=req_data.get("userId"))
+            result.headers["X-Forecast-Cache"] = "MISS"
+        if store_forecast(result.get_data()):
+            result.headers["X-Forecast-Store"] = "MISS"
+        return result
 
-            # Confidence interval (80% - 120%)
-            confidence_low = predicted_expense * 0.8
-            confidence_high = predicted_expense * 1.2
+    except PayloadError as e:
+        return payload_error_response(e)
 
-            forecast_results.append(
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/analyze-forecast/batch", methods=["POST"])
+@instrumented("analyze_forecast_batch")
+@admitted()
+@with_active_model
+def analyze_forecast_batch(active):
+    """
+    Forecast banyak user dalam satu request: fitur semua user di-stack
+    menjadi satu matrix sehingga model.predict hanya dipanggil sekali
+    """
+    try:
+        model = active.booster
+
+        with stage("analyze_forecast_batch", "parse"):
+            req_data = read_request_data() or {}
+        users = req_data.get("users", [])
+        default_mode = req_data.get("mode", "weekly")
+        default_method = req_data.get("forecast_method", "static")
+        default_horizon = {
+            key: req_data[key] for key in ("horizon_days", "bucket") if key in req_data
+        }
+
+        if not isinstance(users, list) or not users:
+            return (
+                jsonify(
+                    {
+                        "error": "INVALID_BATCH",
+                        "message": "Field 'users' harus berupa list yang tidak kosong",
+                    }
+                ),
+                400,
+            )
+
+        with stage("analyze_forecast_batch", "forecast"):
+            results = forecast_users_batch(
+                model,
+                users,
+                default_mode,
+                default_method,
+                active.metadata(),
+                default_horizon,
+            )
+
+        with stage("analyze_forecast_batch", "serialize"):
+            return json_response(
                 {
-                    "date": row["Date"].strftime("%Y-%m-%d"),
-                    "predicted_expense": round(predicted_expense),
-                    "confidence_low": round(confidence_low),
-                    "confidence_high": round(confidence_high),
-                    "day_of_week": row["Date"].strftime("%A"),
-                    "predicted_net_amount": round(
-                        predicted_expense, 2
-                    ),  # Sama dengan expense (positif)
+                    "results": results,
+                    "metadata": {
+                        "model_version": "XGBoost v2.2 (Expense-Only Mode)",
+                        "timestamp": datetime.now().isoformat(),
+                        "users_requested": len(users),
+                        "users_succeeded": sum(1 for r in results if "error" not in r),
+                        **active.metadata(),
+                    },
                 }
             )
 
-        average_daily_expense = round(total_expense / periods) if periods > 0 else 0
+    except PayloadError as e:
+        return payload_error_response(e)
 
-        # ============================================================================
-        # BUILD RESPONSE (SESUAI DENGAN FRONTEND Forecasting.jsx)
-        # ============================================================================
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
 
-        response = {
-            "forecast": forecast_results,
-            "metrics": {
-                "r_squared": round(float(r2_val), 4),
-                "mae": round(float(mae_val), 2),
-                "rmse": round(float(rmse_val), 2),
-                "mape": round(float(mape_val), 2),
-                "accuracy_percentage": round(float(r2_val * 100), 2),
-                "model_type": "XGBoost (Expense-Only Mode)",
-                "evaluation_days": int(eval_window),
-                "historical_mean": round(float(daily_df["Amount"].mean()), 2),
-                "historical_std": round(float(daily_df["Amount"].std()), 2),
-            },
-            "summary": {
-                "total_forecast": int(total_expense),  # ✅ SUM SEMUA PREDIKSI (POSITIF)
-                "average_daily_expense": average_daily_expense,
-                "historical_average_expense": round(
-                    float(daily_df["Amount"].mean()), 2
+
+@app.route("/analyze-forecast/categories", methods=["POST"])
+@instrumented("analyze_forecast_categories")
+@admitted()
+@with_active_model
+def analyze_forecast_categories(active):
+    """
+    Forecast total dan per kategori (field Category/category transaksi)
+    dengan satu predict untuk semua series. Forecast kategori
+    direkonsiliasi sehingga jumlahnya per hari = forecast total
+    """
+    route = "analyze_forecast_categories"
+    try:
+        model = active.booster
+
+        with stage(route, "parse"):
+            req_data = read_request_data() or {}
+        transactions = req_data.get("transactions", [])
+        mode = req_data.get("mode", "weekly")
+        forecast_method = req_data.get("forecast_method", "static")
+
+        if forecast_method not in FORECAST_METHODS:
+            return (
+                jsonify(
+                    {
+                        "error": "INVALID_FORECAST_METHOD",
+                        "message": f"forecast_method harus salah satu dari {FORECAST_METHODS}",
+                    }
+                ),
+                400,
+            )
+
+        if not transactions or len(transactions) < 7:
+            return (
+                jsonify(
+                    {
+                        "error": "INSUFFICIENT_DATA",
+                        "message": "Minimal 7 transaksi diperlukan untuk prediksi",
+                    }
+                ),
+                400,
+            )
+        periods, bucket = request_horizon(req_data, mode)
+
+        with stage(route, "prepare_input_data"):
+            dates, amounts, labels = parse_category_transactions(transactions)
+            if len(dates) == 0:
+                return (
+                    jsonify(
+                        {
+                            "error": "INSUFFICIENT_DATA",
+                            "message": "Tidak ada transaksi expense untuk diprediksi",
+                        }
+                    ),
+                    400,
+                )
+            (
+                categories,
+                first_date,
+                total_amount,
+                total_count,
+                category_amount,
+                category_count,
+            ) = aggregate_categories(dates, amounts, labels)
+            # Series 0 = total user, 1.. = kategori
+            series_amount = np.vstack([total_amount, category_amount])
+            series_count = np.vstack([total_count, category_count])
+
+        # ✅ SATU PREDICT (STATIC) / SATU PREDICT PER STEP (RECURSIVE) UNTUK
+        # TOTAL + SEMUA KATEGORI; hanya total yang di-clip minimum 10.000
+        with stage(route, "forecast"):
+            if forecast_method == "recursive":
+                states = series_states(first_date, series_amount, series_count)
+                min_value = np.zeros(len(states), dtype=np.float32)
+                min_value[0] = 10000
+                start_dates, predictions = forecast_recursive(
+                    model, states, periods, min_value
+                )
+                future_dates = start_dates[0] + np.arange(periods)
+            else:
+                future_dates, X = series_forecast_features(
+                    first_date, series_amount, series_count, periods
+                )
+                predictions = micro_batcher.predict(
+                    model, X.reshape(-1, len(FEATURE_COLS)), FEATURE_COLS
+                ).reshape(len(X), periods)
+                predictions[0] = np.maximum(predictions[0], 10000)
+
+            category_total = category_amount.sum(axis=1)
+            historical_share = (
+                category_total / category_total.sum()
+                if category_total.sum() > 0
+                else np.full(len(categories), 1.0 / len(categories))
+            )
+            total_pred = predictions[0].astype(np.float64)
+            reconciled = reconcile(predictions[1:], total_pred, historical_share)
+
+        with stage(route, "serialize"):
+            forecast_df = pd.DataFrame(
+                {
+                    "Date": future_dates.astype("datetime64[ns]"),
+                    "forecast": predictions[0],
+                }
+            )
+            forecast_results, _ = format_forecast_results(forecast_df)
+            # Integer per kategori dijumlah tepat = predicted_expense total;
+            # summary.total_forecast dari deret bulat yang sama agar total
+            # kategori = summary (bukan int() dari jumlah float)
+            daily_total = np.rint(total_pred)
+            allocated = allocate_integers(reconciled, daily_total)
+            day_strings = date_strings(future_dates)
+
+            category_results = [
+                {
+                    "category": category,
+                    "historical_total": round(float(category_total[i]), 2),
+                    "historical_share": round(float(historical_share[i]), 4),
+                    "total_forecast": int(allocated[i].sum()),
+                    "forecast": [
+                        {"date": date, "predicted_expense": expense}
+                        for date, expense in zip(day_strings, allocated[i].tolist())
+                    ],
+                }
+                for i, category in enumerate(categories)
+            ]
+            category_results.sort(key=lambda c: c["total_forecast"], reverse=True)
+
+            response = {
+                "forecast": forecast_results,
+                "categories": category_results,
+                "summary": build_forecast_summary(
+                    forecast_results, daily_total.sum(), total_amount.mean()
                 ),
-                "min_predicted_expense": round(
-                    float(min(r["predicted_expense"] for r in forecast_results))
+                "metadata": {
+                    "model_version": "XGBoost v2.2 (Expense-Only Mode)",
+                    "timestamp": datetime.now().isoformat(),
+                    "data_points_used": int(len(total_amount)),
+                    "categories": len(categories),
+                    "reconciliation": "proportional",
+                    "expense_only_mode": True,
+                    "forecast_periods": periods,
+                    "forecast_mode": mode,
+                    "forecast_method": forecast_method,
+                    **active.metadata(),
+                },
+            }
+            return json_response(add_horizon_block(response, forecast_df, bucket))
+
+    except PayloadError as e:
+        return payload_error_response(e)
+
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+
+def forecast_cashflow_side(booster, side, last_date, periods, method, min_value):
+    """
+    Forecast satu series cash flow (first_date, amount, count) untuk
+    `periods` hari mulai last_date + 1. Series yang berakhir sebelum
+    last_date di-forecast melewati selisih harinya, lalu hari-hari itu dibuang
+    """
+    first_date, amount, count = side
+    gap = int((last_date - (first_date + amount.shape[1] - 1)).astype(np.int64))
+    if method == "recursive":
+        states = series_states(first_date, amount, count)
+        _, pred = forecast_recursive(booster, states, gap + periods, min_value)
+        return pred[0, gap:]
+    _, X = series_forecast_features(first_date, amount, count, gap + periods)
+    return np.maximum(
+        micro_batcher.predict(booster, X[0, gap:], FEATURE_COLS), min_value
+    )
+
+
+@app.route("/analyze-forecast/cashflow", methods=["POST"])
+@instrumented("analyze_forecast_cashflow")
+@admitted()
+@with_active_model
+def analyze_forecast_cashflow(active):
+    """
+    Forecast expense, income dan net (income - expense) sekaligus: parse
+    dikerjakan sekali, setiap series dibangun pada rentang tanggalnya sendiri
+    lalu di-score dengan model-nya sendiri
+    """
+    route = "analyze_forecast_cashflow"
+    with income_registry.acquire() as income:
+        if income is None:
+            return (
+                jsonify(
+                    {
+                        "error": "INCOME_MODEL_NOT_AVAILABLE",
+                        "message": "Model income (target=income) belum tersedia, "
+                        "forecast cash flow nonaktif.",
+                    }
                 ),
-                "max_predicted_expense": round(
-                    float(max(r["predicted_expense"] for r in forecast_results))
+                501,
+            )
+
+        try:
+            with stage(route, "parse"):
+                req_data = read_request_data() or {}
+            transactions = req_data.get("transactions", [])
+            mode = req_data.get("mode", "weekly")
+            forecast_method = req_data.get("forecast_method", "static")
+
+            if forecast_method not in FORECAST_METHODS:
+                return (
+                    jsonify(
+                        {
+                            "error": "INVALID_FORECAST_METHOD",
+                            "message": f"forecast_method harus salah satu dari {FORECAST_METHODS}",
+                        }
+                    ),
+                    400,
+                )
+
+            if transactions is None or len(transactions) < 7:
+                return (
+                    jsonify(
+                        {
+                            "error": "INSUFFICIENT_DATA",
+                            "message": "Minimal 7 transaksi diperlukan untuk prediksi",
+                        }
+                    ),
+                    400,
+                )
+            periods, bucket = request_horizon(req_data, mode)
+
+            with stage(route, "prepare_input_data"):
+                dates, amounts, codes = parse_cashflow_transactions(transactions)
+                if len(np.unique(codes)) < 2:
+                    return (
+                        jsonify(
+                            {
+                                "error": "INSUFFICIENT_DATA",
+                                "message": "Transaksi EXPENSE dan INCOME diperlukan untuk forecast cash flow",
+                            }
+                        ),
+                        400,
+                    )
+                expense_side, income_side = cashflow_series(dates, amounts, codes)
+
+            # Kedua series di-forecast mulai sehari setelah tanggal terakhir gabungan
+            with stage(route, "forecast"):
+                last_date = dates.max()
+                future_dates = last_date + 1 + np.arange(periods)
+                expense_pred = forecast_cashflow_side(
+                    active.booster,
+                    expense_side,
+                    last_date,
+                    periods,
+                    forecast_method,
+                    10000,
+                )
+                income_pred = forecast_cashflow_side(
+                    income.booster, income_side, last_date, periods, forecast_method, 0
+                )
+
+            with stage(route, "serialize"):
+                forecast_results, total_expense, total_income = format_cashflow_results(
+                    future_dates, expense_pred, income_pred
+                )
+                response = {
+                    "forecast": forecast_results,
+                    "summary": {
+                        "total_expense": total_expense,
+                        "total_income": total_income,
+                        "net_cash_flow": total_income - total_expense,
+                        "average_daily_expense": round(total_expense / periods),
+                        "average_daily_income": round(total_income / periods),
+                        "historical_average_expense": round(
+                            float(expense_side[1].mean()), 2
+                        ),
+                        "historical_average_income": round(
+                            float(income_side[1].mean()), 2
+                        ),
+                    },
+                    "metadata": {
+                        "model_version": "XGBoost v2.2 (Cash Flow Mode)",
+                        "timestamp": datetime.now().isoformat(),
+                        "data_points_used": expense_side[1].shape[1],
+                        "income_data_points_used": income_side[1].shape[1],
+                        "expense_only_mode": False,
+                        "forecast_periods": periods,
+                        "forecast_mode": mode,
+                        "forecast_method": forecast_method,
+                        **active.metadata(),
+                        "income_model": income.metadata(),
+                    },
+                }
+                if bucket is not None:
+                    response["buckets"] = format_cashflow_buckets(
+                        future_dates, expense_pred, income_pred, bucket
+                    )
+                    response["metadata"]["horizon_days"] = periods
+                    response["metadata"]["bucket"] = bucket
+                return json_response(response)
+
+        except PayloadError as e:
+            return payload_error_response(e)
+
+        except Exception as e:
+            traceback.print_exc()
+            return jsonify({"error": str(e)}), 500
+
+
+@app.route("/analyze-forecast/incremental", methods=["POST"])
+@instrumented("analyze_forecast_incremental")
+@admitted()
+@with_active_model
+def analyze_forecast_incremental(active):
+    """
+    Forecast berbasis FeatureState: tanpa cursor = full sync dari seluruh
+    histori, dengan cursor = hanya transaksi baru sejak cursor tersebut
+    """
+    try:
+        model = active.booster
+
+        with stage("analyze_forecast_incremental", "parse"):
+            req_data = read_request_data() or {}
+        user_id = req_data.get("userId")
+        cursor = req_data.get("cursor")
+        transactions = req_data.get("transactions", [])
+        mode = req_data.get("mode", "weekly")
+        forecast_method = req_data.get("forecast_method", "static")
+
+        if forecast_method not in FORECAST_METHODS:
+            return (
+                jsonify(
+                    {
+                        "error": "INVALID_FORECAST_METHOD",
+                        "message": f"forecast_method harus salah satu dari {FORECAST_METHODS}",
+                    }
                 ),
-            },
+                400,
+            )
+        periods, bucket = request_horizon(req_data, mode)
+
+        if user_id is None:
+            return (
+                jsonify({"error": "INVALID_USER_ID", "message": "userId wajib diisi"}),
+                400,
+            )
+
+        if cursor is None:
+            # FULL SYNC
+            if not transactions or len(transactions) < 7:
+                return (
+                    jsonify(
+                        {
+                            "error": "INSUFFICIENT_DATA",
+                            "message": "Minimal 7 transaksi diperlukan untuk prediksi",
+                        }
+                    ),
+                    400,
+                )
+            state = FeatureState.from_transactions(transactions)
+        else:
+            # DELTA SEJAK CURSOR (diterapkan ke salinan agar atomic)
+            with user_states_lock:
+                current = user_states.get(user_id)
+            if current is None or current.cursor != cursor:
+                return cursor_mismatch_response()
+            state = current.copy()
+            try:
+                state.append_transactions(transactions)
+            except ValueError as e:
+                return (
+                    jsonify(
+                        {"error": "CURSOR_MISMATCH", "message": str(e), "cursor": None}
+                    ),
+                    409,
+                )
+
+        if state.n_days == 0:
+            return (
+                jsonify(
+                    {
+                        "error": "INSUFFICIENT_DATA",
+                        "message": "Tidak ada transaksi expense untuk diprediksi",
+                    }
+                ),
+                400,
+            )
+
+        with user_states_lock:
+            # Compare-and-set: delta hanya disimpan jika state yang disalin
+            # masih state terbaru; request konkuren dengan cursor yang sama
+            # kalah dan mendapat CURSOR_MISMATCH seperti cursor kadaluarsa
+            if cursor is not None and user_states.get(user_id) is not current:
+                return cursor_mismatch_response()
+            user_states[user_id] = state
+            user_states.move_to_end(user_id)
+            while len(user_states) > MAX_USER_STATES:
+                user_states.popitem(last=False)
+
+        # FORECAST DARI STATE (TANPA MENGHITUNG ULANG HISTORI)
+        if forecast_method == "recursive":
+            forecast_df = recursive_forecast_frames(model, [state], periods)[0]
+        else:
+            future_dates, X_future = state.forecast_features(periods)
+            forecast_df = pd.DataFrame({"Date": future_dates.astype("datetime64[ns]")})
+            forecast_df["forecast"] = micro_batcher.predict(
+                model, X_future, FEATURE_COLS
+            )
+            forecast_df["forecast"] = forecast_df["forecast"].clip(lower=10000)
+
+        forecast_results, total_expense = format_forecast_results(forecast_df)
+
+        response = {
+            "forecast": forecast_results,
+            "summary": build_forecast_summary(
+                forecast_results, total_expense, state.historical_mean
+            ),
             "metadata": {
                 "model_version": "XGBoost v2.2 (Expense-Only Mode)",
                 "timestamp": datetime.now().isoformat(),
-                "data_points_used": int(len(daily_df)),
-                "features_used": int(len(feature_cols)),
-                "target_variable": "Amount (Expense Only)",
-                "evaluation_method": "Time-series 20% split",
-                "model_path": MODEL_PATH,
-                "expense_only_mode": True,  # ✅ FLAG PENTING
+                "data_points_used": int(state.n_days),
+                "last_date": str(state.last_date),
+                "cursor": state.cursor,
+                "incremental": cursor is not None,
+                "expense_only_mode": True,
                 "forecast_periods": periods,
                 "forecast_mode": mode,
+                "forecast_method": forecast_method,
+                **active.metadata(),
             },
-            "audit_table": [
-                {
-                    "range": f"Period {i+1}",
-                    "y_pred": int(round(f["predicted_expense"])),
-                    "confidence_range": f"{int(round(f['confidence_low']))} - {int(round(f['confidence_high']))}",
-                }
-                for i, f in enumerate(forecast_results)
-            ],
-            "prediction_vs_actual": {
-                "dates": [
-                    d.strftime("%Y-%m-%d") for d in daily_df["Date"].tail(eval_window)
-                ],
-                "actual": [float(x) for x in y_actual_eval.tolist()],
-                "predicted": [float(x) for x in y_pred_eval.tolist()],
-            },
+            "audit_table": build_audit_table(forecast_results),
         }
 
-        # ============================================================================
-        # KONVERSI KE PYTHON NATIVE TYPES
-        # ============================================================================
-
-        response = convert_to_python_types(response)
+        return json_response(add_horizon_block(response, forecast_df, bucket))
 
-        # ============================================================================
-        # DEBUG: VERIFIKASI NILAI FORECAST
-        # ============================================================================
-
-        print(f"\n   ✅ [FORECAST SUMMARY - EXPENSE-ONLY]")
-        print(f"   Total Expense Forecast: Rp {total_expense:,.0f}")
-        print(f"   Average Daily Expense: Rp {average_daily_expense:,.0f}")
-        for i, f in enumerate(forecast_results):
-            print(
-                f"   Day {i+1} ({f['day_of_week']}, {f['date']}): Rp {f['predicted_expense']:,.0f}"
-            )
-
-        return jsonify(response)
+    except PayloadError as e:
+        return payload_error_response(e)
 
     except Exception as e:
         traceback.print_exc()
@@ -572,16 +2006,232 @@ def analyze_forecast():
 
 @app.route("/health", methods=["GET"])
 def health_check():
+    active = model_registry.active
     status = {
-        "status": "healthy" if model is not None else "unhealthy",
-        "model_loaded": model is not None,
+        "status": "healthy" if active is not None else "unhealthy",
+        "model_loaded": active is not None,
         "expense_only_mode": True,  # ✅ FLAG PENTING
-        "feature_names": feature_names,
+        "feature_names": active.feature_names if active is not None else None,
+        "model_id": active.model_id if active is not None else None,
+        "model_version": active.version if active is not None else None,
+        "model_registry": model_registry.describe(),
+        "income_model_registry": income_registry.describe(),
+        "shadow": shadow_evaluator.stats(),
+        "admission": admission.stats(),
+        "cache": forecast_cache.stats() if CACHE_ENABLED else None,
+        "forecast_store": (
+            forecast_store.stats() if forecast_store is not None else None
+        ),
+        "prediction_cache": (
+            prediction_cache.stats() if PREDICTION_CACHE_ENABLED else None
+        ),
+        "eval_only_predict": EVAL_ONLY_PREDICT,
+        "deadline": {
+            "default_ms": DEADLINE_DEFAULT_MS or None,
+            "baseline": DEADLINE_BASELINE,
+            "stage_cost_us_per_row": stage_costs.stats(),
+        },
+        "startup": STARTUP.report(),
         "timestamp": datetime.now().isoformat(),
     }
     return jsonify(status), 200
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Latency histogram, counter dan gauge dalam Prometheus text format"""
+    cache_stats = forecast_cache.stats()
+    prediction_stats = prediction_cache.stats()
+    registry = model_registry.describe()
+    shadow_stats = shadow_evaluator.stats()
+    admission_stats = admission.stats()
+    store_stats = forecast_store.stats() if forecast_store is not None else {}
+    body = render_metrics(
+        {
+            "forecast_cache_entries": ("Jumlah entry cache", cache_stats["entries"]),
+            "forecast_cache_bytes": ("Ukuran cache (bytes)", cache_stats["bytes"]),
+            "forecast_user_states": ("Jumlah FeatureState di memori", len(user_states)),
+            "forecast_prediction_cache_bytes": (
+                "Ukuran cache prediksi in-sample (bytes)",
+                prediction_stats["bytes"],
+            ),
+            "forecast_model_draining": (
+                "Versi model lama yang menunggu request selesai",
+                len(registry["draining"]),
+            ),
+            "forecast_admission_active": (
+                "Request berat yang sedang diproses (admission control)",
+                admission_stats["active"],
+            ),
+            "forecast_admission_queue_depth": (
+                "Request yang menunggu di antrian admission",
+                admission_stats["queue_depth"],
+            ),
+            "forecast_shadow_queue_depth": (
+                "Job shadow evaluation yang menunggu di antrian",
+                shadow_stats["queue_depth"],
+            ),
+        },
+        {
+            "forecast_cache_hits_total": ("Cache hit sejak start", cache_stats["hits"]),
+            "forecast_cache_misses_total": (
+                "Cache miss sejak start",
+                cache_stats["misses"],
+            ),
+            "forecast_store_hits_total": (
+                "Request yang dilayani dari forecast store",
+                store_stats.get("hits", 0),
+            ),
+            "forecast_store_stale_total": (
+                "Lookup forecast store dengan watermark/model usang",
+                store_stats.get("stale", 0),
+            ),
+            "forecast_store_misses_total": (
+                "Lookup forecast store tanpa entry",
+                store_stats.get("misses", 0),
+            ),
+            "forecast_prediction_rows_reused_total": (
+                "Baris histori yang prediksinya diambil dari cache",
+                prediction_stats["rows_reused"],
+            ),
+            "forecast_prediction_rows_scored_total": (
+                "Baris histori yang di-predict (cache aktif)",
+                prediction_stats["rows_scored"],
+            ),
+            "forecast_model_swaps_total": (
+                "Jumlah hot-swap model sejak start",
+                registry["swaps"],
+            ),
+            "forecast_admission_rejected_full_total": (
+                "Request ditolak 429 karena antrian penuh",
+                admission_stats["rejected_full"],
+            ),
+            "forecast_admission_rejected_timeout_total": (
+                "Request ditolak 503 karena menunggu terlalu lama",
+                admission_stats["rejected_timeout"],
+            ),
+            "forecast_shadow_completed_total": (
+                "Job shadow evaluation selesai (reset saat pasangan model berganti)",
+                shadow_stats["completed"],
+            ),
+            "forecast_shadow_dropped_total": (
+                "Job shadow evaluation dibuang karena antrian penuh",
+                shadow_stats["dropped"],
+            ),
+        },
+    )
+    return app.response_class(body, mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/cache/invalidate", methods=["POST"])
+def invalidate_cache():
+    """
+    Hapus cache forecast milik satu user (userId) atau seluruh cache.
+    Forecast store (persisten) hanya dihapus per user; tanpa userId entry
+    store tetap ada karena sudah tervalidasi watermark + model_id.
+    Header X-Admin-Token wajib cocok dengan FORECAST_ADMIN_TOKEN.
+    """
+    denied = admin_auth_error()
+    if denied is not None:
+        return denied
+    req_data = request.get_json(silent=True) or {}
+    user_id = req_data.get("userId")
+    removed = forecast_cache.invalidate(user_id)
+    prediction_cache.invalidate(None if user_id is None else str(user_id))
+    store_removed = (
+        forecast_store.invalidate(user_id)
+        if forecast_store is not None and user_id is not None
+        else 0
+    )
+    return (
+        jsonify(
+            {
+                "invalidated": removed,
+                "store_invalidated": store_removed,
+                "cache": forecast_cache.stats(),
+                "prediction_cache": prediction_cache.stats(),
+            }
+        ),
+        200,
+    )
+
+
+def admin_auth_error():
+    """Response 403/401 untuk endpoint admin, None jika token cocok"""
+    if not ADMIN_TOKEN:
+        return (
+            jsonify(
+                {
+                    "error": "ADMIN_DISABLED",
+                    "message": "Endpoint admin nonaktif: FORECAST_ADMIN_TOKEN belum di-set",
+                }
+            ),
+            403,
+        )
+    token = request.headers.get("X-Admin-Token", "")
+    if not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return jsonify({"error": "UNAUTHORIZED", "message": "Admin token salah"}), 401
+    return None
+
+
+@app.route("/admin/reload-model", methods=["POST"])
+def reload_model():
+    """
+    Load model terbaru dari MODEL_DIR (atau file {"model": nama}) lalu hot-swap.
+    {"force": true} men-swap walaupun isi file sama dengan model aktif.
+    {"target": "income"} / {"target": "shadow"} me-reload model income
+    (cashflow) / model kandidat shadow.
+    Header X-Admin-Token wajib cocok dengan FORECAST_ADMIN_TOKEN.
+    """
+    denied = admin_auth_error()
+    if denied is not None:
+        return denied
+    if SERVER_WORKERS > 1:
+        return (
+            jsonify(
+                {
+                    "error": "RELOAD_NOT_BROADCAST",
+                    "message": f"Reload lewat HTTP hanya mengenai 1 dari {SERVER_WORKERS} worker; taruh file di folder model (watcher me-reload setiap worker)",
+                }
+            ),
+            409,
+        )
+
+    req_data = request.get_json(silent=True) or {}
+    registry = {"income": income_registry, "shadow": shadow_registry}.get(
+        req_data.get("target"), model_registry
+    )
+    try:
+        version, swapped = registry.reload(
+            req_data.get("model"), force=bool(req_data.get("force"))
+        )
+    except ModelLoadError as e:
+        return (
+            jsonify(
+                {
+                    "error": e.error,
+                    "message": e.message,
+                    "model_registry": registry.describe(),
+                }
+            ),
+            e.status,
+        )
+
+    return (
+        jsonify(
+            {
+                "swapped": swapped,
+                "model_version": version.version,
+                "model_registry": registry.describe(),
+            }
+        ),
+        200,
+    )
+
+
+STARTUP.finish()
+STARTUP.log()
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
@@ -590,9 +2240,11 @@ if __name__ == "__main__":
     print("=" * 80)
     print("XGBoost Financial Forecasting API (Expense-Only Mode)")
     print("=" * 80)
-    print(f"Model path: {MODEL_PATH}")
-    print(f"Model loaded: {model is not None}")
+    active_model = model_registry.active
+    print(f"Model path: {active_model.path if active_model else MODEL_PATH}")
+    print(f"Model loaded: {active_model is not None}")
     print(f"Mode: EXPENSE-ONLY (sesuai Kaggle training)")
-    print(f"Features: {len(feature_names) if feature_names else 0}")
+    print(f"Features: {len(active_model.feature_names) if active_model else 0}")
+    print("Production: gunicorn -c gunicorn.conf.py app:app")
     print("=" * 80)
     app.run(host="0.0.0.0", port=5001, debug=True)
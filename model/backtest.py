@@ -0,0 +1,315 @@
+"""
+Backtest rolling-origin: evaluasi forecast banyak user, banyak horizon dan
+(opsional) beberapa model sekaligus, paralel per partisi.
+
+    python backtest.py data/transactions/ --horizons 7 30 --folds 6 --step 7
+    python backtest.py data/ --model models/a.model --model models/b.model
+    python backtest.py data/ --method recursive --output folds.csv
+
+Format input sama dengan batch_score.py (file CSV/Parquet per partisi user).
+Untuk setiap user, fitur dihitung SEKALI dari seluruh histori
+(features.expense_features); setiap fold dengan origin o memakai slice
+histori [:o]. Semua fitur harian bersifat kausal (hanya bergantung pada
+hari <= hari itu), jadi slice tersebut identik dengan menghitung ulang
+fitur dari histori yang dipotong, selama o > 14 hari (--min-train-days).
+
+Fold (user, horizon, origin): forecast hari o..o+h-1 dengan metode yang
+sama dengan API (static = build_forecast_frame, recursive =
+forecast_recursive), di-clip minimum 10.000, lalu dibandingkan dengan
+Amount aktual. Baris forecast semua fold dalam satu partisi di-predict
+sekaligus per model.
+
+Output: satu baris per fold (MAE/RMSE/MAPE/R², predict_ms amortized) ke
+Parquet/CSV, plus ringkasan per model/horizon dan timing per stage.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from batch_score import default_workers, discover_partitions, iter_users
+from batch_score import read_partition
+from feature_state import HISTORY_DAYS, FeatureState, forecast_recursive
+from features import (
+    COL,
+    FEATURE_COLS,
+    LAG_PERIODS,
+    ROLLING_WINDOWS,
+    calendar_features,
+    ema,
+    expense_features,
+)
+from inference import predict_rows
+from regression_metrics import (
+    mean_absolute_error,
+    mean_absolute_percentage_error,
+    r2_score,
+    root_mean_squared_error,
+)
+
+DEFAULT_MODEL = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "models",
+    "xgboost_expense_forecast.model",
+)
+MIN_FORECAST = 10000  # Sama dengan clip forecast di API
+STD_COLS = [COL[f"rolling_std_{window}"] for window in ROLLING_WINDOWS]
+
+# Diisi _init_worker di setiap proses worker
+worker_models = None
+
+
+def fold_origins(n_days, horizon, folds, step, min_train_days):
+    """Origin fold (jumlah hari histori), terlama -> terbaru"""
+    last = n_days - horizon
+    origins = last - step * np.arange(folds)
+    return origins[origins >= min_train_days][::-1].tolist()
+
+
+def static_future_rows(dates, amounts, X, origin, horizon):
+    """
+    Baris fitur forecast static untuk histori[:origin] dari slice X, sama
+    dengan build_forecast_frame(daily_df[:origin]) tanpa menghitung ulang
+    """
+    rows = np.empty((horizon, len(FEATURE_COLS)), dtype=np.float32)
+    calendar_features(dates[origin - 1] + 1 + np.arange(horizon), rows)
+    rows[:, COL["trend"]] = origin + np.arange(horizon)
+
+    for lag in LAG_PERIODS:
+        rows[:, COL[f"lag_{lag}"]] = amounts[origin - lag]
+
+    last = X[origin - 1]
+    for window in ROLLING_WINDOWS:
+        for stat in ("mean", "std", "min", "max"):
+            col = COL[f"rolling_{stat}_{window}"]
+            rows[:, col] = last[col]
+    rows[:, STD_COLS] = np.nan_to_num(rows[:, STD_COLS])
+    rows[:, COL["ema_7"]] = last[COL["ema_7"]]
+
+    # Transaction_Count - rata-rata 7 hari terakhir, reduksi float32 yang sama
+    # dengan FeatureState.forecast_features (backtest = jalur API incremental)
+    counts = X[origin - 7 : origin, COL["Transaction_Count"]]
+    rows[:, COL["Transaction_Count"]] = counts.sum(dtype=np.float32) / np.float32(
+        len(counts)
+    )
+    return rows
+
+
+def fold_metrics(actual, predicted):
+    return {
+        "mae": float(mean_absolute_error(actual, predicted)),
+        "rmse": float(root_mean_squared_error(actual, predicted)),
+        "mape": float(mean_absolute_percentage_error(actual, predicted)),
+        "r2": float(r2_score(actual, predicted)),
+    }
+
+
+def _init_worker(model_paths, nthread):
+    global worker_models
+    from model_registry import ModelRegistry
+
+    worker_models = []
+    for path in model_paths:
+        registry = ModelRegistry(os.path.dirname(path), nthread=nthread)
+        worker_models.append(registry.load(path))
+
+
+def backtest_partition(task):
+    """Semua fold semua user di satu partisi; return (baris fold, timing)"""
+    path, options = task
+    timing = {"read": 0.0, "features": 0.0, "predict": 0.0, "metrics": 0.0}
+
+    start = time.perf_counter()
+    df = read_partition(path, options["user_col"])
+    timing["read"] = time.perf_counter() - start
+
+    # Fitur sekali per user; fold hanya menyimpan index origin
+    start = time.perf_counter()
+    users = []
+    folds = []
+    for user, transactions in iter_users(df, options["user_col"]):
+        computed = expense_features(transactions, options["min_transactions"])
+        if computed is None:
+            continue
+        dates, amounts, X = computed
+        history = {"user": user, "dates": dates, "amounts": amounts, "X": X}
+        if options["method"] == "recursive":
+            history["ema"] = ema(amounts.astype(np.float64))
+        users.append(history)
+        for horizon in options["horizons"]:
+            for origin in fold_origins(
+                len(amounts),
+                horizon,
+                options["folds"],
+                options["step"],
+                options["min_train_days"],
+            ):
+                folds.append((history, horizon, origin))
+    timing["features"] = time.perf_counter() - start
+
+    rows = []
+    for model in worker_models:
+        start = time.perf_counter()
+        predictions = predict_folds(model.booster, folds, options["method"])
+        predict_seconds = time.perf_counter() - start
+        timing["predict"] += predict_seconds
+
+        start = time.perf_counter()
+        total_days = sum(horizon for _, horizon, _ in folds) or 1
+        for (history, horizon, origin), predicted in zip(folds, predictions):
+            actual = history["amounts"][origin : origin + horizon]
+            rows.append(
+                {
+                    "userId": history["user"],
+                    "model": model.version,
+                    "model_id": model.model_id,
+                    "method": options["method"],
+                    "horizon": horizon,
+                    "origin": str(history["dates"][origin]),
+                    "train_days": origin,
+                    **fold_metrics(actual, predicted),
+                    "predict_ms": round(
+                        predict_seconds * 1000 * horizon / total_days, 4
+                    ),
+                }
+            )
+        timing["metrics"] += time.perf_counter() - start
+
+    return rows, {"users": len(users), "folds": len(folds), **timing}
+
+
+def predict_folds(booster, folds, method):
+    """Prediksi (sudah di-clip) untuk setiap fold, batch satu partisi"""
+    if method == "static":
+        blocks = [
+            static_future_rows(h["dates"], h["amounts"], h["X"], origin, horizon)
+            for h, horizon, origin in folds
+        ]
+        if not blocks:
+            return []
+        predicted = predict_rows(booster, np.concatenate(blocks))
+        predicted = np.maximum(predicted, np.float32(MIN_FORECAST))
+        splits = np.cumsum([horizon for _, horizon, _ in folds])[:-1]
+        return np.split(predicted, splits)
+
+    # Recursive: fold dengan horizon sama di-batch per step
+    results = [None] * len(folds)
+    for horizon in sorted({horizon for _, horizon, _ in folds}):
+        group = [i for i, fold in enumerate(folds) if fold[1] == horizon]
+        states = []
+        for i in group:
+            h, _, origin = folds[i]
+            states.append(
+                FeatureState.from_daily(
+                    h["dates"][0],
+                    h["amounts"][:origin].astype(np.float64),
+                    h["X"][:origin, COL["Transaction_Count"]].astype(np.float64),
+                    ema_values=h["ema"][:origin],
+                )
+            )
+        _, predicted = forecast_recursive(booster, states, horizon, MIN_FORECAST)
+        for i, values in zip(group, predicted):
+            results[i] = values
+    return results
+
+
+def summarize(folds_df):
+    """Rata-rata metrik per model/metode/horizon"""
+    if folds_df.empty:
+        return []
+    grouped = folds_df.groupby(["model", "method", "horizon"], sort=True)
+    summary = grouped[["mae", "rmse", "mape", "r2"]].mean().round(4)
+    summary["folds"] = grouped.size()
+    summary["users"] = grouped["userId"].nunique()
+    return summary.reset_index().to_dict(orient="records")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest rolling-origin forecast")
+    parser.add_argument("inputs", nargs="+", help="File/folder partisi CSV/Parquet")
+    parser.add_argument("--model", action="append", help="Bisa diulang (bandingkan)")
+    parser.add_argument("--output", default="backtest_folds.parquet")
+    parser.add_argument("--user-col", default="userId")
+    parser.add_argument("--method", default="static", choices=["static", "recursive"])
+    parser.add_argument("--horizons", nargs="+", type=int, default=[7, 30])
+    parser.add_argument("--folds", type=int, default=4)
+    parser.add_argument("--step", type=int, default=7, help="Jarak antar origin")
+    parser.add_argument("--min-train-days", type=int, default=30)
+    parser.add_argument(
+        "--min-transactions", type=int, default=7, help="Minimal transaksi EXPENSE/user"
+    )
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--nthread", type=int, default=1, help="Thread XGBoost/worker")
+    args = parser.parse_args(argv)
+    if args.min_train_days <= HISTORY_DAYS:
+        parser.error(f"--min-train-days harus > {HISTORY_DAYS} (fitur lag/rolling)")
+    if min(args.horizons) < 1:
+        parser.error("--horizons harus >= 1")
+
+    model_paths = [os.path.abspath(p) for p in (args.model or [DEFAULT_MODEL])]
+    options = {
+        "user_col": args.user_col,
+        "method": args.method,
+        "horizons": sorted(set(args.horizons)),
+        "folds": args.folds,
+        "step": args.step,
+        "min_train_days": args.min_train_days,
+        "min_transactions": args.min_transactions,
+    }
+    partitions = discover_partitions(args.inputs)
+    tasks = [(path, options) for _, path in partitions]
+    print(f"{len(tasks)} partisi, {len(model_paths)} model, {args.workers} worker")
+
+    start = time.perf_counter()
+    all_rows = []
+    timing = {"users": 0, "folds": 0, "read": 0.0, "features": 0.0}
+    timing.update({"predict": 0.0, "metrics": 0.0})
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(
+        args.workers, initializer=_init_worker, initargs=(model_paths, args.nthread)
+    ) as pool:
+        for rows, partition_timing in pool.imap_unordered(backtest_partition, tasks):
+            all_rows.extend(rows)
+            for key, value in partition_timing.items():
+                timing[key] += value
+    elapsed = time.perf_counter() - start
+
+    folds_df = pd.DataFrame(all_rows)
+    output_path = os.path.abspath(args.output)
+    if output_path.endswith(".csv"):
+        folds_df.to_csv(output_path, index=False)
+    else:
+        folds_df.to_parquet(output_path, index=False)
+
+    print(
+        json.dumps(
+            {
+                "summary": summarize(folds_df),
+                "timing": {
+                    "wall_seconds": round(elapsed, 3),
+                    "users": timing["users"],
+                    "folds": len(folds_df),
+                    "folds_per_second": round(len(folds_df) / elapsed, 2),
+                    # Total CPU-seconds per stage (dijumlah dari semua worker)
+                    "stage_seconds": {
+                        key: round(timing[key], 3)
+                        for key in ("read", "features", "predict", "metrics")
+                    },
+                },
+                "output": output_path,
+            },
+            indent=2,
+            default=str,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
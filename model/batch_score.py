@@ -0,0 +1,353 @@
+"""
+Offline batch scoring: forecast seluruh user dari file transaksi yang
+dipartisi per user (CSV atau Parquet), tanpa lewat HTTP.
+
+    python batch_score.py data/transactions/ --output-dir forecasts/
+    python batch_score.py data/transactions/ --output-dir forecasts/ --resume
+    python batch_score.py part-*.parquet --output-dir out/ --workers 4 --mode daily
+
+Setiap file input = satu partisi yang berisi SEMUA transaksi user-user di
+dalamnya (kolom userId, Date, Amount, Type opsional). Partisi dibagi ke
+process pool; setiap worker hanya memegang satu partisi di memori dan
+di-recycle setelah --max-partitions-per-worker partisi. User di-score per
+chunk lewat forecast_users_batch (jalur yang sama dengan
+/analyze-forecast/batch: prepare_input_arrays + build_forecast_frame,
+satu predict per chunk).
+
+Output per partisi (ditulis atomic): forecasts/<partisi>.parquet (baris
+forecast harian) dan metrics/<partisi>.parquet (metrik / error per user).
+Partisi yang selesai dicatat di _checkpoint.jsonl; --resume melewati
+partisi yang sudah tercatat dengan opsi yang sama.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+INPUT_SUFFIXES = (".parquet", ".csv", ".csv.gz")
+CHECKPOINT_FILE = "_checkpoint.jsonl"
+
+METRIC_FIELDS = [
+    "r_squared",
+    "mae",
+    "rmse",
+    "mape",
+    "accuracy_percentage",
+    "evaluation_days",
+]
+SUMMARY_FIELDS = ["total_forecast", "average_daily_expense"]
+METADATA_FIELDS = [
+    "data_points_used",
+    "forecast_periods",
+    "forecast_mode",
+    "forecast_method",
+    "model_id",
+]
+
+logger = logging.getLogger("forecast")
+
+# Diisi _init_worker di setiap proses worker
+forecast_app = None
+
+
+def discover_partitions(inputs):
+    """List (partition_id, path) dari file/folder input, urutan stabil"""
+    partitions = []
+    for root in inputs:
+        root = os.path.abspath(root)
+        if os.path.isfile(root):
+            partitions.append((os.path.basename(root), root))
+            continue
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if name.endswith(INPUT_SUFFIXES):
+                    path = os.path.join(dirpath, name)
+                    partitions.append((os.path.relpath(path, root), path))
+    return sorted(partitions)
+
+
+def output_name(partition_id):
+    """user_bucket=07/part-0.csv -> user_bucket=07__part-0.parquet"""
+    name = partition_id.replace(os.sep, "__")
+    for suffix in INPUT_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    return name + ".parquet"
+
+
+def read_partition(path, user_col, extra_columns=()):
+    columns = [user_col, "Date", "Amount", "Type", *extra_columns]
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        available = pq.read_schema(path).names
+        return pd.read_parquet(path, columns=[c for c in columns if c in available])
+    return pd.read_csv(path, usecols=lambda c: c in columns)
+
+
+def iter_users(df, user_col):
+    """
+    Pecah partisi menjadi (userId, ColumnarTransactions) per user dengan satu
+    sort, tanpa list dict per transaksi. Baris tanpa userId dibuang: factorize
+    memberi kode -1 yang akan menggeser pasangan user <-> transaksi
+    """
+    from payload import TYPE_EXPENSE, TYPE_INCOME, ColumnarTransactions
+
+    missing = df[user_col].isna()
+    if missing.any():
+        logger.warning(f"⚠️ {int(missing.sum())} transaksi tanpa {user_col} dilewati")
+        df = df[~missing]
+
+    codes, users = pd.factorize(df[user_col], sort=True)
+    order = np.argsort(codes, kind="stable")
+    days = (
+        pd.to_datetime(df["Date"])
+        .to_numpy()
+        .astype("datetime64[D]")
+        .astype(np.int64)[order]
+    )
+    amounts = df["Amount"].to_numpy(dtype=np.float64)[order]
+    types = None
+    if "Type" in df.columns:
+        # Sama dengan jalur JSON: hanya string "EXPENSE" (case-insensitive)
+        is_expense = df["Type"].astype("string").str.upper().eq("EXPENSE")
+        types = np.where(is_expense.fillna(False).to_numpy(), TYPE_EXPENSE, TYPE_INCOME)
+        types = types.astype(np.uint8)[order]
+
+    bounds = np.flatnonzero(np.diff(codes[order])) + 1
+    starts = np.r_[0, bounds]
+    stops = np.r_[bounds, len(order)]
+    for user, start, stop in zip(users, starts, stops):
+        yield user, ColumnarTransactions(
+            days[start:stop],
+            amounts[start:stop],
+            None if types is None else types[start:stop],
+        )
+
+
+def result_rows(result):
+    """Hasil forecast_users_batch satu user -> (baris forecast, baris metrik)"""
+    user_id = result["userId"]
+    if "error" in result:
+        metrics = {"userId": user_id, "status": result["error"]}
+        metrics["message"] = result.get("message")
+        return [], metrics
+
+    metrics = {"userId": user_id, "status": "OK", "message": None}
+    metrics.update({key: result["metrics"][key] for key in METRIC_FIELDS})
+    metrics.update({key: result["summary"][key] for key in SUMMARY_FIELDS})
+    metrics.update({key: result["metadata"].get(key) for key in METADATA_FIELDS})
+
+    forecasts = [
+        {
+            "userId": user_id,
+            "date": row["date"],
+            "day_of_week": row["day_of_week"],
+            "predicted_expense": row["predicted_expense"],
+            "confidence_low": row["confidence_low"],
+            "confidence_high": row["confidence_high"],
+        }
+        for row in result["forecast"]
+    ]
+    return forecasts, metrics
+
+
+def write_parquet_atomic(rows, path):
+    tmp_path = path + ".tmp"
+    pd.DataFrame(rows).to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _init_worker(nthread):
+    global forecast_app
+    os.environ.setdefault("FORECAST_MODEL_DIR", MODEL_DIR)
+    os.environ["FORECAST_NTHREAD"] = str(nthread)
+    # Setiap user hanya di-score sekali: cache per request tidak berguna
+    os.environ["FORECAST_CACHE_ENABLED"] = "false"
+    os.environ["FORECAST_PREDICTION_CACHE_ENABLED"] = "false"
+    logging.getLogger("forecast").setLevel(logging.WARNING)
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+
+    forecast_app = app
+
+
+def score_chunk(app, active, chunk, options, horizon, forecast_rows, metric_rows):
+    results = app.forecast_users_batch(
+        active.booster,
+        chunk,
+        options["mode"],
+        options["method"],
+        active.metadata(),
+        horizon,
+    )
+    for result in results:
+        forecasts, metrics = result_rows(result)
+        forecast_rows.extend(forecasts)
+        metric_rows.append(metrics)
+
+
+def score_partition(task):
+    """Score satu partisi di worker; return ringkasan untuk checkpoint"""
+    partition_id, path, output_dir, options = task
+    app = forecast_app
+    start = time.perf_counter()
+
+    df = read_partition(path, options["user_col"])
+    horizon = {}
+    if options["horizon_days"] is not None:
+        horizon["horizon_days"] = options["horizon_days"]
+
+    forecast_rows = []
+    metric_rows = []
+    with app.model_registry.acquire() as active:
+        if active is None:
+            raise RuntimeError("Model belum ter-load di worker")
+
+        chunk = []
+        for user, transactions in iter_users(df, options["user_col"]):
+            chunk.append({"userId": user, "transactions": transactions})
+            if len(chunk) >= options["chunk_users"]:
+                score_chunk(
+                    app, active, chunk, options, horizon, forecast_rows, metric_rows
+                )
+                chunk = []
+        if chunk:
+            score_chunk(
+                app, active, chunk, options, horizon, forecast_rows, metric_rows
+            )
+
+    name = output_name(partition_id)
+    write_parquet_atomic(forecast_rows, os.path.join(output_dir, "forecasts", name))
+    write_parquet_atomic(metric_rows, os.path.join(output_dir, "metrics", name))
+
+    return {
+        "partition": partition_id,
+        "users": len(metric_rows),
+        "succeeded": sum(1 for m in metric_rows if m["status"] == "OK"),
+        "transactions": int(len(df)),
+        "seconds": round(time.perf_counter() - start, 3),
+        "options": options,
+    }
+
+
+def load_checkpoint(path, options):
+    """Partisi yang sudah selesai dengan opsi yang sama"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # baris terakhir terpotong saat proses mati
+            if entry.get("options") == options:
+                done.add(entry["partition"])
+    return done
+
+
+def default_workers():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # pragma: no cover - non-Linux
+        return os.cpu_count() or 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline batch scoring forecast")
+    parser.add_argument("inputs", nargs="+", help="File/folder partisi CSV/Parquet")
+    parser.add_argument("--output-dir", required=True)
+    parser.add_argument("--user-col", default="userId")
+    parser.add_argument("--mode", default="weekly")
+    parser.add_argument("--method", default="static", choices=["static", "recursive"])
+    parser.add_argument("--horizon-days", type=int)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--nthread", type=int, default=1, help="Thread XGBoost/worker")
+    parser.add_argument("--chunk-users", type=int, default=512)
+    parser.add_argument("--max-partitions-per-worker", type=int, default=50)
+    parser.add_argument("--resume", action="store_true")
+    args = parser.parse_args(argv)
+    if args.horizon_days is not None and not 1 <= args.horizon_days <= 730:
+        parser.error("--horizon-days harus 1-730")
+
+    options = {
+        "user_col": args.user_col,
+        "mode": args.mode,
+        "method": args.method,
+        "horizon_days": args.horizon_days,
+        "chunk_users": args.chunk_users,
+    }
+    output_dir = os.path.abspath(args.output_dir)
+    for sub in ("forecasts", "metrics"):
+        os.makedirs(os.path.join(output_dir, sub), exist_ok=True)
+
+    checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
+    done = load_checkpoint(checkpoint_path, options) if args.resume else set()
+    if not args.resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    partitions = discover_partitions(args.inputs)
+    tasks = [
+        (partition_id, path, output_dir, options)
+        for partition_id, path in partitions
+        if partition_id not in done
+    ]
+    print(
+        f"{len(partitions)} partisi, {len(partitions) - len(tasks)} dilewati"
+        f" (checkpoint), {len(tasks)} di-score dengan {args.workers} worker"
+    )
+    if not tasks:
+        return 0
+
+    start = time.perf_counter()
+    users = succeeded = 0
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(
+        args.workers,
+        initializer=_init_worker,
+        initargs=(args.nthread,),
+        maxtasksperchild=args.max_partitions_per_worker,
+    ) as pool, open(checkpoint_path, "a") as checkpoint:
+        for i, summary in enumerate(pool.imap_unordered(score_partition, tasks), 1):
+            checkpoint.write(json.dumps(summary) + "\n")
+            checkpoint.flush()
+            users += summary["users"]
+            succeeded += summary["succeeded"]
+            elapsed = time.perf_counter() - start
+            print(
+                f"[{i}/{len(tasks)}] {summary['partition']}: {summary['users']} user"
+                f" dalam {summary['seconds']:.2f}s | total {users} user,"
+                f" {users / elapsed:.1f} user/s"
+            )
+
+    elapsed = time.perf_counter() - start
+    print(
+        json.dumps(
+            {
+                "partitions": len(tasks),
+                "users": users,
+                "users_succeeded": succeeded,
+                "seconds": round(elapsed, 3),
+                "users_per_second": round(users / elapsed, 2) if elapsed else None,
+                "output_dir": output_dir,
+            },
+            indent=2,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""
+Benchmark hot path forecasting (prepare_input_data, forecast_next_days,
+build_forecast_response, encode_json dan request /analyze-forecast penuh).
+
+    python benchmark.py                          # semua skenario
+    python benchmark.py --quick                  # skenario kecil saja
+    python benchmark.py --output baseline.json
+    python benchmark.py --compare baseline.json --threshold 0.15
+    python benchmark.py --crossover              # inplace_predict vs DMatrix
+
+Mode --compare keluar dengan exit code 1 jika median salah satu skenario
+lebih lambat dari baseline melebihi threshold.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# app.py memuat model dari path relatif terhadap folder model/
+INVOCATION_DIR = os.getcwd()
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+HISTORY_DAYS = {"7d": 7, "30d": 30, "1y": 365, "10y": 3650, "40y": 14600}
+TRANSACTIONS_PER_DAY = [1, 10, 50]
+QUICK_HISTORIES = ["7d", "30d", "1y"]
+QUICK_PER_DAY = [1, 10]
+
+
+def generate_transactions(days, per_day, seed=42, start="2020-01-01"):
+    """
+    Transaksi sintetis yang reproducible: rata-rata `per_day` transaksi per
+    hari (Poisson), ~80% EXPENSE, nominal log-normal dibulatkan ke rupiah
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days, freq="D").strftime("%Y-%m-%d")
+    counts = np.maximum(rng.poisson(per_day, size=days), 1)
+    day_index = np.repeat(np.arange(days), counts)
+    amounts = np.round(rng.lognormal(mean=11.0, sigma=0.8, size=len(day_index)))
+    is_expense = rng.random(len(day_index)) < 0.8
+
+    return [
+        {
+            "Date": dates[d],
+            "Amount": float(a),
+            "Type": "EXPENSE" if e else "INCOME",
+        }
+        for d, a, e in zip(day_index.tolist(), amounts.tolist(), is_expense.tolist())
+    ]
+
+
+def measure(fn, repeats, warmup=1):
+    """Jalankan fn beberapa kali, return statistik durasi (ms)"""
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings = np.array(timings)
+    return {
+        "median_ms": round(float(np.median(timings)), 4),
+        "p95_ms": round(float(np.percentile(timings, 95)), 4),
+        "min_ms": round(float(timings.min()), 4),
+        "repeats": repeats,
+    }
+
+
+def repeats_for(n_transactions, budget):
+    """Jumlah pengulangan disesuaikan ukuran input agar total waktu terkendali"""
+    return int(max(3, min(budget, budget * 2000 // max(n_transactions, 1))))
+
+
+def run_benchmarks(histories, per_day_values, budget, seed):
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+
+    app.CACHE_ENABLED = False  # ukur komputasi, bukan cache
+    model = app.model_registry.active.booster
+    client = app.app.test_client()
+    results = []
+
+    for history in histories:
+        for per_day in per_day_values:
+            transactions = generate_transactions(HISTORY_DAYS[history], per_day, seed)
+            n = len(transactions)
+            repeats = repeats_for(n, budget)
+            daily_df, X, feature_cols, y = app.prepare_input_arrays(transactions)
+            forecast_df = app.forecast_next_days(model, daily_df, feature_cols, 7)
+            y_pred_all = app.predict_rows(model, X, feature_cols)
+            evaluation = app.evaluate_predictions(
+                daily_df, y, y_pred_all, verbose=False
+            )
+            response = app.build_forecast_response(
+                daily_df, feature_cols, evaluation, forecast_df, "daily"
+            )
+
+            cases = {
+                "prepare_input_data": lambda: app.prepare_input_data(transactions),
+                "prepare_input_arrays": lambda: app.prepare_input_arrays(transactions),
+                "forecast_next_days": lambda: app.forecast_next_days(
+                    model, daily_df, feature_cols, 7
+                ),
+                "build_forecast_response": lambda: app.build_forecast_response(
+                    daily_df, feature_cols, evaluation, forecast_df, "daily"
+                ),
+                "encode_json": lambda: app.encode_json(response),
+                "analyze_forecast_request": lambda: client.post(
+                    "/analyze-forecast",
+                    json={"transactions": transactions, "mode": "daily"},
+                ),
+            }
+
+            for name, fn in cases.items():
+                with contextlib.redirect_stdout(io.StringIO()):
+                    stats = measure(fn, repeats)
+                row = {
+                    "benchmark": name,
+                    "history": history,
+                    "transactions_per_day": per_day,
+                    "n_transactions": n,
+                    "n_days": len(daily_df),
+                    **stats,
+                }
+                results.append(row)
+                print(
+                    f"{name:<26} {history:>4} x {per_day:>2}/day "
+                    f"({n:>7} tx)  median {stats['median_ms']:>10.3f} ms  "
+                    f"p95 {stats['p95_ms']:>10.3f} ms"
+                )
+
+    return results
+
+
+CROSSOVER_ROWS = [1, 7, 30, 90, 180, 365, 512, 1000, 2000, 3650, 10000, 50000]
+
+
+def run_crossover(budget, seed):
+    """
+    Bandingkan Booster.inplace_predict dengan DMatrix + predict untuk berbagai
+    jumlah baris, untuk menentukan FORECAST_INPLACE_MAX_ROWS di host ini
+    """
+    import xgboost as xgb
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    import inference
+
+    model = app.model_registry.active.booster
+    feature_names = list(app.FEATURE_COLS)
+    rng = np.random.default_rng(seed)
+    results = []
+    crossover = None
+
+    for n_rows in CROSSOVER_ROWS:
+        X = (rng.random((n_rows, len(feature_names))) * 1e5).astype(np.float32)
+        repeats = repeats_for(n_rows * 10, budget)
+        cases = {
+            "dmatrix_predict": lambda: model.predict(
+                xgb.DMatrix(X, feature_names=feature_names)
+            ),
+            "inplace_predict": lambda: model.inplace_predict(X),
+        }
+        stats = {name: measure(fn, repeats) for name, fn in cases.items()}
+        ratio = (
+            stats["inplace_predict"]["median_ms"]
+            / stats["dmatrix_predict"]["median_ms"]
+        )
+        if crossover is None and ratio >= 1.0:
+            crossover = n_rows
+
+        for name, row_stats in stats.items():
+            results.append(
+                {
+                    "benchmark": name,
+                    "history": f"{n_rows}rows",
+                    "transactions_per_day": 0,
+                    "n_rows": n_rows,
+                    **row_stats,
+                }
+            )
+        print(
+            f"{n_rows:>7} rows  DMatrix {stats['dmatrix_predict']['median_ms']:>9.3f} ms  "
+            f"inplace {stats['inplace_predict']['median_ms']:>9.3f} ms  ({ratio:4.2f}x)"
+        )
+
+    if crossover:
+        print(f"\nCrossover: inplace tidak lagi lebih cepat mulai {crossover} baris")
+    else:
+        print("\nInplace lebih cepat untuk semua ukuran yang diukur")
+    print(f"FORECAST_INPLACE_MAX_ROWS saat ini: {inference.INPLACE_MAX_ROWS}")
+    return results
+
+
+def result_key(row):
+    return (row["benchmark"], row["history"], row["transactions_per_day"])
+
+
+def compare(results, baseline_path, threshold):
+    """Bandingkan median dengan baseline; return list regresi"""
+    with open(baseline_path) as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"]}
+
+    regressions = []
+    print(f"\nPerbandingan dengan {baseline_path} (threshold {threshold:.0%})")
+    for row in results:
+        base = baseline.get(result_key(row))
+        if base is None:
+            continue
+        ratio = row["median_ms"] / base["median_ms"] if base["median_ms"] else 1.0
+        flag = "REGRESSION" if ratio > 1 + threshold else ""
+        print(
+            f"{row['benchmark']:<26} {row['history']:>4} x {row['transactions_per_day']:>2}/day "
+            f"{base['median_ms']:>10.3f} -> {row['median_ms']:>10.3f} ms ({ratio:5.2f}x) {flag}"
+        )
+        if flag:
+            regressions.append({**row, "baseline_median_ms": base["median_ms"]})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark forecasting hot paths")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", metavar="BASELINE_JSON")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--history", nargs="*", choices=list(HISTORY_DAYS))
+    parser.add_argument("--per-day", nargs="*", type=int)
+    parser.add_argument("--crossover", action="store_true")
+    args = parser.parse_args(argv)
+    output_path = os.path.join(INVOCATION_DIR, args.output)
+    baseline_path = args.compare and os.path.join(INVOCATION_DIR, args.compare)
+
+    histories = args.history or (QUICK_HISTORIES if args.quick else list(HISTORY_DAYS))
+    per_day_values = args.per_day or (
+        QUICK_PER_DAY if args.quick else TRANSACTIONS_PER_DAY
+    )
+
+    if args.crossover:
+        results = run_crossover(args.repeats, args.seed)
+    else:
+        results = run_benchmarks(histories, per_day_values, args.repeats, args.seed)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(output_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Hasil disimpan ke {output_path}")
+
+    if baseline_path:
+        regressions = compare(results, baseline_path, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} skenario mengalami regresi")
+            return 1
+        print("\n✅ Tidak ada regresi")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
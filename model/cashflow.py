@@ -0,0 +1,140 @@
+import numpy as np
+
+from features import parse_dates
+from horizon import aggregate_buckets, bucket_labels
+from payload import TYPE_EXPENSE, TYPE_INCOME, ColumnarTransactions
+from response_encoder import date_strings
+from series_features import aggregate_series
+
+# ============================================================================
+# FORECAST CASH FLOW (EXPENSE + INCOME + NET DALAM SATU REQUEST)
+# ============================================================================
+# Transaksi di-parse sekali, lalu series harian EXPENSE (index 0) dan INCOME
+# (index 1) masing-masing di-aggregate pada rentang tanggalnya sendiri (hari
+# pertama sampai terakhir tipe tersebut), sama seperti /analyze-forecast
+# membangun series expense. Forecast kedua series dimulai sehari setelah
+# tanggal terakhir gabungan; series yang berakhir lebih awal di-forecast
+# melewati selisih harinya lalu hari-hari tersebut dibuang, sehingga net per
+# hari = income - expense pada tanggal yang sama. Setiap series di-score
+# booster-nya sendiri (model expense dan model income bertanda target=income).
+#
+# Series expense selalu identik dengan /analyze-forecast, sehingga forecast
+# expense sama persis dengan /analyze-forecast ber-horizon selisih + periods
+# yang dipotong selisih hari pertamanya.
+
+
+def parse_cashflow_transactions(transactions_raw):
+    """
+    Transaksi EXPENSE dan INCOME -> (dates datetime64[D], amounts float64,
+    codes TYPE_EXPENSE/TYPE_INCOME). Tanpa field Type semua dianggap
+    expense (sama dengan features.parse_transactions)
+    """
+    if isinstance(transactions_raw, ColumnarTransactions):
+        days = transactions_raw.days.astype("datetime64[D]")
+        amounts = transactions_raw.amounts.astype(np.float64, copy=False)
+        if transactions_raw.types is None:
+            return days, amounts, np.full(len(days), TYPE_EXPENSE, dtype=np.uint8)
+        return days, amounts, transactions_raw.types.astype(np.uint8, copy=False)
+
+    if any("Type" in t for t in transactions_raw):
+        codes = {"EXPENSE": TYPE_EXPENSE, "INCOME": TYPE_INCOME}
+        rows, row_codes = [], []
+        for t in transactions_raw:
+            code = (
+                codes.get(t["Type"].upper()) if isinstance(t.get("Type"), str) else None
+            )
+            if code is not None:
+                rows.append(t)
+                row_codes.append(code)
+    else:
+        rows = transactions_raw
+        row_codes = [TYPE_EXPENSE] * len(rows)
+
+    dates = parse_dates([t["Date"] for t in rows])
+    amounts = np.array([t["Amount"] for t in rows], dtype=np.float64)
+    return dates, amounts, np.array(row_codes, dtype=np.uint8)
+
+
+def cashflow_series(dates, amounts, codes):
+    """
+    Series harian EXPENSE dan INCOME, masing-masing pada rentang tanggalnya
+    sendiri. Return list [(first_date, amount, count)] urut TYPE_EXPENSE,
+    TYPE_INCOME dengan amount/count matrix (1 x hari). Kedua tipe harus ada
+    """
+    series = []
+    for code in (TYPE_EXPENSE, TYPE_INCOME):
+        mask = codes == code
+        series_dates = dates[mask]
+        first_date = series_dates.min()
+        n_days = int((series_dates.max() - first_date).astype(np.int64)) + 1
+        amount, count = aggregate_series(
+            series_dates,
+            amounts[mask],
+            np.zeros(len(series_dates), dtype=np.int64),
+            1,
+            first_date,
+            n_days,
+        )
+        series.append((first_date, amount, count))
+    return series
+
+
+def format_cashflow_results(future_dates, expense_pred, income_pred):
+    """
+    Baris forecast per hari (integer, net = income - expense dari nilai yang
+    sudah dibulatkan). Return (forecast_results, total_expense, total_income)
+    """
+    expense = np.rint(np.asarray(expense_pred, dtype=np.float64)).astype(np.int64)
+    income = np.rint(np.asarray(income_pred, dtype=np.float64)).astype(np.int64)
+    forecast_results = [
+        {
+            "date": date,
+            "predicted_expense": e,
+            "predicted_income": i,
+            "predicted_net": n,
+        }
+        for date, e, i, n in zip(
+            date_strings(future_dates),
+            expense.tolist(),
+            income.tolist(),
+            (income - expense).tolist(),
+        )
+    ]
+    return forecast_results, int(expense.sum()), int(income.sum())
+
+
+def format_cashflow_buckets(future_dates, expense_pred, income_pred, bucket):
+    """
+    Blok "buckets" cash flow: total expense, income dan net per bucket,
+    dijumlah dari nilai harian yang sudah dibulatkan sehingga sama persis
+    dengan jumlah baris forecast dan summary
+    """
+    expense = aggregate_buckets(future_dates, np.rint(expense_pred), bucket)
+    income = aggregate_buckets(future_dates, np.rint(income_pred), bucket)
+    expense_total = expense["total"].astype(np.int64)
+    income_total = income["total"].astype(np.int64)
+    complete = (expense["first"] == expense["start"]) & (
+        expense["last"] == expense["end"]
+    )
+
+    return [
+        {
+            "label": label,
+            "start": start,
+            "end": end,
+            "days": days,
+            "complete": is_complete,
+            "predicted_expense": e,
+            "predicted_income": i,
+            "predicted_net": i - e,
+        }
+        for label, start, end, days, is_complete, e, i in zip(
+            bucket_labels(expense["start"], bucket),
+            date_strings(expense["first"]),
+            date_strings(expense["last"]),
+            expense["days"].tolist(),
+            complete.tolist(),
+            expense_total.tolist(),
+            income_total.tolist(),
+        )
+    ]
@@ -0,0 +1,100 @@
+import numpy as np
+
+from features import aggregate_daily, parse_dates
+from payload import ColumnarTransactions, PayloadError
+from series_features import aggregate_series
+
+# ============================================================================
+# FORECAST PER KATEGORI (SATU PREDICT UNTUK SEMUA KATEGORI)
+# ============================================================================
+# Series harian semua kategori di-aggregate dengan satu np.bincount menjadi
+# matrix (kategori x hari) pada rentang tanggal yang sama dengan total user.
+# Baris fitur forecast semua series (total + setiap kategori) dibangun
+# sebagai satu tensor (series_features.py) lalu di-predict sekaligus.
+# Forecast kategori kemudian di-rekonsiliasi proporsional terhadap forecast
+# total, sehingga jumlah kategori per hari = forecast total hari itu.
+
+CATEGORY_FIELDS = ("Category", "category")
+DEFAULT_CATEGORY = "Umum"  # Sama dengan default kategori di server
+
+
+def parse_category_transactions(transactions_raw):
+    """
+    Transaksi EXPENSE (aturan Type sama dengan features.parse_transactions)
+    -> (dates datetime64[D], amounts float64, label kategori per transaksi)
+    """
+    if isinstance(transactions_raw, ColumnarTransactions):
+        raise PayloadError(
+            "INVALID_PAYLOAD", "Payload kolumnar belum mendukung kolom kategori"
+        )
+
+    if any("Type" in t for t in transactions_raw):
+        rows = [
+            t
+            for t in transactions_raw
+            if isinstance(t.get("Type"), str) and t["Type"].upper() == "EXPENSE"
+        ]
+    else:
+        rows = transactions_raw
+
+    labels = []
+    for t in rows:
+        label = next((t[f] for f in CATEGORY_FIELDS if t.get(f)), DEFAULT_CATEGORY)
+        labels.append(str(label).strip() or DEFAULT_CATEGORY)
+
+    dates = parse_dates([t["Date"] for t in rows])
+    amounts = np.array([t["Amount"] for t in rows], dtype=np.float64)
+    return dates, amounts, labels
+
+
+def aggregate_categories(dates, amounts, labels):
+    """
+    Series harian total dan per kategori pada rentang tanggal yang sama.
+    Return (categories, first_date, total_amount, total_count,
+    category_amount (C x n), category_count (C x n))
+    """
+    first_date, total_amount, total_count = aggregate_daily(dates, amounts)
+    n_days = len(total_amount)
+    categories, codes = np.unique(np.array(labels, dtype=str), return_inverse=True)
+    # Satu bincount untuk semua kategori
+    category_amount, category_count = aggregate_series(
+        dates, amounts, codes, len(categories), first_date, n_days
+    )
+    return (
+        categories.tolist(),
+        first_date,
+        total_amount,
+        total_count,
+        category_amount,
+        category_count,
+    )
+
+
+def reconcile(category_pred, total_pred, historical_share):
+    """
+    Rekonsiliasi proporsional: forecast kategori (C x periods) diskalakan
+    agar jumlahnya per hari sama dengan forecast total. Hari yang semua
+    prediksi kategorinya 0 dibagi sesuai porsi historis kategori
+    """
+    category_pred = np.maximum(category_pred.astype(np.float64), 0.0)
+    day_sum = category_pred.sum(axis=0)
+    share = np.where(
+        day_sum > 0,
+        category_pred / np.where(day_sum > 0, day_sum, 1.0),
+        historical_share[:, None],
+    )
+    return share * total_pred[None, :]
+
+
+def allocate_integers(reconciled, totals):
+    """
+    Bulatkan forecast kategori (C x periods) ke integer dengan largest
+    remainder sehingga jumlah per hari tepat sama dengan `totals` (integer)
+    """
+    floored = np.floor(reconciled).astype(np.int64)
+    remainder = np.asarray(totals, dtype=np.int64) - floored.sum(axis=0)
+    # Sisa dibagikan ke kategori dengan pecahan terbesar di hari tersebut
+    ranks = np.argsort(
+        np.argsort(-(reconciled - floored), axis=0, kind="stable"), axis=0
+    )
+    return floored + (ranks < remainder[None, :])
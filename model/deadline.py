@@ -0,0 +1,105 @@
+import threading
+import time
+
+import numpy as np
+
+from features import COL
+from telemetry import Counter
+
+# ============================================================================
+# DEADLINE PER REQUEST + BASELINE FORECAST
+# ============================================================================
+# Request boleh membawa budget waktu (deadline_ms). Pipeline memeriksa
+# deadline di antara stage: jika estimasi biaya stage berikutnya melebihi
+# sisa waktu, forecast diambil dari baseline yang dihitung vectorized dari
+# fitur yang SUDAH ada (tanpa model):
+#   seasonal_naive: hari ke-k = Amount hari yang sama minggu terakhir (lag 7)
+#   ema_7:          semua hari = ema_7 hari terakhir
+# Estimasi biaya dipelajari dari request yang selesai lewat jalur model
+# (EMA detik per baris), sehingga menyesuaikan diri dengan hardware.
+
+BASELINES = ("seasonal_naive", "ema_7")
+MIN_FORECAST = 10000  # Sama dengan clip forecast di API
+SEASON = 7
+
+FALLBACKS_TOTAL = Counter(
+    "forecast_deadline_fallbacks_total",
+    "Response yang memakai baseline karena deadline, per stage",
+    ["route", "stage"],
+)
+
+
+class Deadline:
+    """Budget waktu satu request, dihitung dari saat request mulai diproses"""
+
+    def __init__(self, budget_ms, start=None):
+        self.budget_ms = budget_ms
+        self.start = time.perf_counter() if start is None else start
+        self.expires = self.start + budget_ms / 1000.0
+
+    def remaining(self):
+        return self.expires - time.perf_counter()
+
+    def allows(self, estimated_seconds):
+        """True jika pekerjaan dengan estimasi tersebut masih muat di budget"""
+        return self.remaining() > estimated_seconds
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000.0
+
+
+class CostEstimator:
+    """EMA detik per unit kerja (baris di-predict / step rekursif) per stage"""
+
+    def __init__(self, alpha=0.2):
+        self.alpha = alpha
+        self._rates = {}
+        self._lock = threading.Lock()
+
+    def observe(self, key, units, seconds):
+        if units <= 0:
+            return
+        rate = seconds / units
+        with self._lock:
+            previous = self._rates.get(key)
+            self._rates[key] = (
+                rate if previous is None else previous + self.alpha * (rate - previous)
+            )
+
+    def estimate(self, key, units):
+        """Estimasi detik; 0 jika stage belum pernah diamati"""
+        with self._lock:
+            rate = self._rates.get(key)
+        return 0.0 if rate is None else rate * units
+
+    def stats(self):
+        with self._lock:
+            return {key: round(rate * 1e6, 3) for key, rate in self._rates.items()}
+
+
+def resolve_baseline(baseline, n_days):
+    """Seasonal-naive butuh histori > 7 hari; histori pendek memakai ema_7"""
+    if baseline == "seasonal_naive" and n_days <= SEASON:
+        return "ema_7"
+    return baseline
+
+
+def baseline_history(X, amounts, baseline):
+    """
+    Prediksi in-sample baseline untuk setiap hari histori (hanya memakai
+    hari sebelumnya), untuk metrik evaluasi
+    """
+    if baseline == "seasonal_naive":
+        return X[:, COL["lag_7"]].astype(np.float64)
+    ema = X[:, COL["ema_7"]].astype(np.float64)
+    return np.r_[ema[:1], ema[:-1]]
+
+
+def baseline_forecast(X, amounts, periods, baseline):
+    """Forecast baseline `periods` hari ke depan (di-clip minimum 10.000)"""
+    if baseline == "seasonal_naive":
+        last_week = np.asarray(amounts[-SEASON:], dtype=np.float64)
+        values = last_week[np.arange(periods) % SEASON]
+    else:
+        values = np.full(periods, float(X[-1, COL["ema_7"]]))
+    return np.maximum(values, MIN_FORECAST)
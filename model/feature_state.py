@@ -0,0 +1,226 @@
+import uuid
+from collections import deque
+
+import numpy as np
+
+from features import (
+    COL,
+    EMA_SPAN,
+    FEATURE_COLS,
+    LAG_PERIODS,
+    ROLLING_WINDOWS,
+    aggregate_daily,
+    calendar_features,
+    ema,
+    parse_transactions,
+    rolling_features,
+)
+from inference import predict_rows
+
+# ============================================================================
+# INCREMENTAL FEATURE STATE PER USER
+# ============================================================================
+# Menyimpan ringkasan histori harian user (14 hari terakhir, EMA, trend,
+# tanggal terakhir) sehingga transaksi baru cukup di-append dalam O(1)
+# tanpa menghitung ulang seluruh histori.
+
+HISTORY_DAYS = max(LAG_PERIODS + ROLLING_WINDOWS)  # 14 hari
+COUNT_DAYS = 7  # Transaction_Count forecast = rata-rata 7 hari terakhir
+
+
+def ema_step(weighted, cur, span=EMA_SPAN):
+    """Satu langkah ewm(span, adjust=False), sama persis dengan features.ema"""
+    alpha = 2.0 / (span + 1.0)
+    old_wt = 1.0 - alpha
+    if weighted == cur:
+        return weighted
+    return (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+
+
+class FeatureState:
+    """
+    State fitur harian satu user.
+
+    Window rolling (<= 14 hari) dihitung ulang dari deque `amounts` saat
+    dibutuhkan, sehingga biaya update tetap konstan dan hasilnya identik
+    dengan features.build_feature_matrix.
+    """
+
+    def __init__(self):
+        self.state_id = uuid.uuid4().hex[:12]
+        self.version = 0
+        self.last_date = None
+        self.n_days = 0  # trend counter = jumlah hari sejak hari pertama
+        self.amounts = deque(maxlen=HISTORY_DAYS)
+        self.counts = deque(maxlen=COUNT_DAYS)
+        self.ema = None
+        self.ema_prev = None
+        self.total_amount = 0.0
+
+    @property
+    def cursor(self):
+        """Cursor yang harus dikirim ulang client bersama delta berikutnya"""
+        return f"{self.state_id}:{self.version}"
+
+    @property
+    def historical_mean(self):
+        return self.total_amount / self.n_days if self.n_days else 0.0
+
+    @classmethod
+    def from_daily(cls, first_date, daily_amount, daily_count, ema_values=None):
+        """
+        Bangun state dari series harian lengkap (sekali, O(n)).
+        ema_values: EMA series yang sudah dihitung (mis. slice EMA histori
+        penuh saat backtest), agar tidak dihitung ulang
+        """
+        state = cls()
+        n = len(daily_amount)
+        if n == 0:
+            return state
+
+        if ema_values is None:
+            ema_values = ema(daily_amount)
+        state.last_date = np.datetime64(first_date, "D") + (n - 1)
+        state.n_days = n
+        state.amounts.extend(daily_amount[-HISTORY_DAYS:].tolist())
+        state.counts.extend(daily_count[-COUNT_DAYS:].tolist())
+        state.ema = float(ema_values[-1])
+        state.ema_prev = float(ema_values[-2]) if n > 1 else None
+        state.total_amount = float(daily_amount.sum())
+        return state
+
+    @classmethod
+    def from_transactions(cls, transactions_raw):
+        """Full sync: bangun state dari seluruh histori transaksi"""
+        dates, amounts = parse_transactions(transactions_raw)
+        return cls.from_daily(*aggregate_daily(dates, amounts))
+
+    @classmethod
+    def from_daily_df(cls, daily_df):
+        """Bangun state dari daily_df hasil prepare_input_data / prepare_input_arrays"""
+        return cls.from_daily(
+            daily_df["Date"].iloc[0].to_datetime64(),
+            daily_df["Amount"].to_numpy(dtype=np.float64),
+            daily_df["Transaction_Count"].to_numpy(dtype=np.float64),
+        )
+
+    def copy(self):
+        state = FeatureState.__new__(FeatureState)
+        state.__dict__.update(self.__dict__)
+        state.amounts = deque(self.amounts, maxlen=HISTORY_DAYS)
+        state.counts = deque(self.counts, maxlen=COUNT_DAYS)
+        return state
+
+    def _push_day(self, amount, count):
+        self.ema_prev = self.ema
+        self.ema = amount if self.ema is None else ema_step(self.ema, amount)
+        self.amounts.append(amount)
+        self.counts.append(count)
+        self.total_amount += amount
+        self.n_days += 1
+
+    def append(self, day, amount, count=1):
+        """
+        Tambahkan total expense satu hari. Hari yang sama dengan last_date
+        akan ditambahkan ke hari tersebut; hari yang terlewat diisi 0.
+        """
+        day = np.datetime64(day, "D")
+        amount = float(amount)
+        count = float(count)
+
+        if self.last_date is not None and day < self.last_date:
+            raise ValueError(
+                f"Transaksi {day} lebih lama dari tanggal terakhir state {self.last_date}"
+            )
+
+        if self.last_date is not None and day == self.last_date:
+            # Revisi hari terakhir: EMA dihitung ulang dari nilai sebelumnya
+            revised = self.amounts[-1] + amount
+            self.amounts[-1] = revised
+            self.counts[-1] += count
+            self.total_amount += amount
+            self.ema = (
+                revised if self.ema_prev is None else ema_step(self.ema_prev, revised)
+            )
+        else:
+            if self.last_date is not None:
+                gap = int((day - self.last_date).astype(np.int64)) - 1
+                for _ in range(gap):
+                    self._push_day(0.0, 0.0)
+            self._push_day(amount, count)
+            self.last_date = day
+
+        self.version += 1
+
+    def append_transactions(self, transactions_raw):
+        """Aggregate delta transaksi per hari lalu append secara berurutan"""
+        dates, amounts = parse_transactions(transactions_raw)
+        if len(dates) == 0:
+            return
+
+        days, inverse = np.unique(dates, return_inverse=True)
+        daily_amount = np.bincount(inverse, weights=amounts, minlength=len(days))
+        daily_count = np.bincount(inverse, minlength=len(days))
+        for day, amount, count in zip(
+            days, daily_amount.tolist(), daily_count.tolist()
+        ):
+            self.append(day, amount, count)
+
+    def forecast_features(self, periods=7):
+        """
+        Baris fitur untuk `periods` hari ke depan (sama dengan build_forecast_frame):
+        lag dan rolling diambil dari hari terakhir yang diketahui.
+        Return (future_dates, X float32)
+        """
+        future_dates = self.last_date + 1 + np.arange(periods)
+        X = np.empty((periods, len(FEATURE_COLS)), dtype=np.float32)
+        calendar_features(future_dates, X)
+        X[:, COL["trend"]] = self.n_days + np.arange(periods)
+
+        values = np.array(self.amounts)
+        last = values[-1]
+        for lag in LAG_PERIODS:
+            X[:, COL[f"lag_{lag}"]] = values[-lag] if self.n_days >= lag else last
+
+        for window in ROLLING_WINDOWS:
+            mean, std, rolling_min, rolling_max = rolling_features(values, window)
+            X[:, COL[f"rolling_mean_{window}"]] = mean[-1]
+            X[:, COL[f"rolling_std_{window}"]] = 0.0 if np.isnan(std[-1]) else std[-1]
+            X[:, COL[f"rolling_min_{window}"]] = rolling_min[-1]
+            X[:, COL[f"rolling_max_{window}"]] = rolling_max[-1]
+
+        X[:, COL["ema_7"]] = self.ema
+        counts = np.array(self.counts, dtype=np.float32)
+        X[:, COL["Transaction_Count"]] = counts.sum(dtype=np.float32) / np.float32(
+            len(counts)
+        )
+        return future_dates, X
+
+
+def forecast_recursive(model, states, periods=7, min_value=10000):
+    """
+    Forecast rekursif multi-step untuk banyak user sekaligus.
+
+    Prediksi hari ke-k di-append ke salinan state setiap user (update O(1))
+    sehingga lag, rolling dan EMA hari ke-k+1 memakai hasil prediksi
+    tersebut. Setiap step di-batch untuk semua user: horizon H = H kali
+    model.predict, bukan H x jumlah user.
+
+    min_value: batas bawah prediksi, scalar atau array per state.
+    Return (start_dates, predictions) dengan predictions shape (users, periods)
+    """
+    states = [state.copy() for state in states]
+    start_dates = [state.last_date + 1 for state in states]
+    predictions = np.empty((len(states), periods), dtype=np.float32)
+
+    for step in range(periods):
+        X = np.vstack([state.forecast_features(1)[1] for state in states])
+        step_pred = predict_rows(model, X)
+        step_pred = np.maximum(step_pred, min_value)
+        predictions[:, step] = step_pred
+
+        counts = X[:, COL["Transaction_Count"]].tolist()
+        for state, value, count in zip(states, step_pred.tolist(), counts):
+            state.append(state.last_date + 1, value, count)
+
+    return start_dates, predictions
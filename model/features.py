@@ -0,0 +1,276 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from payload import ColumnarTransactions
+
+# ============================================================================
+# NUMPY FEATURE ENGINE (EXPENSE-ONLY MODE - SESUAI TRAINING)
+# ============================================================================
+# Versi NumPy dari prepare_input_data: X (float32) langsung ke satu array yang
+# sudah dialokasikan, tanpa DataFrame perantara. Hasilnya TIDAK bit-identik
+# dengan pandas:
+#   - kalender, Transaction_Count, trend: identik;
+#   - Amount harian, lag, rolling mean/min/max, ema_7: bisa berbeda 1 ulp
+#     float32 (bincount tidak memakai penjumlahan terkompensasi seperti
+#     groupby sum pandas);
+#   - rolling_std: std exact per window, pandas bisa menyimpang lebih jauh
+#     (lihat rolling_features).
+# Rolling memakai reduksi sliding window O(n*w) dengan w <= 14, bukan kernel
+# O(n) cumsum / running variance / monotonic deque; ema_7 adalah loop Python
+# O(n) dengan rekursi yang sama seperti ewm pandas.
+
+# Feature columns (29 features sesuai training)
+FEATURE_COLS = [
+    "Transaction_Count",
+    "day",
+    "month",
+    "year",
+    "dayofweek",
+    "dayofyear",
+    "weekofyear",
+    "is_weekend",
+    "is_month_start",
+    "is_month_end",
+    "lag_1",
+    "lag_2",
+    "lag_3",
+    "lag_7",
+    "lag_14",
+    "rolling_mean_3",
+    "rolling_std_3",
+    "rolling_min_3",
+    "rolling_max_3",
+    "rolling_mean_7",
+    "rolling_std_7",
+    "rolling_min_7",
+    "rolling_max_7",
+    "rolling_mean_14",
+    "rolling_std_14",
+    "rolling_min_14",
+    "rolling_max_14",
+    "ema_7",
+    "trend",
+]
+
+LAG_PERIODS = [1, 2, 3, 7, 14]
+ROLLING_WINDOWS = [3, 7, 14]
+EMA_SPAN = 7
+
+COL = {name: i for i, name in enumerate(FEATURE_COLS)}
+
+# Fallback jika tidak ada expense sama sekali (sama dengan prepare_input_data)
+EMPTY_START = np.datetime64("2025-06-30", "D")
+EMPTY_END = np.datetime64("2025-12-30", "D")
+
+
+def parse_transactions(transactions_raw):
+    """
+    Ubah list dict {Date, Amount, Type} menjadi array (dates, amounts)
+    yang hanya berisi transaksi EXPENSE
+    """
+    if isinstance(transactions_raw, ColumnarTransactions):
+        return transactions_raw.expenses()
+
+    has_type = any("Type" in t for t in transactions_raw)
+
+    if has_type:
+        rows = [
+            t
+            for t in transactions_raw
+            if isinstance(t.get("Type"), str) and t["Type"].upper() == "EXPENSE"
+        ]
+    else:
+        # Jika tidak ada kolom Type, asumsikan semua adalah expense
+        rows = transactions_raw
+
+    dates = parse_dates([t["Date"] for t in rows])
+    amounts = np.array([t["Amount"] for t in rows], dtype=np.float64)
+    return dates, amounts
+
+
+def parse_dates(values):
+    """Parse tanggal menjadi datetime64[D] (fallback ke pandas untuk format lain)"""
+    try:
+        return np.array(values, dtype="datetime64[D]")
+    except ValueError:
+        import pandas as pd
+
+        return pd.to_datetime(pd.Series(values)).to_numpy().astype("datetime64[D]")
+
+
+def aggregate_daily(dates, amounts):
+    """
+    Aggregate daily (sum Amount, count transaksi) dan isi tanggal kosong
+    dengan 0 menggunakan bincount, O(n)
+    """
+    if len(dates) == 0:
+        n_days = int((EMPTY_END - EMPTY_START).astype(np.int64)) + 1
+        return EMPTY_START, np.zeros(n_days), np.zeros(n_days)
+
+    day_numbers = dates.astype(np.int64)
+    first_day = day_numbers.min()
+    offsets = day_numbers - first_day
+    n_days = int(offsets.max()) + 1
+
+    daily_amount = np.bincount(offsets, weights=amounts, minlength=n_days)
+    daily_count = np.bincount(offsets, minlength=n_days).astype(np.float64)
+    return np.datetime64(int(first_day), "D"), daily_amount, daily_count
+
+
+def calendar_features(dates, out):
+    """Isi kolom fitur tanggal (day, month, ..., is_month_end) ke `out`"""
+    months = dates.astype("datetime64[M]")
+    years = dates.astype("datetime64[Y]")
+    day_numbers = dates.astype(np.int64)
+
+    # 1970-01-01 adalah hari Kamis -> Monday=0, Sunday=6
+    dayofweek = (day_numbers + 3) % 7
+
+    # ISO week = minggu dari hari Kamis pada minggu yang sama
+    thursday = dates - dayofweek + 3
+    thursday_year_start = thursday.astype("datetime64[Y]").astype("datetime64[D]")
+    weekofyear = (thursday - thursday_year_start).astype(np.int64) // 7 + 1
+
+    out[:, COL["day"]] = (dates - months.astype("datetime64[D]")).astype(np.int64) + 1
+    out[:, COL["month"]] = (months - years.astype("datetime64[M]")).astype(np.int64) + 1
+    out[:, COL["year"]] = years.astype(np.int64) + 1970
+    out[:, COL["dayofweek"]] = dayofweek
+    out[:, COL["dayofyear"]] = (dates - years.astype("datetime64[D]")).astype(
+        np.int64
+    ) + 1
+    out[:, COL["weekofyear"]] = weekofyear
+    out[:, COL["is_weekend"]] = dayofweek >= 5
+    out[:, COL["is_month_start"]] = out[:, COL["day"]] == 1
+    out[:, COL["is_month_end"]] = (dates + 1).astype("datetime64[M]") != months
+
+
+def lag_feature(values, lag):
+    """shift(lag) lalu bfill: baris awal diisi nilai pertama (NaN jika data < lag)"""
+    result = np.empty_like(values)
+    if len(values) <= lag:
+        result[:] = np.nan
+        return result
+    result[lag:] = values[:-lag]
+    result[:lag] = values[0]
+    return result
+
+
+def rolling_features(values, window):
+    """
+    rolling(window, min_periods=1) mean/std/min/max.
+
+    Reduksi atas sliding window view, O(n*w) dengan w <= 14 (bukan kernel
+    O(n) cumsum / running variance / monotonic deque). Mean = jumlah per
+    window / nobs, std dua pass (deviasi kuadrat terhadap mean window),
+    keduanya float64 lalu di-cast ke float32. Window yang semua nilainya
+    sama diberi std 0 dan mean = nilai tersebut, sama dengan pandas.
+
+    Std di sini = std exact per window (<= 1 ulp float32). Pandas menghitung
+    variance secara online (tambah/buang satu nilai per baris), sehingga
+    error absolutnya sebanding dengan kuadrat nilai yang pernah lewat
+    window. Window [0, 0, 2] sendiri: keduanya 1.1547. Setelah 5e5 lewat
+    window pandas memberi 1.15469, setelah 3e11 memberi 0.0; di sini tetap
+    1.1547.
+    """
+    n = len(values)
+    pad = window - 1
+    nobs = np.minimum(np.arange(1, n + 1), window).astype(np.float64)
+
+    windows = sliding_window_view(np.concatenate((np.zeros(pad), values)), window)
+    mean = windows.sum(axis=1) / nobs
+
+    windows_min = sliding_window_view(
+        np.concatenate((np.full(pad, np.inf), values)), window
+    )
+    windows_max = sliding_window_view(
+        np.concatenate((np.full(pad, -np.inf), values)), window
+    )
+    rolling_min = windows_min.min(axis=1)
+    rolling_max = windows_max.max(axis=1)
+
+    # Jumlah deviasi kuadrat hanya untuk posisi yang valid di setiap window
+    valid = np.arange(window) >= (window - nobs)[:, None]
+    deviations = np.where(valid, windows - mean[:, None], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = (deviations * deviations).sum(axis=1) / (nobs - 1)
+
+    constant = rolling_min == rolling_max
+    mean[constant] = rolling_min[constant]
+    variance[constant & (nobs > 1)] = 0.0
+    std = np.sqrt(variance)
+
+    # Baris pertama std = NaN (ddof=1), di-bfill dari baris berikutnya
+    if n > 1:
+        std[0] = std[1]
+    return mean, std, rolling_min, rolling_max
+
+
+def ema(values, span=EMA_SPAN):
+    """ewm(span, adjust=False).mean() dengan rekursi yang sama seperti pandas"""
+    alpha = 2.0 / (span + 1.0)
+    old_wt = 1.0 - alpha
+    result = np.empty_like(values)
+    if len(values) == 0:
+        return result
+
+    weighted = float(values[0])
+    out = [weighted]
+    for cur in values[1:].tolist():
+        if weighted != cur:
+            weighted = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+        out.append(weighted)
+    result[:] = out
+    return result
+
+
+def build_feature_matrix(first_date, daily_amount, daily_count):
+    """
+    Bangun matrix fitur (n_hari x 29) float32 dari series harian
+    """
+    n = len(daily_amount)
+    dates = first_date + np.arange(n)
+    X = np.empty((n, len(FEATURE_COLS)), dtype=np.float32)
+
+    X[:, COL["Transaction_Count"]] = daily_count
+    calendar_features(dates, X)
+
+    for lag in LAG_PERIODS:
+        X[:, COL[f"lag_{lag}"]] = lag_feature(daily_amount, lag)
+
+    for window in ROLLING_WINDOWS:
+        mean, std, rolling_min, rolling_max = rolling_features(daily_amount, window)
+        X[:, COL[f"rolling_mean_{window}"]] = mean
+        X[:, COL[f"rolling_std_{window}"]] = std
+        X[:, COL[f"rolling_min_{window}"]] = rolling_min
+        X[:, COL[f"rolling_max_{window}"]] = rolling_max
+
+    X[:, COL["ema_7"]] = ema(daily_amount)
+    X[:, COL["trend"]] = np.arange(n)
+
+    return dates, X
+
+
+def expense_features(transactions_raw, min_expenses=1):
+    """
+    compute_features untuk pipeline offline (train, backtest): None jika
+    transaksi EXPENSE kurang dari min_expenses. Tanpa expense sama sekali
+    aggregate_daily memakai 184 hari nol fallback (EMPTY_START..EMPTY_END)
+    yang bukan data user, jadi tidak pernah dikembalikan di sini
+    """
+    dates, amounts = parse_transactions(transactions_raw)
+    if len(amounts) < max(min_expenses, 1):
+        return None
+    first_date, daily_amount, daily_count = aggregate_daily(dates, amounts)
+    daily_dates, X = build_feature_matrix(first_date, daily_amount, daily_count)
+    return daily_dates, daily_amount.astype(np.float32), X
+
+
+def compute_features(transactions_raw):
+    """
+    Pipeline lengkap: parse -> aggregate harian -> matrix fitur.
+    Return (dates, amount float32, X float32) setara dengan prepare_input_data
+    """
+    dates, amounts = parse_transactions(transactions_raw)
+    first_date, daily_amount, daily_count = aggregate_daily(dates, amounts)
+    daily_dates, X = build_feature_matrix(first_date, daily_amount, daily_count)
+    return daily_dates, daily_amount.astype(np.float32), X
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from payload import ColumnarTransactions
+
+# ============================================================================
+# CONTENT-ADDRESSED FORECAST CACHE (IN-PROCESS)
+# ============================================================================
+# Key = hash(payload transaksi yang dinormalisasi + opsi request + identitas
+# model). Data yang sama selalu menghasilkan key yang sama, apapun urutan
+# transaksinya; transaksi baru atau model baru otomatis menjadi cache miss.
+
+
+def normalize_transactions(transactions):
+    """Normalisasi {Date, Amount, Type} agar urutan/format tidak mengubah key"""
+    rows = []
+    for t in transactions:
+        type_raw = t.get("Type")
+        rows.append(
+            (
+                str(t.get("Date")),
+                float(t.get("Amount", 0)),
+                type_raw.upper() if isinstance(type_raw, str) else None,
+            )
+        )
+    rows.sort(key=lambda r: (r[0], r[2] or "", r[1]))
+    return rows
+
+
+def make_cache_key(transactions, model_id, **options):
+    """Hash blake2b dari transaksi ternormalisasi, opsi request dan model_id"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(str(model_id).encode())
+    digest.update(json.dumps(options, sort_keys=True).encode())
+    if isinstance(transactions, ColumnarTransactions):
+        digest.update(b"columnar")
+        digest.update(transactions.normalized_bytes())
+    else:
+        digest.update(json.dumps(normalize_transactions(transactions)).encode())
+    return digest.hexdigest()
+
+
+class ForecastCache:
+    """
+    LRU cache dengan TTL dan batas memori (jumlah entry dan total bytes).
+    Value disimpan sebagai bytes JSON yang siap dikirim.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl_seconds=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, body, tag)
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, body, tag = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body, tag=None):
+        if len(body) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, body, tag)
+            self.total_bytes += len(body)
+
+            while (
+                len(self._entries) > self.max_entries
+                or self.total_bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def invalidate(self, tag=None):
+        """
+        Hook invalidasi: hapus semua entry dengan `tag` tertentu (mis. userId),
+        atau seluruh cache jika tag None. Return jumlah entry yang dihapus.
+        """
+        with self._lock:
+            if tag is None:
+                keys = list(self._entries)
+            else:
+                keys = [k for k, entry in self._entries.items() if entry[2] == tag]
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def _remove(self, key):
+        expires_at, body, tag = self._entries.pop(key)
+        self.total_bytes -= len(body)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
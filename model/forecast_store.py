@@ -0,0 +1,223 @@
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from payload import PayloadError
+
+# ============================================================================
+# PRECOMPUTED FORECAST STORE (SQLITE DI DISK LOKAL)
+# ============================================================================
+# Satu baris per (user, variant): body response /analyze-forecast yang sudah
+# di-encode (blok forecast, metrics, summary + metadata) beserta watermark
+# data dan model_id yang dipakai menghitungnya. Variant = opsi request yang
+# mengubah response (mode, forecast_method, horizon, bucket).
+#
+# Entry hanya dilayani jika watermark DAN model_id sama; selain itu dianggap
+# usang (stale) dan forecast dihitung ulang lalu ditulis kembali. Diisi oleh
+# precompute.py (offline) dan write-through dari request yang menghitung ulang.
+#
+# Mode WAL: pembaca (worker API) tidak terblokir job precompute yang sedang
+# menulis. Koneksi dibuka per thread per proses (tidak ikut ter-fork).
+
+logger = logging.getLogger("forecast")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS forecasts (
+    user_id TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    watermark TEXT NOT NULL,
+    model_id TEXT NOT NULL,
+    body BLOB NOT NULL,
+    computed_at REAL NOT NULL,
+    PRIMARY KEY (user_id, variant)
+) WITHOUT ROWID
+"""
+
+MAX_WATERMARK_LENGTH = 256
+QUERY_CHUNK = 500  # batas parameter per query IN (...)
+
+
+def normalize_watermark(value):
+    """
+    Watermark -> string pembanding. Integer (mis. sequence id) dan timestamp
+    (ISO 8601) dinormalisasi agar nilai dari request JSON dan dari kolom
+    file partisi menghasilkan string yang sama. None = tanpa watermark
+    """
+    if value is None:
+        return None
+    if isinstance(value, (bool, np.bool_)):
+        raise PayloadError("INVALID_WATERMARK", "watermark harus string atau integer")
+    if isinstance(value, (np.integer, np.floating)):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, (datetime.date, np.datetime64)):
+        value = (
+            value.isoformat()
+            if isinstance(value, datetime.date)
+            else str(np.datetime_as_string(value))
+        )
+    if not isinstance(value, (str, int)):
+        raise PayloadError("INVALID_WATERMARK", "watermark harus string atau integer")
+    value = str(value)
+    if not value or len(value) > MAX_WATERMARK_LENGTH:
+        raise PayloadError(
+            "INVALID_WATERMARK",
+            f"watermark harus 1-{MAX_WATERMARK_LENGTH} karakter",
+        )
+    return value
+
+
+def variant_key(mode, forecast_method, periods, bucket):
+    """Opsi request yang menentukan isi response (sama dengan key cache)"""
+    return f"{mode}|{forecast_method}|{periods}|{bucket or ''}"
+
+
+class ForecastStore:
+    def __init__(self, path, busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # isolation_level=None: autocommit, transaksi eksplisit di put_many
+        conn = sqlite3.connect(
+            self.path, timeout=self.busy_timeout, isolation_level=None
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(SCHEMA)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def initialize(self):
+        """Buat file, tabel dan mode WAL (mis. sebelum banyak proses menulis)"""
+        self._connection()
+        return self
+
+    def _count(self, field, n=1):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + n)
+
+    def get(self, user_id, variant, watermark, model_id):
+        """
+        Body tersimpan jika watermark dan model_id sama, selain itu None.
+        Error SQLite dicatat dan dianggap miss (store tidak boleh
+        menggagalkan request)
+        """
+        try:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT watermark, model_id, body FROM forecasts"
+                    " WHERE user_id = ? AND variant = ?",
+                    (str(user_id), variant),
+                )
+                .fetchone()
+            )
+        except (sqlite3.Error, OSError) as e:
+            self._count("errors")
+            logger.warning(f"⚠️ Forecast store gagal dibaca: {e}")
+            return None
+
+        if row is None:
+            self._count("misses")
+            return None
+        if row[0] != watermark or row[1] != model_id:
+            self._count("stale")
+            return None
+        self._count("hits")
+        return row[2]
+
+    def stored_watermarks(self, user_ids, variant, model_id):
+        """{user_id: watermark} untuk entry yang dihitung dengan model_id ini"""
+        conn = self._connection()
+        user_ids = [str(user_id) for user_id in user_ids]
+        found = {}
+        for i in range(0, len(user_ids), QUERY_CHUNK):
+            chunk = user_ids[i : i + QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                "SELECT user_id, watermark FROM forecasts"
+                f" WHERE variant = ? AND model_id = ? AND user_id IN ({placeholders})",
+                (variant, model_id, *chunk),
+            )
+            found.update(rows)
+        return found
+
+    def put_many(self, rows):
+        """
+        Tulis [(user_id, variant, watermark, model_id, body), ...] dalam satu
+        transaksi; entry lama user + variant yang sama diganti
+        """
+        if not rows:
+            return
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO forecasts"
+                " (user_id, variant, watermark, model_id, body, computed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (str(user_id), variant, watermark, model_id, body, now)
+                    for user_id, variant, watermark, model_id, body in rows
+                ],
+            )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self._count("writes", len(rows))
+
+    def put(self, user_id, variant, watermark, model_id, body):
+        """Write-through dari request; error dicatat, tidak dilempar"""
+        try:
+            self.put_many([(user_id, variant, watermark, model_id, body)])
+        except (sqlite3.Error, OSError) as e:
+            self._count("errors")
+            logger.warning(f"⚠️ Forecast store gagal ditulis: {e}")
+
+    def invalidate(self, user_id):
+        """Hapus semua variant milik satu user; return jumlah baris terhapus"""
+        try:
+            cursor = self._connection().execute(
+                "DELETE FROM forecasts WHERE user_id = ?", (str(user_id),)
+            )
+        except (sqlite3.Error, OSError) as e:
+            self._count("errors")
+            logger.warning(f"⚠️ Forecast store gagal dihapus: {e}")
+            return 0
+        return cursor.rowcount
+
+    def stats(self):
+        """Counter in-memory saja; tidak ada query (dipanggil /health, /metrics)"""
+        with self._lock:
+            lookups = self.hits + self.stale + self.misses
+            return {
+                "path": self.path,
+                "hits": self.hits,
+                "stale": self.stale,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "writes": self.writes,
+                "errors": self.errors,
+            }
@@ -0,0 +1,108 @@
+"""
+Entrypoint produksi (pre-fork, multi-worker):
+
+    cd model
+    gunicorn -c gunicorn.conf.py app:app
+
+Model di-load SEKALI di master (preload_app) sebelum fork, sehingga memori
+booster dibagi antar worker lewat copy-on-write. Setiap worker membatasi
+thread XGBoost (workers x nthread <= jumlah core) dan menjalankan warmup
+predict sebelum mulai menerima request.
+
+Environment:
+    FORECAST_BIND      alamat bind (default 0.0.0.0:5001)
+    FORECAST_WORKERS   jumlah worker (default 1, lihat "Multi-worker")
+    FORECAST_STICKY_ROUTING  "true" = load balancer merutekan request per
+                       userId ke worker yang sama; wajib jika workers > 1
+    FORECAST_NTHREAD   thread XGBoost per worker (default = core // workers)
+    FORECAST_WORKER_THREADS  thread request per worker (default
+                       FORECAST_MAX_CONCURRENT + FORECAST_MAX_QUEUE); >1 memakai
+                       worker gthread sehingga request konkuren di satu worker
+                       bisa digabung oleh micro-batcher. Thread di atas batas
+                       admission menunggu di antrian admission app (bounded,
+                       429/503 + Retry-After), bukan di backlog gunicorn
+    FORECAST_TIMEOUT   timeout worker dalam detik (default 60)
+    FORECAST_LEAN_IMPORTS  "true" = xgboost di-import tanpa sklearn (start
+                       ~1 detik lebih cepat, API sklearn xgboost nonaktif di
+                       worker; lihat startup.py)
+
+Multi-worker: state berikut ada per proses, bukan per server -
+    - FeatureState /analyze-forecast/incremental: delta yang mendarat di
+      worker lain mendapat 409 CURSOR_MISMATCH, jadi routing harus sticky
+      per userId (FORECAST_STICKY_ROUTING=true sebagai konfirmasi);
+    - model aktif: POST /admin/reload-model hanya mengenai satu worker, jadi
+      endpoint tersebut ditolak (409) dan setiap worker me-reload sendiri
+      lewat watcher folder (FORECAST_MODEL_WATCH_INTERVAL, default 5 detik
+      jika workers > 1). Rollback = pindahkan/hapus file di folder model.
+Tanpa sticky routing server dijalankan dengan satu worker.
+"""
+
+import os
+
+
+def available_cores():
+    # sched_getaffinity menghormati pembatasan CPU container/taskset
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+CORES = available_cores()
+
+bind = os.environ.get("FORECAST_BIND", "0.0.0.0:5001")
+STICKY_ROUTING = os.environ.get("FORECAST_STICKY_ROUTING", "").lower() == "true"
+workers = int(os.environ.get("FORECAST_WORKERS", CORES if STICKY_ROUTING else 1))
+if workers > 1 and not STICKY_ROUTING:
+    raise RuntimeError(
+        "FORECAST_WORKERS > 1 membutuhkan sticky routing per userId "
+        "(set FORECAST_STICKY_ROUTING=true), lihat docstring gunicorn.conf.py"
+    )
+threads = int(
+    os.environ.get(
+        "FORECAST_WORKER_THREADS",
+        int(os.environ.get("FORECAST_MAX_CONCURRENT", 4))
+        + int(os.environ.get("FORECAST_MAX_QUEUE", 32)),
+    )
+)
+timeout = int(os.environ.get("FORECAST_TIMEOUT", 60))
+preload_app = True
+
+NTHREAD = int(os.environ.get("FORECAST_NTHREAD", max(1, CORES // workers)))
+
+# Di-set sebelum app (dan xgboost) di-import oleh master, sehingga thread
+# pool OpenMP (DMatrix, predict) juga dibatasi di setiap worker
+os.environ["OMP_NUM_THREADS"] = str(NTHREAD)
+os.environ["FORECAST_NTHREAD"] = str(NTHREAD)
+# Dibaca app: reload lewat HTTP ditolak jika lebih dari satu worker
+os.environ["FORECAST_WORKERS"] = str(workers)
+
+# File watcher dijalankan per worker (thread tidak ikut ter-fork), bukan di
+# master: reload di master tidak berpengaruh ke worker yang sudah berjalan.
+# Dengan banyak worker watcher adalah satu-satunya jalur reload, jadi aktif
+WATCH_INTERVAL = float(
+    os.environ.pop("FORECAST_MODEL_WATCH_INTERVAL", 5 if workers > 1 else 0)
+)
+
+
+def when_ready(server):
+    server.log.info(
+        f"Forecast API siap: {workers} worker x {threads} thread request, "
+        f"{NTHREAD} thread XGBoost per worker ({CORES} core)"
+    )
+
+
+def post_worker_init(worker):
+    """Dipanggil di worker setelah fork, sebelum worker menerima request"""
+    from app import income_registry, model_registry, shadow_registry
+
+    for registry in (model_registry, income_registry):
+        registry.set_nthread(NTHREAD)
+    # Model shadow tetap memakai FORECAST_SHADOW_NTHREAD
+    for registry in (model_registry, income_registry, shadow_registry):
+        registry.warmup()
+        registry.start_watcher(WATCH_INTERVAL)
+
+    active = model_registry.active
+    worker.log.info(
+        f"Worker {worker.pid} siap (model {active.version if active else '-'})"
+    )
@@ -0,0 +1,147 @@
+import numpy as np
+
+from payload import PayloadError
+from response_encoder import date_strings
+
+# ============================================================================
+# HORIZON ENGINE (FORECAST N HARI + AGREGASI PER MINGGU/BULAN/KUARTAL)
+# ============================================================================
+# `horizon_days` menentukan jumlah hari yang di-forecast (1..MAX_HORIZON_DAYS),
+# `bucket` menentukan agregasi total prediksi harian: day, week (ISO, mulai
+# Senin), month atau quarter. Tanpa kedua field, `mode` lama tetap berlaku.
+# Agregasi memakai np.add.reduceat pada batas bucket (tanggal terurut).
+
+BUCKETS = ("day", "week", "month", "quarter")
+MAX_HORIZON_DAYS = 730
+
+# Horizon default jika hanya `bucket` yang dikirim
+DEFAULT_HORIZON_DAYS = {"week": 28, "month": 90, "quarter": 365}
+
+
+def resolve_horizon(horizon_days, bucket, mode_periods):
+    """
+    Validasi field horizon_days / bucket dari request.
+    Return (periods, bucket); bucket None = response lama tanpa "buckets"
+    """
+    if bucket is not None and bucket not in BUCKETS:
+        raise PayloadError("INVALID_HORIZON", f"bucket harus salah satu dari {BUCKETS}")
+
+    if horizon_days is None:
+        if bucket is None:
+            return mode_periods, None
+        return DEFAULT_HORIZON_DAYS.get(bucket, mode_periods), bucket
+
+    if (
+        isinstance(horizon_days, bool)
+        or not isinstance(horizon_days, int)
+        or not 1 <= horizon_days <= MAX_HORIZON_DAYS
+    ):
+        raise PayloadError(
+            "INVALID_HORIZON",
+            f"horizon_days harus bilangan bulat 1-{MAX_HORIZON_DAYS}",
+        )
+    return horizon_days, bucket or "day"
+
+
+def bucket_starts(dates, bucket):
+    """Tanggal awal bucket (datetime64[D]) untuk setiap tanggal"""
+    days = np.asarray(dates).astype("datetime64[D]")
+    if bucket == "day":
+        return days
+    if bucket == "week":
+        return days - (days.astype(np.int64) + 3) % 7  # 1970-01-01 = Kamis
+    months = days.astype("datetime64[M]")
+    if bucket == "quarter":
+        months = months - months.astype(np.int64) % 3
+    return months.astype("datetime64[D]")
+
+
+def bucket_ends(starts, bucket):
+    """Tanggal terakhir bucket kalender penuh yang dimulai di `starts`"""
+    if bucket == "day":
+        return starts
+    if bucket == "week":
+        return starts + 6
+    months = 3 if bucket == "quarter" else 1
+    return (starts.astype("datetime64[M]") + months).astype("datetime64[D]") - 1
+
+
+def bucket_labels(starts, bucket):
+    """Label bucket: 2024-01-05 / 2024-W02 / 2024-01 / 2024-Q1"""
+    if bucket == "day":
+        return date_strings(starts)
+    months = starts.astype("datetime64[M]").astype(np.int64)
+    years = months // 12 + 1970
+    if bucket == "month":
+        return np.datetime_as_string(starts, unit="M").tolist()
+    if bucket == "quarter":
+        return [
+            f"{y}-Q{q}" for y, q in zip(years.tolist(), (months % 12 // 3 + 1).tolist())
+        ]
+
+    # ISO week: tahun & nomor minggu mengikuti hari Kamis di minggu tersebut
+    thursdays = starts + 3
+    iso_years = thursdays.astype("datetime64[Y]")
+    weeks = (thursdays - iso_years.astype("datetime64[D]")).astype(np.int64) // 7 + 1
+    iso_years = iso_years.astype(np.int64) + 1970
+    return [f"{y}-W{w:02d}" for y, w in zip(iso_years.tolist(), weeks.tolist())]
+
+
+def aggregate_buckets(dates, values, bucket):
+    """
+    Jumlahkan nilai harian (tanggal terurut naik) per bucket.
+    Return dict array: start, end, first, last, days, total
+    """
+    dates = np.asarray(dates).astype("datetime64[D]")
+    values = np.asarray(values, dtype=np.float64)
+    starts = bucket_starts(dates, bucket)
+
+    boundaries = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    stops = np.r_[boundaries[1:], len(dates)]
+    period_start = starts[boundaries]
+    return {
+        "start": period_start,
+        "end": bucket_ends(period_start, bucket),
+        "first": dates[boundaries],
+        "last": dates[stops - 1],
+        "days": stops - boundaries,
+        "total": np.add.reduceat(values, boundaries),
+    }
+
+
+def format_buckets(forecast_df, bucket):
+    """Blok "buckets" response dari forecast_df (kolom Date & forecast)"""
+    if len(forecast_df) == 0:
+        return []
+
+    agg = aggregate_buckets(
+        forecast_df["Date"].to_numpy(), forecast_df["forecast"].to_numpy(), bucket
+    )
+    total = agg["total"]
+    # Bucket pertama/terakhir bisa terpotong horizon (complete = False)
+    complete = (agg["first"] == agg["start"]) & (agg["last"] == agg["end"])
+
+    return [
+        {
+            "label": label,
+            "start": start,
+            "end": end,
+            "days": days,
+            "complete": is_complete,
+            "predicted_expense": expense,
+            "confidence_low": low,
+            "confidence_high": high,
+            "average_daily_expense": average,
+        }
+        for label, start, end, days, is_complete, expense, low, high, average in zip(
+            bucket_labels(agg["start"], bucket),
+            date_strings(agg["first"]),
+            date_strings(agg["last"]),
+            agg["days"].tolist(),
+            complete.tolist(),
+            np.rint(total).astype(np.int64).tolist(),
+            np.rint(total * 0.8).astype(np.int64).tolist(),
+            np.rint(total * 1.2).astype(np.int64).tolist(),
+            np.rint(total / agg["days"]).astype(np.int64).tolist(),
+        )
+    ]
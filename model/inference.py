@@ -0,0 +1,28 @@
+import os
+
+import numpy as np
+import xgboost as xgb
+
+from features import FEATURE_COLS
+
+# ============================================================================
+# SMALL-BATCH FAST PATH (INPLACE PREDICT TANPA DMATRIX)
+# ============================================================================
+# Untuk beberapa baris (forecast 7-90 hari, satu step rekursif) membangun
+# DMatrix lebih mahal daripada traversal pohonnya. Array float32 contiguous
+# dikirim langsung ke Booster.inplace_predict; DMatrix hanya dipakai untuk
+# batch besar. Hasil kedua jalur identik.
+#
+# Urutan kolom X = FEATURE_COLS; ModelRegistry menolak booster yang
+# feature_names-nya berbeda, sehingga urutan ini sama dengan urutan booster.
+# Titik crossover diukur dengan: python benchmark.py --crossover
+
+INPLACE_MAX_ROWS = int(os.environ.get("FORECAST_INPLACE_MAX_ROWS", 512))
+
+
+def predict_rows(booster, X, feature_names=FEATURE_COLS):
+    """Predict matrix fitur [n, features]: inplace untuk batch kecil, DMatrix untuk besar"""
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    if len(X) <= INPLACE_MAX_ROWS:
+        return booster.inplace_predict(X)
+    return booster.predict(xgb.DMatrix(X, feature_names=list(feature_names)))
@@ -0,0 +1,147 @@
+import threading
+import time
+
+import numpy as np
+
+from inference import predict_rows
+from telemetry import Histogram
+
+# ============================================================================
+# MICRO-BATCHING PREDICT (REQUEST KONKUREN -> SATU model.predict)
+# ============================================================================
+# Setiap request menaruh matrix fiturnya di antrian. Antrian dikumpulkan
+# selama `window_ms` (atau sampai `max_rows` baris), lalu SATU predict per
+# booster dijalankan untuk seluruh batch dan hasilnya dipotong kembali ke
+# masing-masing request. Tidak ada thread tambahan (aman untuk pre-fork).
+# Prediksi XGBoost per baris tidak bergantung baris lain, sehingga hasil
+# identik dengan predict per request.
+
+BATCH_ROWS = Histogram(
+    "forecast_microbatch_rows",
+    "Jumlah baris per predict micro-batch",
+    buckets=(8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384),
+)
+BATCH_REQUESTS = Histogram(
+    "forecast_microbatch_requests",
+    "Jumlah request yang digabung per predict micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+QUEUE_WAIT_SECONDS = Histogram(
+    "forecast_microbatch_queue_wait_seconds",
+    "Waktu tunggu request di antrian micro-batch sebelum predict",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+
+class _Pending:
+    __slots__ = ("booster", "X", "feature_names", "enqueued", "done", "result", "error")
+
+    def __init__(self, booster, X, feature_names):
+        self.booster = booster
+        self.X = X
+        self.feature_names = feature_names
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher:
+    """
+    Leader/follower: request pertama yang masuk antrian kosong menjadi
+    leader, menunggu window lalu menjalankan predict untuk seluruh antrian
+    di thread-nya sendiri; request lain (follower) cukup menunggu hasilnya.
+
+    window_ms = 0 mematikan batching (predict langsung di thread request).
+    expected: callable opsional -> jumlah request yang mungkin masih akan
+    submit; leader berhenti menunggu begitu semuanya sudah masuk antrian,
+    sehingga request tunggal tidak menanggung window.
+    """
+
+    def __init__(self, window_ms=2.0, max_rows=8192, expected=None):
+        self.window = window_ms / 1000.0
+        self.max_rows = max_rows
+        self.expected = expected
+        self._queue = []
+        self._queued_rows = 0
+        self._has_leader = False
+        self._cond = threading.Condition()
+
+    @property
+    def enabled(self):
+        return self.window > 0
+
+    def predict(self, booster, X, feature_names):
+        """Predict X (float32, shape [n, features]) lewat micro-batch"""
+        if not self.enabled or len(X) >= self.max_rows:
+            return predict_rows(booster, X, feature_names)
+
+        item = _Pending(booster, X, feature_names)
+        with self._cond:
+            self._queue.append(item)
+            self._queued_rows += len(X)
+            is_leader = not self._has_leader
+            if is_leader:
+                self._has_leader = True
+                batch = self._collect(item.enqueued + self.window)
+            else:
+                self._cond.notify()
+
+        if is_leader:
+            self._run(batch)
+
+        item.done.wait()
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _collect(self, deadline):
+        """Tunggu window / max_rows lalu ambil seluruh antrian (_cond terkunci)"""
+        while self._queued_rows < self.max_rows:
+            if self.expected is not None and len(self._queue) >= self.expected():
+                break
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            self._cond.wait(remaining)
+
+        batch = self._queue
+        self._queue = []
+        self._queued_rows = 0
+        self._has_leader = False  # request berikutnya menjadi leader batch baru
+        return batch
+
+    def _run(self, batch):
+        started = time.perf_counter()
+        for item in batch:
+            QUEUE_WAIT_SECONDS.observe(started - item.enqueued)
+
+        # Saat hot-swap, request bisa memegang booster berbeda
+        groups = {}
+        for item in batch:
+            groups.setdefault(id(item.booster), []).append(item)
+        for items in groups.values():
+            self._predict_group(items)
+
+    def _predict_group(self, items):
+        try:
+            if len(items) == 1:
+                stacked = items[0].X
+            else:
+                stacked = np.concatenate([item.X for item in items])
+            predictions = predict_rows(
+                items[0].booster, stacked, items[0].feature_names
+            )
+        except Exception as e:
+            for item in items:
+                item.error = e
+                item.done.set()
+            return
+
+        BATCH_ROWS.observe(len(stacked))
+        BATCH_REQUESTS.observe(len(items))
+        offset = 0
+        for item in items:
+            item.result = predictions[offset : offset + len(item.X)]
+            offset += len(item.X)
+            item.done.set()
@@ -0,0 +1,353 @@
+import fnmatch
+import glob
+import hashlib
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import xgboost as xgb
+
+from features import FEATURE_COLS
+
+# ============================================================================
+# MODEL REGISTRY (HOT-SWAP BOOSTER TANPA RESTART)
+# ============================================================================
+# Booster dimuat dari folder model (file yang cocok dengan `pattern`, versi
+# terbaru = mtime terbaru). Versi baru di-load dan di-warmup di luar lock,
+# lalu di-swap secara atomic. Request yang sedang berjalan memegang versi
+# lama lewat acquire() sampai selesai; versi lama dilepas setelah itu.
+
+logger = logging.getLogger("forecast")
+
+WARMUP_ROWS = 8
+
+
+class ModelLoadError(RuntimeError):
+    """File model tidak ditemukan, gagal di-load atau tidak lolos warmup"""
+
+    def __init__(self, error, message, status=500):
+        super().__init__(message)
+        self.error = error
+        self.message = message
+        self.status = status
+
+
+class ModelVersion:
+    """Satu booster yang sudah di-load beserta identitasnya"""
+
+    def __init__(self, booster, path, model_id, feature_names):
+        self.booster = booster
+        self.path = path
+        self.model_id = model_id
+        self.feature_names = feature_names
+        self.version = f"{os.path.splitext(os.path.basename(path))[0]}@{model_id[:8]}"
+        self.loaded_at = datetime.now().isoformat()
+        self.in_flight = 0
+        self.retired = False
+
+    def metadata(self):
+        """Field identitas model untuk metadata response"""
+        return {
+            "model_path": self.path,
+            "model_artifact": self.version,
+            "model_id": self.model_id,
+        }
+
+    def describe(self):
+        return {
+            **self.metadata(),
+            "loaded_at": self.loaded_at,
+            "in_flight": self.in_flight,
+        }
+
+
+def warmup_booster(booster, feature_names, path=""):
+    """
+    Predict pertama menginisialisasi struktur internal booster (dan thread
+    pool OpenMP), sehingga request pertama tidak menanggung biayanya.
+    Jalur inplace (batch kecil) dan DMatrix (batch besar) sama-sama di-warmup.
+    """
+    try:
+        warmup = np.zeros((WARMUP_ROWS, len(feature_names)), dtype=np.float32)
+        pred = booster.predict(xgb.DMatrix(warmup, feature_names=feature_names))
+        pred_inplace = booster.inplace_predict(warmup)
+    except Exception as e:
+        raise ModelLoadError("MODEL_WARMUP_FAILED", f"Warmup {path} gagal: {e}")
+    if (
+        pred.shape[0] != WARMUP_ROWS
+        or not np.all(np.isfinite(pred))
+        or not np.array_equal(pred, pred_inplace)
+    ):
+        raise ModelLoadError(
+            "MODEL_WARMUP_FAILED", f"Warmup {path} menghasilkan prediksi tidak valid"
+        )
+
+
+class ModelRegistry:
+    def __init__(
+        self,
+        model_dir,
+        pattern="*.model",
+        feature_names=FEATURE_COLS,
+        nthread=None,
+        target=None,
+    ):
+        self.model_dir = model_dir
+        self.pattern = pattern
+        # Attribute booster "target" yang wajib ada (mis. "income"); None = bebas
+        self.target = target
+        self.expected_features = list(feature_names)
+        self.nthread = nthread  # None = default XGBoost (semua core)
+        self.active = None
+        self.swaps = 0
+        self.last_reload = None
+        self.last_error = None
+        self._draining = []
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()  # satu reload dalam satu waktu
+        self._watcher = None
+        self._watch_stop = threading.Event()
+        self.watch_interval = 0
+
+    # ------------------------------------------------------------------
+    # LOAD & SWAP
+    # ------------------------------------------------------------------
+
+    def candidates(self):
+        """File model di folder registry, terlama -> terbaru"""
+        paths = glob.glob(os.path.join(self.model_dir, self.pattern))
+        return sorted(paths, key=lambda p: (os.path.getmtime(p), p))
+
+    def resolve(self, name=None):
+        """
+        Path file model: `name` di dalam model_dir, atau kandidat terbaru.
+        `name` harus cocok dengan pattern registry (mis. model income tidak
+        boleh di-load sebagai model expense)
+        """
+        if name:
+            if not fnmatch.fnmatch(os.path.basename(name), self.pattern):
+                raise ModelLoadError(
+                    "INVALID_MODEL_NAME",
+                    f"File model {name} tidak cocok dengan pola {self.pattern}",
+                    400,
+                )
+            path = os.path.join(self.model_dir, os.path.basename(name))
+            if not os.path.isfile(path):
+                raise ModelLoadError(
+                    "MODEL_NOT_FOUND", f"File model {name} tidak ditemukan", 404
+                )
+            return path
+
+        paths = self.candidates()
+        if not paths:
+            raise ModelLoadError(
+                "MODEL_NOT_FOUND",
+                f"Tidak ada file {self.pattern} di folder {self.model_dir}",
+                404,
+            )
+        return paths[-1]
+
+    def load(self, path):
+        """Load booster dari bytes file (hash = isi yang benar-benar di-load) + warmup"""
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            booster = xgb.Booster()
+            booster.load_model(bytearray(raw))
+        except Exception as e:
+            # Pesan XGBoostError menyertakan stack trace C++, cukup baris pertama
+            reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+            raise ModelLoadError("MODEL_LOAD_FAILED", f"Gagal load {path}: {reason}")
+
+        # Model sklearn early-stopped menyimpan semua round; XGBRegressor.predict
+        # hanya memakai round sampai best_iteration, jadi booster dipotong sama
+        best_iteration = booster.attr("best_iteration")
+        if best_iteration is not None:
+            booster = booster[: int(best_iteration) + 1]
+
+        feature_names = booster.feature_names or self.expected_features
+        if list(feature_names) != self.expected_features:
+            raise ModelLoadError(
+                "MODEL_FEATURE_MISMATCH",
+                f"Feature names {path} tidak sama dengan FEATURE_COLS",
+                422,
+            )
+
+        if self.target is not None and booster.attr("target") != self.target:
+            raise ModelLoadError(
+                "MODEL_TARGET_MISMATCH",
+                f"Model {path} tidak ditandai sebagai model {self.target} "
+                f'(attribute target={booster.attr("target")!r})',
+                422,
+            )
+
+        if self.nthread:
+            booster.set_param({"nthread": self.nthread})
+        warmup_booster(booster, feature_names, path)
+
+        model_id = hashlib.sha256(raw).hexdigest()[:16]
+        return ModelVersion(booster, path, model_id, list(feature_names))
+
+    def reload(self, name=None, force=False):
+        """
+        Load versi terbaru (atau `name`) lalu swap. Tanpa `force`, file dengan
+        isi yang sama dengan model aktif tidak di-swap.
+        Return (ModelVersion aktif, swapped: bool)
+        """
+        with self._reload_lock:
+            self.last_reload = datetime.now().isoformat()
+            try:
+                version = self.load(self.resolve(name))
+            except ModelLoadError as e:
+                self.last_error = e.message
+                raise
+            self.last_error = None
+
+            active = self.active
+            if (
+                not force
+                and active is not None
+                and active.model_id == version.model_id
+                and active.path == version.path
+            ):
+                return active, False
+
+            self._swap(version)
+            return version, True
+
+    def _swap(self, version):
+        with self._lock:
+            old = self.active
+            self.active = version
+            if old is not None:
+                self.swaps += 1
+                old.retired = True
+                if old.in_flight:
+                    self._draining.append(old)
+
+        logger.info(
+            f"🔄 Model aktif: {version.version}"
+            + (f" (sebelumnya {old.version})" if old is not None else "")
+        )
+        for callback in self._listeners:
+            callback(version)
+
+    def in_flight(self):
+        """Jumlah request yang sedang memegang model (aktif + draining)"""
+        with self._lock:
+            active = self.active.in_flight if self.active is not None else 0
+            return active + sum(version.in_flight for version in self._draining)
+
+    def set_nthread(self, nthread):
+        """Batasi thread XGBoost per proses (model aktif dan yang di-load berikutnya)"""
+        self.nthread = nthread
+        with self._lock:
+            active = self.active
+        if active is not None:
+            active.booster.set_param({"nthread": nthread})
+
+    def warmup(self):
+        """Warmup ulang model aktif, mis. di worker setelah fork"""
+        with self.acquire() as active:
+            if active is not None:
+                warmup_booster(active.booster, active.feature_names, active.path)
+
+    def on_swap(self, callback):
+        """Daftarkan callback(version) yang dipanggil setiap kali model di-swap"""
+        self._listeners.append(callback)
+
+    @contextmanager
+    def acquire(self):
+        """
+        Pin model aktif selama satu request: `with registry.acquire() as active:`.
+        Yield None jika belum ada model yang berhasil di-load.
+        """
+        with self._lock:
+            version = self.active
+            if version is not None:
+                version.in_flight += 1
+        try:
+            yield version
+        finally:
+            if version is not None:
+                with self._lock:
+                    version.in_flight -= 1
+                    if version.retired and version.in_flight == 0:
+                        if version in self._draining:
+                            self._draining.remove(version)
+
+    # ------------------------------------------------------------------
+    # FILE WATCH
+    # ------------------------------------------------------------------
+
+    def _signature(self):
+        signature = []
+        for path in self.candidates():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def start_watcher(self, interval):
+        """
+        Polling folder model setiap `interval` detik. Reload dilakukan setelah
+        file tidak berubah selama satu interval (menghindari file setengah tertulis).
+        """
+        # Thread tidak ikut ter-fork: di worker hasil fork _watcher sudah mati
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        if interval <= 0:
+            return
+        self.watch_interval = interval
+        self._watch_stop.clear()
+
+        def watch():
+            seen = self._signature()
+            pending = None
+            while not self._watch_stop.wait(interval):
+                current = self._signature()
+                if current == seen:
+                    pending = None
+                    continue
+                if current != pending:
+                    pending = current
+                    continue
+                seen, pending = current, None
+                try:
+                    self.reload()
+                except ModelLoadError as e:
+                    logger.warning(
+                        f"⚠️ Reload model gagal, tetap memakai versi lama: {e}"
+                    )
+
+        self._watcher = threading.Thread(
+            target=watch, name="model-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watcher(self):
+        if self._watcher is not None:
+            self._watch_stop.set()
+            self._watcher.join()
+            self._watcher = None
+
+    def describe(self):
+        with self._lock:
+            active = self.active
+            return {
+                "active": active.describe() if active is not None else None,
+                "draining": [version.describe() for version in self._draining],
+                "swaps": self.swaps,
+                "model_dir": self.model_dir,
+                "pattern": self.pattern,
+                "target": self.target,
+                "last_reload": self.last_reload,
+                "last_error": self.last_error,
+                "watch_interval": self.watch_interval,
+            }
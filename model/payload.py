@@ -0,0 +1,241 @@
+import numpy as np
+
+# ============================================================================
+# COLUMNAR REQUEST PAYLOAD (MSGPACK / ARROW IPC)
+# ============================================================================
+# Alternatif JSON untuk histori panjang: transaksi dikirim per kolom
+#   date   : int32 little-endian, jumlah hari sejak 1970-01-01
+#   amount : float64 little-endian
+#   type   : uint8, 0 = EXPENSE, 1 = INCOME (opsional, default EXPENSE)
+# Kolom di-decode langsung ke NumPy (np.frombuffer / Arrow to_numpy) tanpa
+# membuat dict per transaksi.
+#
+# msgpack:  {"transactions": {"date": bin, "amount": bin, "type": bin},
+#            "mode": ..., "userId": ...}  (batch: "users": [{...}, ...])
+# Arrow IPC stream: satu tabel dengan kolom date (date32/int32), amount,
+#            type (uint8, string atau dictionary string); field lain di
+#            schema metadata. Nilai metadata Arrow selalu string, sehingga
+#            deadline_ms/horizon_days di-parse int() dan userId berbentuk
+#            bilangan bulat kanonik ("42") menjadi int seperti di JSON.
+# pyarrow bersifat opsional dan hanya di-import saat payload Arrow diterima.
+
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
+ARROW_MIMETYPES = ("application/vnd.apache.arrow.stream",)
+COLUMNAR_MIMETYPES = MSGPACK_MIMETYPES + ARROW_MIMETYPES
+
+TYPE_EXPENSE = 0
+TYPE_INCOME = 1
+TYPE_NAMES = {"EXPENSE": TYPE_EXPENSE, "INCOME": TYPE_INCOME}
+TYPE_INVALID = 255
+
+# Field schema metadata Arrow yang di JSON berupa integer
+INT_METADATA = ("deadline_ms", "horizon_days")
+
+
+class PayloadError(ValueError):
+    """Payload request tidak valid (format kolumnar, field horizon, dsb.)"""
+
+    def __init__(self, error, message, status=400):
+        super().__init__(message)
+        self.error = error
+        self.message = message
+        self.status = status
+
+
+class ColumnarTransactions:
+    """Transaksi dalam bentuk kolom NumPy (pengganti list dict {Date, Amount, Type})"""
+
+    __slots__ = ("days", "amounts", "types")
+
+    def __init__(self, days, amounts, types=None):
+        if len(days) != len(amounts) or (types is not None and len(types) != len(days)):
+            raise PayloadError(
+                "INVALID_PAYLOAD", "Panjang kolom date, amount dan type harus sama"
+            )
+        self.days = days
+        self.amounts = amounts
+        self.types = types
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def expenses(self):
+        """Return (dates datetime64[D], amounts float64) khusus EXPENSE"""
+        days, amounts = self.days, self.amounts
+        if self.types is not None:
+            mask = self.types == TYPE_EXPENSE
+            days, amounts = days[mask], amounts[mask]
+        return days.astype("datetime64[D]"), amounts.astype(np.float64, copy=False)
+
+    def normalized_bytes(self):
+        """Representasi kanonik (terurut) untuk cache key"""
+        types = self.types if self.types is not None else np.zeros(len(self), np.uint8)
+        order = np.lexsort((self.amounts, types, self.days))
+        return b"".join(
+            (
+                self.days.astype("<i4")[order].tobytes(),
+                self.amounts.astype("<f8")[order].tobytes(),
+                types.astype(np.uint8)[order].tobytes(),
+            )
+        )
+
+
+def _column(columns, name, dtype, required=True):
+    raw = columns.get(name)
+    if raw is None:
+        if required:
+            raise PayloadError("INVALID_PAYLOAD", f"Kolom '{name}' wajib ada")
+        return None
+    if len(raw) % np.dtype(dtype).itemsize:
+        raise PayloadError(
+            "INVALID_PAYLOAD", f"Panjang kolom '{name}' bukan kelipatan {dtype}"
+        )
+    return np.frombuffer(raw, dtype=dtype)
+
+
+def check_type_codes(types):
+    """Kolom type harus berisi TYPE_EXPENSE/TYPE_INCOME saja"""
+    if types is not None and np.any((types < TYPE_EXPENSE) | (types > TYPE_INCOME)):
+        raise PayloadError(
+            "INVALID_PAYLOAD",
+            f"Kolom 'type' hanya boleh {TYPE_EXPENSE} (EXPENSE) atau {TYPE_INCOME} (INCOME)",
+        )
+    return types
+
+
+def columns_to_transactions(columns):
+    """Dict kolom bytes (hasil msgpack) -> ColumnarTransactions (zero-copy)"""
+    if not isinstance(columns, dict):
+        raise PayloadError("INVALID_PAYLOAD", "Field 'transactions' harus berupa kolom")
+    return ColumnarTransactions(
+        _column(columns, "date", "<i4"),
+        _column(columns, "amount", "<f8"),
+        check_type_codes(_column(columns, "type", np.uint8, required=False)),
+    )
+
+
+def decode_msgpack(body):
+    try:
+        import msgpack
+    except ImportError:
+        raise PayloadError(
+            "UNSUPPORTED_MEDIA_TYPE", "Payload msgpack membutuhkan paket msgpack", 415
+        )
+
+    try:
+        req_data = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise PayloadError("INVALID_PAYLOAD", f"msgpack tidak valid: {e}")
+
+    if not isinstance(req_data, dict):
+        raise PayloadError("INVALID_PAYLOAD", "Root payload msgpack harus berupa map")
+
+    if "transactions" in req_data:
+        req_data["transactions"] = columns_to_transactions(req_data["transactions"])
+    for entry in req_data.get("users") or []:
+        if isinstance(entry, dict) and "transactions" in entry:
+            entry["transactions"] = columns_to_transactions(entry["transactions"])
+    return req_data
+
+
+def type_name_codes(names):
+    """Nama tipe (case-insensitive) -> kode uint8, nama lain -> TYPE_INVALID"""
+    upper = np.char.upper(np.asarray(names).astype(str))
+    codes = np.full(len(upper), TYPE_INVALID, dtype=np.uint8)
+    for name, code in TYPE_NAMES.items():
+        codes[upper == name] = code
+    return codes
+
+
+def arrow_types(column):
+    """
+    Kolom type Arrow -> kode uint8. Kolom dictionary divalidasi lewat
+    dictionary-nya (sekali per nama unik) lalu di-index; nilai null atau
+    selain EXPENSE/INCOME ditolak, bukan dianggap INCOME
+    """
+    import pyarrow as pa
+
+    array = column.combine_chunks()
+    if array.null_count:
+        raise PayloadError("INVALID_PAYLOAD", "Kolom 'type' tidak boleh berisi null")
+    if pa.types.is_dictionary(array.type):
+        lookup = type_name_codes(array.dictionary.to_numpy(zero_copy_only=False))
+        codes = lookup[array.indices.to_numpy(zero_copy_only=False)]
+    elif pa.types.is_string(array.type) or pa.types.is_large_string(array.type):
+        codes = type_name_codes(array.to_numpy(zero_copy_only=False))
+    elif pa.types.is_integer(array.type):
+        codes = check_type_codes(array.to_numpy(zero_copy_only=False))
+        return codes.astype(np.uint8, copy=False)
+    else:
+        raise PayloadError(
+            "INVALID_PAYLOAD", f"Tipe kolom 'type' {array.type} tidak didukung"
+        )
+
+    if np.any(codes == TYPE_INVALID):
+        raise PayloadError(
+            "INVALID_PAYLOAD", "Nilai kolom 'type' harus EXPENSE atau INCOME"
+        )
+    return codes
+
+
+def metadata_value(key, value):
+    """
+    Nilai schema metadata Arrow (selalu string) -> tipe yang sama dengan
+    field JSON. Nilai yang gagal di-parse dibiarkan string sehingga ditolak
+    validasi field masing-masing (INVALID_DEADLINE, INVALID_HORIZON)
+    """
+    if key in INT_METADATA or key == "userId":
+        try:
+            number = int(value)
+        except ValueError:
+            return value
+        # userId "007" tetap string: hanya bentuk kanonik yang sama dengan int JSON
+        if key != "userId" or str(number) == value:
+            return number
+    return value
+
+
+def decode_arrow(body):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise PayloadError(
+            "UNSUPPORTED_MEDIA_TYPE", "Payload Arrow membutuhkan paket pyarrow", 415
+        )
+
+    try:
+        table = pa.ipc.open_stream(body).read_all()
+    except Exception as e:
+        raise PayloadError("INVALID_PAYLOAD", f"Arrow IPC tidak valid: {e}")
+
+    if "date" not in table.column_names or "amount" not in table.column_names:
+        raise PayloadError("INVALID_PAYLOAD", "Kolom 'date' dan 'amount' wajib ada")
+
+    def to_numpy(name):
+        # Kolom primitif tanpa null di-view langsung tanpa copy oleh pyarrow
+        return table.column(name).combine_chunks().to_numpy(zero_copy_only=False)
+
+    days = to_numpy("date")
+    if days.dtype.kind == "M":
+        days = days.astype("datetime64[D]").astype(np.int64)
+    types = None
+    if "type" in table.column_names:
+        types = arrow_types(table.column("type"))
+
+    req_data = {
+        key.decode(): metadata_value(key.decode(), value.decode())
+        for key, value in (table.schema.metadata or {}).items()
+    }
+    req_data["transactions"] = ColumnarTransactions(days, to_numpy("amount"), types)
+    return req_data
+
+
+def decode_columnar(body, mimetype):
+    """Decode body request kolumnar sesuai Content-Type"""
+    if mimetype in MSGPACK_MIMETYPES:
+        return decode_msgpack(body)
+    if mimetype in ARROW_MIMETYPES:
+        return decode_arrow(body)
+    raise PayloadError(
+        "UNSUPPORTED_MEDIA_TYPE", f"Content-Type {mimetype} tidak didukung", 415
+    )
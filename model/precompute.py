@@ -0,0 +1,231 @@
+"""
+Precompute forecast ke forecast store (SQLite) agar /analyze-forecast
+cukup melakukan key lookup untuk user yang datanya belum berubah.
+
+    python precompute.py data/transactions/
+    python precompute.py data/transactions/ --store store/forecasts.sqlite3
+    python precompute.py part-*.parquet --watermark-col updated_at --workers 4
+
+Input sama dengan batch_score.py (partisi CSV/Parquet berisi semua transaksi
+user-user di dalamnya) ditambah kolom watermark: watermark user = nilai
+maksimum kolom tersebut (mis. sequence id atau updated_at ISO 8601). Client
+mengirim watermark yang sama ke /analyze-forecast bersama userId.
+
+Setiap user disimpan sebagai body response /analyze-forecast yang sudah
+di-encode (blok forecast, metrics, summary + metadata), dihitung lewat
+forecast_users_batch, dengan variant = --mode / --method / --horizon-days.
+User yang entry-nya sudah memiliki watermark dan model_id yang sama
+dilewati (--force menghitung ulang semuanya), sehingga job bisa dijalankan
+berulang dan hanya menghitung user yang datanya berubah.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import pandas as pd
+
+import batch_score
+from batch_score import (
+    _init_worker,
+    default_workers,
+    discover_partitions,
+    iter_users,
+    read_partition,
+)
+from forecast_store import ForecastStore, normalize_watermark, variant_key
+from response_encoder import encode_json
+
+DEFAULT_STORE = os.environ.get(
+    "FORECAST_STORE_PATH",
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "store", "forecasts.sqlite3"
+    ),
+)
+
+
+def user_watermarks(df, user_col, watermark_col):
+    """{userId: watermark} dari nilai maksimum kolom watermark per user"""
+    if watermark_col not in df.columns:
+        raise ValueError(f"Kolom watermark '{watermark_col}' tidak ada di partisi")
+    latest = df.groupby(user_col, sort=False)[watermark_col].max()
+    return {
+        user: normalize_watermark(value)
+        for user, value in latest.items()
+        if not pd.isna(value)
+    }
+
+
+def score_chunk(app, active, chunk, watermarks, options, horizon, variant):
+    """Forecast satu chunk user -> (baris store, jumlah user gagal)"""
+    results = app.forecast_users_batch(
+        active.booster,
+        chunk,
+        options["mode"],
+        options["method"],
+        active.metadata(),
+        horizon,
+    )
+    rows = []
+    failed = 0
+    for result in results:
+        user_id = result.pop("userId")
+        if "error" in result:
+            failed += 1
+            continue
+        rows.append(
+            (
+                user_id,
+                variant,
+                watermarks[user_id],
+                active.model_id,
+                encode_json(result),
+            )
+        )
+    return rows, failed
+
+
+def precompute_partition(task):
+    """Precompute satu partisi di worker; return ringkasan partisi"""
+    app = batch_score.forecast_app
+    partition_id, path, store_path, options = task
+    start = time.perf_counter()
+
+    df = read_partition(path, options["user_col"], [options["watermark_col"]])
+    watermarks = user_watermarks(df, options["user_col"], options["watermark_col"])
+    horizon = {}
+    if options["horizon_days"] is not None:
+        horizon["horizon_days"] = options["horizon_days"]
+    periods, bucket = app.request_horizon(horizon, options["mode"])
+    variant = variant_key(options["mode"], options["method"], periods, bucket)
+
+    store = ForecastStore(store_path, busy_timeout=60.0)
+    summary = {"users": 0, "computed": 0, "fresh": 0, "failed": 0, "no_watermark": 0}
+    with app.model_registry.acquire() as active:
+        if active is None:
+            raise RuntimeError("Model belum ter-load di worker")
+
+        stored = {}
+        if not options["force"]:
+            stored = store.stored_watermarks(watermarks, variant, active.model_id)
+
+        def flush(chunk):
+            rows, failed = score_chunk(
+                app, active, chunk, watermarks, options, horizon, variant
+            )
+            store.put_many(rows)
+            summary["computed"] += len(rows)
+            summary["failed"] += failed
+
+        chunk = []
+        for user, transactions in iter_users(df, options["user_col"]):
+            summary["users"] += 1
+            watermark = watermarks.get(user)
+            if watermark is None:
+                summary["no_watermark"] += 1
+                continue
+            if stored.get(str(user)) == watermark:
+                summary["fresh"] += 1
+                continue
+            chunk.append({"userId": user, "transactions": transactions})
+            if len(chunk) >= options["chunk_users"]:
+                flush(chunk)
+                chunk = []
+        if chunk:
+            flush(chunk)
+
+    summary.update(
+        {
+            "partition": partition_id,
+            "transactions": int(len(df)),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+    )
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute forecast store")
+    parser.add_argument("inputs", nargs="+", help="File/folder partisi CSV/Parquet")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="File SQLite store")
+    parser.add_argument("--user-col", default="userId")
+    parser.add_argument("--watermark-col", default="watermark")
+    parser.add_argument("--mode", default="weekly")
+    parser.add_argument("--method", default="static", choices=["static", "recursive"])
+    parser.add_argument("--horizon-days", type=int)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--nthread", type=int, default=1, help="Thread XGBoost/worker")
+    parser.add_argument("--chunk-users", type=int, default=512)
+    parser.add_argument("--max-partitions-per-worker", type=int, default=50)
+    parser.add_argument(
+        "--force", action="store_true", help="Hitung ulang user yang masih fresh"
+    )
+    args = parser.parse_args(argv)
+    if args.horizon_days is not None and not 1 <= args.horizon_days <= 730:
+        parser.error("--horizon-days harus 1-730")
+
+    options = {
+        "user_col": args.user_col,
+        "watermark_col": args.watermark_col,
+        "mode": args.mode,
+        "method": args.method,
+        "horizon_days": args.horizon_days,
+        "chunk_users": args.chunk_users,
+        "force": args.force,
+    }
+    store_path = os.path.abspath(args.store)
+    # Skema + mode WAL dibuat sekali sebelum worker menulis bersamaan
+    ForecastStore(store_path).initialize()
+
+    partitions = discover_partitions(args.inputs)
+    tasks = [
+        (partition_id, path, store_path, options) for partition_id, path in partitions
+    ]
+    print(f"{len(tasks)} partisi di-precompute dengan {args.workers} worker")
+    if not tasks:
+        return 0
+
+    start = time.perf_counter()
+    totals = {"users": 0, "computed": 0, "fresh": 0, "failed": 0, "no_watermark": 0}
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(
+        args.workers,
+        initializer=_init_worker,
+        initargs=(args.nthread,),
+        maxtasksperchild=args.max_partitions_per_worker,
+    ) as pool:
+        for i, summary in enumerate(
+            pool.imap_unordered(precompute_partition, tasks), 1
+        ):
+            for key in totals:
+                totals[key] += summary[key]
+            elapsed = time.perf_counter() - start
+            print(
+                f"[{i}/{len(tasks)}] {summary['partition']}: {summary['computed']}"
+                f" dihitung, {summary['fresh']} fresh dalam {summary['seconds']:.2f}s"
+                f" | total {totals['users']} user, {totals['users'] / elapsed:.1f} user/s"
+            )
+
+    elapsed = time.perf_counter() - start
+    print(
+        json.dumps(
+            {
+                "partitions": len(tasks),
+                **totals,
+                "seconds": round(elapsed, 3),
+                "users_per_second": (
+                    round(totals["users"] / elapsed, 2) if elapsed else None
+                ),
+                "store": store_path,
+            },
+            indent=2,
+        )
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# ============================================================================
+# IN-SAMPLE PREDICTION CACHE (PER USER, PER VERSI MODEL, PER HARI)
+# ============================================================================
+# Evaluasi hanya butuh prediksi window evaluasi (20% hari terakhir). Saat
+# user mengirim histori yang sama + beberapa hari baru, hampir semua hari
+# di window tersebut sudah pernah di-score. Cache menyimpan baris fitur dan
+# prediksi per hari (nomor hari datetime64[D]) untuk model_id tertentu.
+#
+# Prediksi satu hari hanya bergantung pada baris fiturnya, sehingga prediksi
+# lama dipakai ulang jika baris fitur hari itu identik (bitwise). Transaksi
+# susulan di hari lama, histori yang bergeser (trend) atau model lain
+# otomatis membuat hari tersebut di-score ulang.
+
+
+class PredictionCache:
+    """LRU per user dengan batas total bytes (baris fitur + prediksi)"""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # user -> (model_id, first_day, rows, preds)
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.rows_reused = 0
+        self.rows_scored = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def lookup(self, user, model_id, first_day, rows):
+        """
+        Prediksi cache untuk `rows` (hari first_day, first_day+1, ...).
+        Return (predictions float32, missing bool mask) - predictions hanya
+        valid pada posisi ~missing
+        """
+        predictions = np.empty(len(rows), dtype=np.float32)
+        missing = np.ones(len(rows), dtype=bool)
+
+        with self._lock:
+            entry = self._entries.get(user)
+            if entry is not None:
+                self._entries.move_to_end(user)
+        if entry is None or entry[0] != model_id:
+            return predictions, missing
+
+        _, cached_day, cached_rows, cached_preds = entry
+        start = max(first_day, cached_day)
+        stop = min(first_day + len(rows), cached_day + len(cached_rows))
+        if start < stop:
+            own = slice(start - first_day, stop - first_day)
+            cached = slice(start - cached_day, stop - cached_day)
+            same = np.all(rows[own] == cached_rows[cached], axis=1)
+            predictions[own][same] = cached_preds[cached][same]
+            missing[own] = ~same
+        return predictions, missing
+
+    def store(self, user, model_id, first_day, rows, predictions, reused=0):
+        rows = np.array(rows, dtype=np.float32)
+        predictions = np.array(predictions, dtype=np.float32)
+        size = rows.nbytes + predictions.nbytes
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self.rows_reused += reused
+            self.rows_scored += len(rows) - reused
+            if user in self._entries:
+                self._remove(user)
+            self._entries[user] = (model_id, first_day, rows, predictions)
+            self.total_bytes += size
+
+            while self.total_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, user=None):
+        """Hapus cache satu user, atau seluruh cache jika user None"""
+        with self._lock:
+            users = list(self._entries) if user is None else [user]
+            removed = 0
+            for key in users:
+                if key in self._entries:
+                    self._remove(key)
+                    removed += 1
+            self.invalidations += removed
+            return removed
+
+    def _remove(self, user):
+        _, _, rows, predictions = self._entries.pop(user)
+        self.total_bytes -= rows.nbytes + predictions.nbytes
+
+    def stats(self):
+        with self._lock:
+            total = self.rows_reused + self.rows_scored
+            return {
+                "users": len(self._entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "rows_reused": self.rows_reused,
+                "rows_scored": self.rows_scored,
+                "reuse_rate": round(self.rows_reused / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+class ScoringPlan:
+    """
+    Baris histori yang perlu di-score untuk satu user: `to_score` berisi
+    baris yang tidak ada di cache; complete() menggabungkan hasil predict
+    dengan prediksi cache lalu menyimpan semuanya kembali ke cache
+    """
+
+    def __init__(self, cache, user, model_id, first_day, rows):
+        self.cache = cache
+        self.user = user
+        self.model_id = model_id
+        self.first_day = first_day
+        self.rows = rows
+        if cache is None or user is None:
+            self.predictions, self.missing = None, None
+            self.to_score = rows
+        else:
+            self.predictions, self.missing = cache.lookup(
+                user, model_id, first_day, rows
+            )
+            self.to_score = rows[self.missing]
+
+    def complete(self, scored):
+        """Prediksi lengkap untuk semua baris plan (float32)"""
+        if self.predictions is None:
+            return scored
+        self.predictions[self.missing] = scored
+        self.cache.store(
+            self.user,
+            self.model_id,
+            self.first_day,
+            self.rows,
+            self.predictions,
+            reused=int(np.count_nonzero(~self.missing)),
+        )
+        return self.predictions
@@ -0,0 +1,52 @@
+import numpy as np
+
+# ============================================================================
+# METRIK REGRESI (NUMPY, TANPA SKLEARN)
+# ============================================================================
+# Import sklearn.metrics memakan ~1 detik saat startup (scipy.stats dsb.)
+# hanya untuk dua fungsi. Implementasi di bawah mengikuti jalur NumPy
+# sklearn (dtype float32 dipertahankan, shape (n, 1), force_finite) sehingga
+# nilainya sama persis dengan r2_score / mean_absolute_error.
+
+
+def _as_columns(y_true, y_pred):
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    dtype = np.result_type(y_true, y_pred)
+    if dtype.kind != "f":
+        dtype = np.float64
+    return (
+        y_true.astype(dtype, copy=False).reshape(-1, 1),
+        y_pred.astype(dtype, copy=False).reshape(-1, 1),
+    )
+
+
+def mean_absolute_error(y_true, y_pred):
+    y_true, y_pred = _as_columns(y_true, y_pred)
+    output_errors = np.average(np.abs(y_pred - y_true), axis=0)
+    return float(np.average(output_errors))
+
+
+def r2_score(y_true, y_pred):
+    """R² dengan force_finite=True: 1.0 jika prediksi sempurna, 0.0 jika y konstan"""
+    y_true, y_pred = _as_columns(y_true, y_pred)
+    if len(y_true) < 2:
+        return float("nan")
+
+    numerator = np.sum((y_true - y_pred) ** 2, axis=0)
+    denominator = np.sum((y_true - np.average(y_true, axis=0)) ** 2, axis=0)
+
+    scores = np.ones(1, dtype=numerator.dtype)
+    valid = (denominator != 0) & (numerator != 0)
+    scores[valid] = 1 - (numerator[valid] / denominator[valid])
+    scores[(numerator != 0) & (denominator == 0)] = 0.0
+    return float(np.average(scores))
+
+
+def root_mean_squared_error(y_true, y_pred):
+    return np.sqrt(np.mean((y_true - y_pred) ** 2))
+
+
+def mean_absolute_percentage_error(y_true, y_pred):
+    """MAPE dalam persen; +1e-8 mencegah pembagian dengan nol"""
+    return np.mean(np.abs((y_true - y_pred) / (y_true + 1e-8))) * 100
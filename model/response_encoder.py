@@ -0,0 +1,59 @@
+import json
+
+import numpy as np
+
+# ============================================================================
+# RESPONSE ENCODER (NUMPY -> JSON BYTES)
+# ============================================================================
+# Response forecast boleh berisi array NumPy (float64/int64) dan scalar
+# NumPy; orjson men-serialize-nya langsung tanpa walk rekursif atau
+# .tolist() per elemen. orjson bersifat opsional: tanpa orjson dipakai
+# json standar dengan hook `default` untuk tipe NumPy.
+# Key diurutkan seperti jsonify sehingga bentuk response tidak berubah.
+# Tanggal dikirim sebagai string: konversi dulu dengan date_strings()
+# (orjson memformat array datetime64 sebagai timestamp RFC 3339).
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - fallback tanpa orjson
+    orjson = None
+
+DAY_NAMES = np.array(
+    ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+)
+
+
+def date_strings(dates):
+    """datetime64 (kolom Date / array) -> list "YYYY-MM-DD" (vectorized)"""
+    days = np.asarray(dates).astype("datetime64[D]")
+    return np.datetime_as_string(days, unit="D").tolist()
+
+
+def day_names(dates):
+    """datetime64 -> list nama hari (sama dengan strftime("%A") locale C)"""
+    days = np.asarray(dates).astype("datetime64[D]").astype(np.int64)
+    return DAY_NAMES[(days + 3) % 7].tolist()  # 1970-01-01 = Kamis
+
+
+def _default(obj):
+    # Array non-contiguous (orjson hanya menerima C-contiguous) dan fallback json
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, "strftime"):  # pd.Timestamp / datetime
+        return obj.strftime("%Y-%m-%d")
+    raise TypeError(f"Tipe {type(obj).__name__} tidak bisa di-serialize ke JSON")
+
+
+def encode_json(obj):
+    """Serialize response (boleh berisi array/scalar NumPy) ke JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(
+            obj,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS,
+        )
+    return json.dumps(
+        obj, default=_default, sort_keys=True, separators=(",", ":")
+    ).encode()
@@ -0,0 +1,123 @@
+import numpy as np
+
+from feature_state import FeatureState
+from features import (
+    COL,
+    EMA_SPAN,
+    FEATURE_COLS,
+    LAG_PERIODS,
+    ROLLING_WINDOWS,
+    calendar_features,
+)
+
+# ============================================================================
+# FITUR FORECAST BANYAK SERIES HARIAN SEKALIGUS
+# ============================================================================
+# Beberapa series harian pada rentang tanggal yang sama (total + kategori,
+# expense + income, ...) disimpan sebagai matrix (series x hari). Aggregate
+# memakai satu np.bincount, dan baris fitur forecast semua series dibangun
+# sebagai satu tensor (series x periods x fitur) dengan nilai yang sama
+# persis dengan FeatureState per series.
+
+
+def aggregate_series(dates, amounts, codes, n_series, first_date, n_days):
+    """
+    Amount dan jumlah transaksi harian per series (codes = index series
+    setiap transaksi) dengan satu bincount. Return (amount, count), masing-
+    masing matrix (n_series x n_days) mulai first_date
+    """
+    # Index flat = series * n + hari
+    offsets = (dates - first_date).astype(np.int64)
+    flat = np.asarray(codes, dtype=np.int64) * n_days + offsets
+    size = n_series * n_days
+    amount = np.bincount(flat, weights=amounts, minlength=size)
+    count = np.bincount(flat, minlength=size).astype(np.float64)
+    return amount.reshape(n_series, n_days), count.reshape(n_series, n_days)
+
+
+def ema_tail(amounts, span=EMA_SPAN):
+    """
+    ewm(span, adjust=False) untuk setiap baris (series) sekaligus; loop
+    berjalan per hari, bukan per series. Return (ema_prev, ema_last)
+    dengan rekursi yang sama persis dengan features.ema
+    """
+    alpha = 2.0 / (span + 1.0)
+    old_wt = 1.0 - alpha
+    weighted = amounts[:, 0].astype(np.float64)
+    previous = weighted
+    for t in range(1, amounts.shape[1]):
+        cur = amounts[:, t]
+        previous = weighted
+        weighted = np.where(
+            weighted != cur,
+            (old_wt * weighted + alpha * cur) / (old_wt + alpha),
+            weighted,
+        )
+    return previous, weighted
+
+
+def rolling_tail(amounts, window):
+    """mean/std/min/max window terakhir setiap series (sama dengan rolling_features)"""
+    values = amounts[:, -window:]
+    nobs = values.shape[1]
+    mean = values.sum(axis=1) / nobs
+    rolling_min = values.min(axis=1)
+    rolling_max = values.max(axis=1)
+    deviations = values - mean[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = (deviations * deviations).sum(axis=1) / (nobs - 1)
+
+    constant = rolling_min == rolling_max
+    mean[constant] = rolling_min[constant]
+    if nobs > 1:
+        variance[constant] = 0.0
+    return mean, np.sqrt(variance), rolling_min, rolling_max
+
+
+def series_forecast_features(first_date, amounts, counts, periods):
+    """
+    Tensor fitur forecast static (series x periods x fitur) untuk banyak
+    series harian sekaligus, sama dengan FeatureState.forecast_features
+    per series. amounts/counts: matrix (series x hari)
+    """
+    n_series, n_days = amounts.shape
+    future_dates = np.datetime64(first_date, "D") + n_days + np.arange(periods)
+
+    calendar = np.empty((periods, len(FEATURE_COLS)), dtype=np.float32)
+    calendar_features(future_dates, calendar)
+    calendar[:, COL["trend"]] = n_days + np.arange(periods)
+    X = np.broadcast_to(calendar, (n_series, periods, len(FEATURE_COLS))).copy()
+
+    def fill(name, values):
+        X[:, :, COL[name]] = np.asarray(values, dtype=np.float32)[:, None]
+
+    for lag in LAG_PERIODS:
+        fill(f"lag_{lag}", amounts[:, -lag] if n_days >= lag else amounts[:, -1])
+
+    for window in ROLLING_WINDOWS:
+        mean, std, rolling_min, rolling_max = rolling_tail(amounts, window)
+        fill(f"rolling_mean_{window}", mean)
+        fill(f"rolling_std_{window}", np.nan_to_num(std))
+        fill(f"rolling_min_{window}", rolling_min)
+        fill(f"rolling_max_{window}", rolling_max)
+
+    fill("ema_7", ema_tail(amounts)[1])
+
+    # Transaction_Count - rata-rata 7 hari terakhir (float32 seperti FeatureState)
+    recent = counts[:, -7:].astype(np.float32)
+    fill("Transaction_Count", recent.sum(axis=1, dtype=np.float32) / recent.shape[1])
+    return future_dates, X
+
+
+def series_states(first_date, amounts, counts):
+    """FeatureState untuk setiap series (forecast rekursif), EMA dihitung bersama"""
+    ema_prev, ema_last = ema_tail(amounts)
+    return [
+        FeatureState.from_daily(
+            first_date,
+            amounts[i],
+            counts[i],
+            ema_values=np.array([ema_prev[i], ema_last[i]])[-amounts.shape[1] :],
+        )
+        for i in range(len(amounts))
+    ]
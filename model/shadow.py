@@ -0,0 +1,204 @@
+import logging
+import os
+import queue
+import random
+import threading
+
+import numpy as np
+
+from inference import predict_rows
+
+# ============================================================================
+# SHADOW EVALUATION (MODEL KANDIDAT DI LUAR JALUR REQUEST)
+# ============================================================================
+# Request /analyze-forecast menyerahkan baris fitur yang SUDAH dihitung
+# (window evaluasi + baris forecast static) beserta prediksi model aktif ke
+# antrian bounded. Worker thread di background men-score baris yang sama
+# dengan model kandidat (registry shadow) lalu mengakumulasi metrik
+# pembanding. Antrian penuh = job dibuang (dropped), submit tidak pernah
+# menunggu, sehingga latency response tidak berubah.
+#
+# Metrik disimpan sebagai jumlah (abs error, squared error, selisih
+# forecast) per pasangan model aktif + kandidat, dan di-reset setiap kali
+# salah satu model di-swap.
+
+logger = logging.getLogger("forecast")
+
+MIN_FORECAST = 10000  # Sama dengan clip forecast di API
+
+
+class ShadowEvaluator:
+    """Antrian bounded + worker thread daemon untuk men-score model kandidat"""
+
+    def __init__(self, registry, workers=1, max_queue=64, sample_rate=1.0):
+        self.registry = registry
+        self.workers = workers
+        self.sample_rate = sample_rate
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._threads = []
+        self._pid = None
+        self._reset_totals()
+        self.dropped = 0
+        self.errors = 0
+
+    def _reset_totals(self):
+        self.primary_id = None
+        self.candidate_id = None
+        self.submitted = 0
+        self.completed = 0
+        self.eval_rows = 0
+        self.forecast_rows = 0
+        self.sums = {
+            "primary_abs_error": 0.0,
+            "candidate_abs_error": 0.0,
+            "primary_sq_error": 0.0,
+            "candidate_sq_error": 0.0,
+            "forecast_abs_diff": 0.0,
+            "primary_forecast": 0.0,
+            "candidate_forecast": 0.0,
+        }
+
+    def reset(self, version=None):
+        """Mulai akumulasi baru (dipanggil saat model aktif/kandidat di-swap)"""
+        with self._lock:
+            self._reset_totals()
+
+    @property
+    def enabled(self):
+        return self.registry.active is not None
+
+    def _ensure_workers(self):
+        # Thread tidak ikut ter-fork (preload gunicorn): start ulang per proses
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._threads = [
+                threading.Thread(target=self._run, name=f"shadow-eval-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def submit(self, primary_id, X_eval, y_eval, primary_eval, future, forecast):
+        """
+        Serahkan satu request ke antrian tanpa menunggu. future/forecast
+        boleh None (forecast rekursif). Return True jika job masuk antrian
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            return False
+        self._ensure_workers()
+        job = (primary_id, X_eval, y_eval, primary_eval, future, forecast)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._evaluate(*job)
+            except Exception as e:
+                with self._lock:
+                    self.errors += 1
+                logger.warning(f"⚠️ Shadow evaluation gagal: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _evaluate(self, primary_id, X_eval, y_eval, primary_eval, future, forecast):
+        with self.registry.acquire() as candidate:
+            if candidate is None:
+                return
+            rows = X_eval if future is None else np.concatenate([X_eval, future])
+            predicted = predict_rows(candidate.booster, rows)
+            candidate_id = candidate.model_id
+
+        y_eval = np.asarray(y_eval, dtype=np.float64)
+        primary_error = np.asarray(primary_eval, dtype=np.float64) - y_eval
+        candidate_error = predicted[: len(X_eval)].astype(np.float64) - y_eval
+        if future is not None:
+            candidate_forecast = np.maximum(
+                predicted[len(X_eval) :].astype(np.float64), MIN_FORECAST
+            )
+            primary_forecast = np.asarray(forecast, dtype=np.float64)
+
+        with self._lock:
+            # Pasangan model berubah di tengah jalan: buang hasil campuran
+            if self.primary_id is None:
+                self.primary_id, self.candidate_id = primary_id, candidate_id
+            if (self.primary_id, self.candidate_id) != (primary_id, candidate_id):
+                return
+            self.completed += 1
+            self.eval_rows += len(y_eval)
+            self.sums["primary_abs_error"] += float(np.abs(primary_error).sum())
+            self.sums["candidate_abs_error"] += float(np.abs(candidate_error).sum())
+            self.sums["primary_sq_error"] += float((primary_error**2).sum())
+            self.sums["candidate_sq_error"] += float((candidate_error**2).sum())
+            if future is not None:
+                self.forecast_rows += len(primary_forecast)
+                self.sums["forecast_abs_diff"] += float(
+                    np.abs(candidate_forecast - primary_forecast).sum()
+                )
+                self.sums["primary_forecast"] += float(primary_forecast.sum())
+                self.sums["candidate_forecast"] += float(candidate_forecast.sum())
+
+    def stats(self):
+        candidate = self.registry.active
+        with self._lock:
+            sums = dict(self.sums)
+            eval_rows, forecast_rows = self.eval_rows, self.forecast_rows
+            result = {
+                "enabled": candidate is not None,
+                "candidate": candidate.version if candidate is not None else None,
+                "primary_model_id": self.primary_id,
+                "sample_rate": self.sample_rate,
+                "queue_depth": self._queue.qsize(),
+                "queue_max": self._queue.maxsize,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "eval_rows": eval_rows,
+                "forecast_rows": forecast_rows,
+            }
+
+        if eval_rows:
+            primary_mae = sums["primary_abs_error"] / eval_rows
+            candidate_mae = sums["candidate_abs_error"] / eval_rows
+            result.update(
+                {
+                    "primary_mae": round(primary_mae, 2),
+                    "candidate_mae": round(candidate_mae, 2),
+                    "primary_rmse": round(
+                        float(np.sqrt(sums["primary_sq_error"] / eval_rows)), 2
+                    ),
+                    "candidate_rmse": round(
+                        float(np.sqrt(sums["candidate_sq_error"] / eval_rows)), 2
+                    ),
+                    # < 0 = kandidat lebih akurat dari model aktif
+                    "mae_delta_pct": (
+                        round((candidate_mae - primary_mae) / primary_mae * 100, 2)
+                        if primary_mae
+                        else None
+                    ),
+                }
+            )
+        if forecast_rows:
+            result["forecast_mean_abs_diff"] = round(
+                sums["forecast_abs_diff"] / forecast_rows, 2
+            )
+            result["forecast_ratio"] = (
+                round(sums["candidate_forecast"] / sums["primary_forecast"], 4)
+                if sums["primary_forecast"]
+                else None
+            )
+        return result
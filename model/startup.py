@@ -0,0 +1,116 @@
+import importlib
+import importlib.abc
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# ============================================================================
+# COLD START: LEAN IMPORTS + STARTUP REPORT
+# ============================================================================
+# xgboost meng-import scikit-learn secara eager jika terpasang (hanya untuk
+# XGBRegressor & API sklearn lain), dan itu ~1 detik (scipy.stats dsb.).
+# Service hanya memakai Booster, sehingga pada mode lean sklearn disembunyikan
+# selama import xgboost. Efek sampingnya: xgboost mencatat "sklearn tidak
+# tersedia" untuk seluruh proses (XGBRegressor & API sklearn xgboost rusak),
+# dan ini bergantung pada detail internal xgboost. Karena itu mode lean
+# opt-in (FORECAST_LEAN_IMPORTS=true) dan hanya berlaku di proses server
+# (gunicorn / python app.py), tidak di tool offline yang meng-import app.
+#
+# STARTUP mencatat durasi setiap fase (import, load model) untuk report yang
+# dicetak saat start dan ditampilkan di /health.
+
+logger = logging.getLogger("forecast")
+
+LEAN_IMPORTS = os.environ.get("FORECAST_LEAN_IMPORTS", "false").lower() == "true"
+
+# Dependency opsional xgboost yang tidak dipakai request path
+XGBOOST_SKIPPED_MODULES = ("sklearn",)
+
+
+class StartupProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.finished = None
+        self.lean = False  # sklearn benar-benar disembunyikan saat import xgboost
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def import_module(self, name):
+        with self.phase(f"import {name}"):
+            return importlib.import_module(name)
+
+    def finish(self):
+        self.finished = time.perf_counter()
+        measured = sum(seconds for _, seconds in self.phases)
+        self.phases.append(("lainnya", self.finished - self.started - measured))
+
+    def report(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return {
+            "lean_imports": self.lean,
+            "total_seconds": round(end - self.started, 4),
+            "phases": {name: round(seconds, 4) for name, seconds in self.phases},
+        }
+
+    def log(self):
+        report = self.report()
+        logger.info(
+            f"⏱️  Startup {report['total_seconds'] * 1000:.0f} ms"
+            f" (lean imports: {'ON' if self.lean else 'OFF'})"
+        )
+        for name, seconds in self.phases:
+            logger.info(f"   {name:<28} {seconds * 1000:8.1f} ms")
+
+
+STARTUP = StartupProfile()
+
+
+class _SkipModules(importlib.abc.MetaPathFinder):
+    def __init__(self, names):
+        self.names = set(names)
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname.split(".")[0] in self.names:
+            raise ModuleNotFoundError(f"{fullname} dilewati (lean import)")
+        return None
+
+
+@contextmanager
+def skipped_modules(names):
+    """Selama blok ini, import modul `names` gagal seperti tidak terpasang"""
+    finder = _SkipModules(names)
+    sys.meta_path.insert(0, finder)
+    try:
+        yield
+    finally:
+        sys.meta_path.remove(finder)
+
+
+def is_server_process():
+    """gunicorn atau `python app.py`, bukan tool offline yang meng-import app"""
+    main_file = getattr(sys.modules.get("__main__"), "__file__", None) or ""
+    return "gunicorn" in sys.modules or os.path.basename(main_file) == "app.py"
+
+
+def import_xgboost():
+    """Import xgboost (sekali per proses); tanpa sklearn jika mode lean aktif"""
+    if "xgboost" in sys.modules:
+        return sys.modules["xgboost"]
+    if (
+        not LEAN_IMPORTS
+        or not is_server_process()
+        or any(m in sys.modules for m in XGBOOST_SKIPPED_MODULES)
+    ):
+        return STARTUP.import_module("xgboost")
+    STARTUP.lean = True
+    with skipped_modules(XGBOOST_SKIPPED_MODULES):
+        return STARTUP.import_module("xgboost")
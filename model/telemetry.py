@@ -0,0 +1,209 @@
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# ============================================================================
+# LATENCY INSTRUMENTATION (PROMETHEUS TEXT FORMAT)
+# ============================================================================
+# Histogram, counter dan gauge sederhana tanpa dependency tambahan.
+# Semua metrik dirender oleh render_metrics() untuk endpoint /metrics.
+
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    inner = ",".join(f'{key}="{value}"' for key, value in labels)
+    return "{" + inner + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple((name, str(labels.get(name, ""))) for name in self.labelnames)
+
+    def header(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        with self._lock:
+            items = sorted(
+                (key, (list(s[0]), s[1], s[2])) for key, s in self._values.items()
+            )
+
+        lines = self.header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                labels = key + (("le", _format_value(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(labels)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total!r}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+REGISTRY = []
+
+REQUEST_SECONDS = Histogram(
+    "forecast_request_duration_seconds",
+    "Latency request per route",
+    ["route"],
+)
+STAGE_SECONDS = Histogram(
+    "forecast_stage_duration_seconds",
+    "Latency setiap stage pipeline forecast",
+    ["route", "stage"],
+)
+REQUESTS_TOTAL = Counter(
+    "forecast_requests_total",
+    "Jumlah request per route dan status HTTP",
+    ["route", "status"],
+)
+IN_FLIGHT = Gauge(
+    "forecast_requests_in_flight",
+    "Jumlah request yang sedang diproses",
+    ["route"],
+)
+
+
+def stage(route, name):
+    """Context manager untuk mencatat durasi satu stage: with stage(route, "predict"):"""
+    return STAGE_SECONDS.time(route=route, stage=name)
+
+
+def _status_code(rv):
+    if isinstance(rv, tuple):
+        return rv[1] if len(rv) > 1 and isinstance(rv[1], int) else 200
+    return getattr(rv, "status_code", 200)
+
+
+def instrumented(route):
+    """Decorator view Flask: latency total, jumlah request per status, in-flight gauge"""
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            IN_FLIGHT.inc(route=route)
+            start = time.perf_counter()
+            status = 500
+            try:
+                rv = view(*args, **kwargs)
+                status = _status_code(rv)
+                return rv
+            finally:
+                IN_FLIGHT.dec(route=route)
+                REQUEST_SECONDS.observe(time.perf_counter() - start, route=route)
+                REQUESTS_TOTAL.inc(route=route, status=status)
+
+        return wrapper
+
+    return decorator
+
+
+def render_metrics(extra_gauges=None, extra_counters=None):
+    """
+    Render semua metrik dalam Prometheus text format.
+    extra_gauges: {nama: (dokumentasi, nilai)} untuk nilai yang dibaca saat scrape
+    extra_counters: sama, untuk nilai monoton sejak start (nama diakhiri _total)
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for kind, extra in (("gauge", extra_gauges), ("counter", extra_counters)):
+        for name, (documentation, value) in (extra or {}).items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,9 @@
+import os
+import sys
+
+MODEL_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, MODEL_ROOT)
+# app memuat model dari MODEL_DIR relatif; pytest bisa dijalankan dari folder mana pun
+os.environ.setdefault("FORECAST_MODEL_DIR", os.path.join(MODEL_ROOT, "models"))
+os.environ.setdefault("FORECAST_STORE_PATH", "")
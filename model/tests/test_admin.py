@@ -0,0 +1,73 @@
+import pytest
+
+import app
+from model_registry import ModelLoadError
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+def reload(client, token=None, **body):
+    headers = {"X-Admin-Token": token} if token is not None else {}
+    return client.post("/admin/reload-model", json=body, headers=headers)
+
+
+def test_reload_disabled_without_configured_token(client, monkeypatch):
+    monkeypatch.setattr(app, "ADMIN_TOKEN", None)
+    response = reload(client, token="")
+    assert response.status_code == 403
+    assert response.get_json()["error"] == "ADMIN_DISABLED"
+
+
+def test_reload_rejects_wrong_token(client, monkeypatch):
+    monkeypatch.setattr(app, "ADMIN_TOKEN", "secret")
+    assert reload(client).status_code == 401
+    assert reload(client, token="wrong").status_code == 401
+
+
+def test_reload_with_token_keeps_same_model(client, monkeypatch):
+    monkeypatch.setattr(app, "ADMIN_TOKEN", "secret")
+    active = app.model_registry.active
+    response = reload(client, token="secret")
+    assert response.status_code == 200
+    assert response.get_json()["swapped"] is False
+    assert app.model_registry.active is active
+
+
+def test_reload_rejects_model_outside_registry_pattern(client, monkeypatch):
+    monkeypatch.setattr(app, "ADMIN_TOKEN", "secret")
+    active = app.model_registry.active
+    response = reload(client, token="secret", model="xgboost_financial_forecast.model")
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "INVALID_MODEL_NAME"
+    assert app.model_registry.active is active
+
+
+def test_resolve_checks_pattern_before_path():
+    with pytest.raises(ModelLoadError) as excinfo:
+        app.model_registry.resolve("../models/xgboost_financial_forecast.model")
+    assert excinfo.value.error == "INVALID_MODEL_NAME"
+
+
+def test_reload_refused_with_multiple_workers(client, monkeypatch):
+    monkeypatch.setattr(app, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(app, "SERVER_WORKERS", 2)
+    response = reload(client, token="secret")
+    assert response.status_code == 409
+    assert response.get_json()["error"] == "RELOAD_NOT_BROADCAST"
+
+
+def test_cache_invalidate_requires_admin_token(client, monkeypatch):
+    monkeypatch.setattr(app, "ADMIN_TOKEN", None)
+    response = client.post("/cache/invalidate", json={})
+    assert response.status_code == 403
+    assert response.get_json()["error"] == "ADMIN_DISABLED"
+
+    monkeypatch.setattr(app, "ADMIN_TOKEN", "secret")
+    assert client.post("/cache/invalidate", json={}).status_code == 401
+    response = client.post(
+        "/cache/invalidate", json={"userId": 1}, headers={"X-Admin-Token": "secret"}
+    )
+    assert response.status_code == 200
@@ -0,0 +1,140 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+from admission import AdmissionController, Overloaded
+
+
+def expense_history(days=30, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"Date": str(date.date()), "Amount": float(rng.integers(5000, 200000))}
+        for date in pd.date_range("2024-01-01", periods=days)
+    ]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, "CACHE_ENABLED", True)
+    app.forecast_cache.invalidate()
+    yield app.app.test_client()
+    app.forecast_cache.invalidate()
+
+
+def test_cache_hit_skips_admission_within_probe_budget(client):
+    body = {"transactions": expense_history()}
+    assert client.post("/analyze-forecast", json=body).status_code == 200
+
+    admitted = app.admission.admitted
+    response = client.post("/analyze-forecast", json=body)
+    assert response.headers.get("X-Forecast-Cache") == "HIT"
+    assert app.admission.admitted == admitted
+
+
+@pytest.mark.parametrize(
+    "setting, value", [("PROBE_MAX_BYTES", 16), ("PROBE_CONCURRENCY", 0)]
+)
+def test_probe_outside_budget_runs_after_admission(client, monkeypatch, setting, value):
+    body = {"transactions": expense_history(seed=1)}
+    assert client.post("/analyze-forecast", json=body).status_code == 200
+
+    monkeypatch.setattr(app, setting, value)
+    admitted = app.admission.admitted
+    response = client.post("/analyze-forecast", json=body)
+    assert response.headers.get("X-Forecast-Cache") == "HIT"
+    assert app.admission.admitted == admitted + 1
+
+
+def test_probe_budget_exhausted_runs_after_admission(client):
+    body = {"transactions": expense_history(seed=2)}
+    assert client.post("/analyze-forecast", json=body).status_code == 200
+
+    held = [
+        app.probe_slots.acquire(blocking=False) for _ in range(app.PROBE_CONCURRENCY)
+    ]
+    try:
+        admitted = app.admission.admitted
+        response = client.post("/analyze-forecast", json=body)
+    finally:
+        for _ in filter(None, held):
+            app.probe_slots.release()
+    assert response.headers.get("X-Forecast-Cache") == "HIT"
+    assert app.admission.admitted == admitted + 1
+
+
+class Queued:
+    """Thread yang antri di controller dan mencatat hasilnya"""
+
+    def __init__(self, controller, name, cost, log):
+        self.outcome = None
+        queued = controller.queued
+
+        def run():
+            try:
+                with controller.acquire(cost):
+                    log.append(name)
+                self.outcome = "admitted"
+            except Overloaded as e:
+                self.outcome = e.status
+
+        self.thread = threading.Thread(target=run)
+        self.thread.start()
+        deadline = time.monotonic() + 5
+        while (
+            controller.queued == queued
+            and self.outcome is None
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.001)
+
+
+def test_queue_admits_cheapest_first_then_fifo():
+    controller = AdmissionController(max_concurrent=1, max_queue=10)
+    log = []
+    slot = controller.acquire()
+    waiters = [
+        Queued(controller, name, cost, log)
+        for name, cost in [("a", 5), ("b", 1), ("c", 3), ("d", 1)]
+    ]
+    slot.__exit__(None, None, None)
+    for waiter in waiters:
+        waiter.thread.join(timeout=5)
+    assert log == ["b", "d", "c", "a"]
+    assert controller.stats()["active"] == 0
+
+
+def test_full_queue_evicts_most_expensive_waiter():
+    controller = AdmissionController(max_concurrent=1, max_queue=2)
+    log = []
+    slot = controller.acquire()
+    expensive = Queued(controller, "expensive", 5, log)
+    middle = Queued(controller, "middle", 3, log)
+
+    cheap = Queued(controller, "cheap", 1, log)
+    expensive.thread.join(timeout=5)
+    assert expensive.outcome == 429
+
+    # Tidak lebih murah dari waiter termahal: ditolak langsung
+    with pytest.raises(Overloaded) as excinfo:
+        controller.acquire(3)
+    assert excinfo.value.status == 429
+
+    slot.__exit__(None, None, None)
+    for waiter in (middle, cheap):
+        waiter.thread.join(timeout=5)
+    assert log == ["cheap", "middle"]
+    assert controller.stats()["evicted"] == 1
+
+
+def test_waiting_too_long_is_rejected_with_retry_after():
+    controller = AdmissionController(max_concurrent=1, max_wait=0.05)
+    with controller.acquire():
+        with pytest.raises(Overloaded) as excinfo:
+            controller.acquire()
+    assert excinfo.value.status == 503
+    assert excinfo.value.retry_after >= 1
+    assert controller.stats()["queue_depth"] == 0
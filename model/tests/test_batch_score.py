@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_score import iter_users
+
+
+def partition(user_ids, amounts):
+    return pd.DataFrame(
+        {
+            "userId": user_ids,
+            "Date": pd.date_range("2024-01-01", periods=len(user_ids)).astype(str),
+            "Amount": amounts,
+            "Type": "EXPENSE",
+        }
+    )
+
+
+def grouped(df):
+    return {
+        user: transactions.amounts.tolist()
+        for user, transactions in iter_users(df, "userId")
+    }
+
+
+def test_groups_each_user_with_own_transactions():
+    df = partition([2, 1, 2, 3, 1], [20.0, 10.0, 21.0, 30.0, 11.0])
+    assert grouped(df) == {1: [10.0, 11.0], 2: [20.0, 21.0], 3: [30.0]}
+
+
+@pytest.mark.parametrize("missing", [None, np.nan])
+def test_rows_without_user_id_are_dropped(missing):
+    df = partition([1, 1, missing, 2, 2], [10.0, 11.0, 999.0, 20.0, 21.0])
+    assert grouped(df) == {1: [10.0, 11.0], 2: [20.0, 21.0]}
+
+
+def test_partition_without_any_user_id():
+    df = partition([None, None], [1.0, 2.0])
+    assert grouped(df) == {}
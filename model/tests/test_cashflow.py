@@ -0,0 +1,108 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+import app
+from feature_state import FeatureState, forecast_recursive
+from model_registry import ModelLoadError, ModelRegistry
+
+
+def rows(type_, start, days, seed):
+    rng = np.random.default_rng(seed)
+    return [
+        {
+            "Date": str(date.date()),
+            "Amount": float(rng.integers(5000, 200000)),
+            "Type": type_,
+        }
+        for date in pd.date_range(start, periods=days)
+    ]
+
+
+@pytest.fixture
+def tagged_income(tmp_path, monkeypatch):
+    path = os.path.join(app.MODEL_DIR, "xgboost_financial_forecast.model")
+    booster = xgb.Booster()
+    with open(path, "rb") as f:
+        booster.load_model(bytearray(f.read()))
+    booster.set_attr(target="income")
+    (tmp_path / "xgboost_income_forecast.model").write_bytes(booster.save_raw("ubj"))
+
+    registry = ModelRegistry(
+        str(tmp_path), pattern="xgboost_income_forecast*.model", target="income"
+    )
+    registry.reload()
+    monkeypatch.setattr(app, "income_registry", registry)
+    monkeypatch.setattr(app, "CACHE_ENABLED", False)
+    return registry.active.booster
+
+
+def test_untagged_model_is_not_loaded_as_income_model():
+    registry = ModelRegistry(
+        app.MODEL_DIR, pattern="xgboost_financial_forecast*.model", target="income"
+    )
+    with pytest.raises(ModelLoadError) as excinfo:
+        registry.reload()
+    assert excinfo.value.error == "MODEL_TARGET_MISMATCH"
+    assert registry.active is None
+
+
+def test_cashflow_not_implemented_without_income_model(monkeypatch):
+    registry = ModelRegistry(
+        app.MODEL_DIR, pattern="xgboost_income_forecast*.model", target="income"
+    )
+    monkeypatch.setattr(app, "income_registry", registry)
+    body = {"transactions": rows("EXPENSE", "2024-01-01", 10, 0)}
+    response = app.app.test_client().post("/analyze-forecast/cashflow", json=body)
+    assert response.status_code == 501
+    assert response.get_json()["error"] == "INCOME_MODEL_NOT_AVAILABLE"
+
+
+@pytest.mark.parametrize("method", ["static", "recursive"])
+def test_each_series_uses_its_own_date_range(tagged_income, method):
+    # Expense 2024-01-03..02-11, income 2024-01-01..02-14: selisih 3 hari
+    expense = rows("EXPENSE", "2024-01-03", 40, 1)
+    income = rows("INCOME", "2024-01-01", 45, 2)
+    gap, periods = 3, 10
+    client = app.app.test_client()
+
+    cashflow = client.post(
+        "/analyze-forecast/cashflow",
+        json={
+            "transactions": expense + income,
+            "forecast_method": method,
+            "horizon_days": periods,
+        },
+    ).get_json()
+    forecast = cashflow["forecast"]
+    assert forecast[0]["date"] == "2024-02-15"
+    assert len(forecast) == periods
+    assert cashflow["metadata"]["data_points_used"] == 40
+    assert cashflow["metadata"]["income_data_points_used"] == 45
+
+    # Expense = /analyze-forecast ber-horizon gap + periods, tanpa `gap` hari pertama
+    reference = client.post(
+        "/analyze-forecast",
+        json={
+            "transactions": expense,
+            "forecast_method": method,
+            "horizon_days": gap + periods,
+        },
+    ).get_json()["forecast"][gap:]
+    assert [f["date"] for f in forecast] == [f["date"] for f in reference]
+    assert [f["predicted_expense"] for f in forecast] == [
+        f["predicted_expense"] for f in reference
+    ]
+
+    # Income = series income saja, tanpa hari kosong sebelum expense dimulai
+    state = FeatureState.from_transactions([dict(t, Type="EXPENSE") for t in income])
+    if method == "recursive":
+        income_pred = forecast_recursive(tagged_income, [state], periods, 0)[1][0]
+    else:
+        X = state.forecast_features(periods)[1]
+        income_pred = np.maximum(app.predict_rows(tagged_income, X), 0)
+    expected = np.rint(np.asarray(income_pred, dtype=np.float64)).astype(int)
+    assert [f["predicted_income"] for f in forecast] == expected.tolist()
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, "CACHE_ENABLED", False)
+    return app.app.test_client()
+
+
+@pytest.mark.parametrize("forecast_method", ["static", "recursive"])
+def test_category_totals_match_summary(client, forecast_method):
+    rng = np.random.default_rng(7)
+    start = np.datetime64("2024-01-01")
+    transactions = [
+        {
+            "Date": str(start + int(rng.integers(0, 200))),
+            "Amount": float(rng.integers(1000, 300000)),
+            "Type": "EXPENSE",
+            "Category": f"cat{rng.integers(0, 6)}",
+        }
+        for _ in range(400)
+    ]
+    response = client.post(
+        "/analyze-forecast/categories",
+        json={
+            "transactions": transactions,
+            "forecast_method": forecast_method,
+            "horizon_days": 30,
+        },
+    ).get_json()
+
+    daily = [f["predicted_expense"] for f in response["forecast"]]
+    category_totals = [c["total_forecast"] for c in response["categories"]]
+    assert response["summary"]["total_forecast"] == sum(daily)
+    assert sum(category_totals) == sum(daily)
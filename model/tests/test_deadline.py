@@ -0,0 +1,103 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+from deadline import (
+    CostEstimator,
+    Deadline,
+    baseline_forecast,
+    resolve_baseline,
+)
+from features import COL, FEATURE_COLS
+
+
+def expenses(days, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"Date": str(date.date()), "Amount": float(rng.integers(5000, 200000))}
+        for date in pd.date_range("2024-01-01", periods=days)
+    ]
+
+
+def test_seasonal_naive_repeats_last_week_with_minimum():
+    amounts = np.arange(1, 11, dtype=np.float64) * 10000
+    amounts[-1] = 500
+    X = np.zeros((10, len(FEATURE_COLS)), dtype=np.float32)
+    forecast = baseline_forecast(X, amounts, 9, "seasonal_naive")
+    expected = np.r_[amounts[-7:], amounts[-7:-5]]
+    np.testing.assert_array_equal(forecast, np.maximum(expected, 10000))
+
+
+def test_ema_baseline_and_short_history():
+    X = np.zeros((5, len(FEATURE_COLS)), dtype=np.float32)
+    X[-1, COL["ema_7"]] = 42000
+    assert resolve_baseline("seasonal_naive", 7) == "ema_7"
+    assert resolve_baseline("seasonal_naive", 8) == "seasonal_naive"
+    np.testing.assert_array_equal(baseline_forecast(X, None, 3, "ema_7"), [42000.0] * 3)
+
+
+def test_deadline_and_cost_estimator():
+    deadline = Deadline(100, start=0.0)
+    assert not deadline.allows(0.0)  # start jauh di masa lalu: budget habis
+
+    costs = CostEstimator(alpha=0.5)
+    assert costs.estimate("predict", 100) == 0.0
+    costs.observe("predict", 10, 1.0)
+    costs.observe("predict", 10, 3.0)
+    assert costs.estimate("predict", 100) == pytest.approx(20.0)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, "CACHE_ENABLED", False)
+    monkeypatch.setattr(app, "stage_costs", CostEstimator())
+    return app.app.test_client()
+
+
+def forecast(client, **body):
+    return client.post(
+        "/analyze-forecast", json={"transactions": expenses(60), **body}
+    ).get_json()
+
+
+def test_expensive_predict_falls_back_before_model(client):
+    app.stage_costs.observe("predict", 1, 3600.0)
+    response = forecast(client, deadline_ms=1000, horizon_days=10)
+
+    metadata = response["metadata"]
+    assert metadata["forecast_source"] == "baseline"
+    assert metadata["fallback"]["stage"] == "prepare_input_data"
+    assert metadata["fallback"]["metrics_source"] == "baseline"
+    amounts = [t["Amount"] for t in expenses(60)]
+    expected = np.rint(np.r_[amounts[-7:], amounts[-7:-4]]).astype(int).tolist()
+    assert [f["predicted_expense"] for f in response["forecast"]] == expected
+
+
+def test_expensive_recursion_keeps_model_metrics(client, monkeypatch):
+    # Recursive 10 hari ~0.5 detik muat di awal request, tapi predict histori
+    # yang lambat (0.6 detik) menghabiskan sisa budget sebelum stage forecast
+    app.stage_costs.observe("recursive", 1, 0.05)
+    predict = app.micro_batcher.predict
+
+    def slow_predict(*args):
+        time.sleep(0.6)
+        return predict(*args)
+
+    monkeypatch.setattr(app.micro_batcher, "predict", slow_predict)
+    body = {"forecast_method": "recursive", "horizon_days": 10}
+    fallback = forecast(client, deadline_ms=1000, **body)
+    model = forecast(client, **body)
+
+    assert fallback["metadata"]["fallback"]["stage"] == "forecast"
+    assert fallback["metadata"]["fallback"]["metrics_source"] == "model"
+    assert fallback["metrics"] == model["metrics"]
+    assert "fallback" not in model["metadata"]
+
+
+def test_generous_deadline_uses_model(client):
+    app.stage_costs.observe("predict", 1, 1e-6)
+    response = forecast(client, deadline_ms=60000)
+    assert "fallback" not in response["metadata"]
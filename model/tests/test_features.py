@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+from features import FEATURE_COLS
+
+# ============================================================================
+# EKUIVALENSI prepare_input_arrays (NUMPY) vs prepare_input_data (PANDAS)
+# ============================================================================
+# Toleransi per kolom (lihat features.py):
+#   kalender, Transaction_Count, trend   identik
+#   y, lag, rolling mean/min/max, ema_7  <= 1 ulp float32 (urutan penjumlahan)
+#   rolling_std_*                        <= 1 ulp dari std exact per window;
+#                                        terhadap pandas (std online) rtol
+#                                        STD_PANDAS_RTOL untuk data di sini,
+#                                        tanpa window ber-variance kecil
+#                                        setelah nilai besar
+
+EXACT_COLS = [
+    "Transaction_Count",
+    "day",
+    "month",
+    "year",
+    "dayofweek",
+    "dayofyear",
+    "weekofyear",
+    "is_weekend",
+    "is_month_start",
+    "is_month_end",
+    "trend",
+]
+STD_COLS = [f"rolling_std_{window}" for window in app.ROLLING_WINDOWS]
+AMOUNT_COLS = [col for col in FEATURE_COLS if col not in EXACT_COLS + STD_COLS]
+FLOAT32_ULP = np.finfo(np.float32).eps
+STD_PANDAS_RTOL = 1e-6
+
+
+def make_history(
+    seed,
+    days,
+    per_day=3,
+    gap_rate=0.0,
+    fractional=False,
+    income_rate=0.2,
+    start="2023-01-01",
+):
+    rng = np.random.default_rng(seed)
+    transactions = []
+    for date in pd.date_range(start, periods=days):
+        if gap_rate and rng.random() < gap_rate:
+            continue
+        for _ in range(rng.integers(1, per_day + 1)):
+            amount = rng.uniform(1e3, 5e5)
+            transactions.append(
+                {
+                    "Date": str(date.date()),
+                    "Amount": float(round(amount, 2) if fractional else round(amount)),
+                    "Type": "INCOME" if rng.random() < income_rate else "EXPENSE",
+                }
+            )
+    return transactions
+
+
+def daily_expense(transactions):
+    """Amount harian float64 (0 untuk hari kosong) sebagai referensi exact"""
+    df = pd.DataFrame(transactions)
+    if "Type" in df.columns:
+        df = df[df["Type"].str.upper() == "EXPENSE"]
+    daily = df.groupby(pd.to_datetime(df["Date"]))["Amount"].sum()
+    if daily.empty:
+        return np.zeros(len(pd.date_range("2025-06-30", "2025-12-30")))
+    days = pd.date_range(daily.index.min(), daily.index.max(), freq="D")
+    return daily.reindex(days, fill_value=0.0).to_numpy(dtype=np.float64)
+
+
+def exact_rolling_std(daily, window):
+    """std(ddof=1) per window dihitung ulang satu per satu, baris 0 di-bfill"""
+    std = np.full(len(daily), np.nan)
+    for i in range(1, len(daily)):
+        std[i] = np.std(daily[max(0, i - window + 1) : i + 1], ddof=1)
+    if len(daily) > 1:
+        std[0] = std[1]
+    return std
+
+
+def assert_close(actual, expected, rtol, atol=0.0):
+    actual = np.asarray(actual, dtype=np.float64)
+    expected = np.asarray(expected, dtype=np.float64)
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    finite = ~np.isnan(expected)
+    np.testing.assert_allclose(actual[finite], expected[finite], rtol=rtol, atol=atol)
+
+
+def assert_equivalent(transactions):
+    reference_df, reference_X, _, reference_y = app.prepare_input_data(transactions)
+    daily_df, X, feature_cols, y = app.prepare_input_arrays(transactions)
+    reference = reference_X.to_numpy(dtype=np.float32)
+
+    assert feature_cols == list(FEATURE_COLS)
+    assert X.dtype == np.float32
+    assert X.shape == reference.shape
+    np.testing.assert_array_equal(
+        daily_df["Date"].to_numpy(), reference_df["Date"].to_numpy()
+    )
+    assert_close(y, reference_y.astype(np.float32), rtol=FLOAT32_ULP)
+
+    for col in EXACT_COLS:
+        i = FEATURE_COLS.index(col)
+        np.testing.assert_array_equal(X[:, i], reference[:, i], err_msg=col)
+    for col in AMOUNT_COLS:
+        i = FEATURE_COLS.index(col)
+        assert_close(X[:, i], reference[:, i], rtol=FLOAT32_ULP)
+
+    daily = daily_expense(transactions)
+    scale = max(float(np.abs(daily).max()), 1.0)
+    for window, col in zip(app.ROLLING_WINDOWS, STD_COLS):
+        i = FEATURE_COLS.index(col)
+        # atol: residu float64 mean window (mis. 0.1 + 0.1 + 0.1) bukan 0
+        assert_close(
+            X[:, i],
+            exact_rolling_std(daily, window),
+            rtol=FLOAT32_ULP,
+            atol=1e-12 * scale,
+        )
+        assert_close(X[:, i], reference[:, i], rtol=STD_PANDAS_RTOL)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_histories_with_gaps(seed):
+    rng = np.random.default_rng(1000 + seed)
+    assert_equivalent(
+        make_history(
+            seed,
+            days=int(rng.integers(2, 400)),
+            gap_rate=float(rng.uniform(0, 0.6)),
+            fractional=bool(seed % 2),
+        )
+    )
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_same_day_duplicates(seed):
+    assert_equivalent(make_history(seed, days=30, per_day=12, income_rate=0.0))
+
+
+@pytest.mark.parametrize("per_day", [1, 7])
+def test_single_day_user(per_day):
+    assert_equivalent(make_history(per_day, days=1, per_day=per_day, income_rate=0.0))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_fractional_amounts(seed):
+    assert_equivalent(make_history(seed, days=200, fractional=True, gap_rate=0.2))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_long_histories(seed):
+    assert_equivalent(
+        make_history(
+            seed,
+            days=40 * 365,
+            per_day=2,
+            gap_rate=0.1,
+            fractional=True,
+            start="1985-01-01",
+        )
+    )
+
+
+def test_income_only():
+    transactions = make_history(0, days=20, income_rate=1.0)
+    assert all(t["Type"] == "INCOME" for t in transactions)
+    assert_equivalent(transactions)
+
+
+def test_without_type_column():
+    transactions = make_history(1, days=40, gap_rate=0.3)
+    for t in transactions:
+        del t["Type"]
+    assert_equivalent(transactions)
+
+
+def expense_days(amounts):
+    return [
+        {"Date": str(date.date()), "Amount": amount, "Type": "EXPENSE"}
+        for date, amount in zip(
+            pd.date_range("2024-01-01", periods=len(amounts)), amounts
+        )
+    ]
+
+
+def test_small_window_std_matches_pandas():
+    transactions = expense_days([2.0, 0.0, 0.0])
+    _, reference_X, _, _ = app.prepare_input_data(transactions)
+    _, X, _, _ = app.prepare_input_arrays(transactions)
+    std_3 = X[:, FEATURE_COLS.index("rolling_std_3")]
+    np.testing.assert_array_equal(std_3, reference_X["rolling_std_3"].to_numpy())
+    np.testing.assert_allclose(std_3[-1], 1.1547005, rtol=FLOAT32_ULP)
+
+
+@pytest.mark.parametrize("large", [5e5, 3e11])
+def test_std_follows_exact_window_after_large_values(large):
+    """
+    Setelah nilai besar keluar window, std pandas (online) menyimpang;
+    features.py tetap mengikuti std exact per window
+    """
+    transactions = expense_days([large, 1.0, large / 2, 0.0, 0.0, 2.0, 0.0, 0.0])
+    _, X, _, _ = app.prepare_input_arrays(transactions)
+    std_3 = X[:, FEATURE_COLS.index("rolling_std_3")]
+    exact = exact_rolling_std(daily_expense(transactions), 3)
+    np.testing.assert_allclose(std_3[-3:], exact[-3:], rtol=FLOAT32_ULP)
+    np.testing.assert_allclose(std_3[-3:], 1.1547005, rtol=FLOAT32_ULP)
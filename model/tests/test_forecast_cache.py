@@ -0,0 +1,87 @@
+import numpy as np
+
+import forecast_cache
+from forecast_cache import ForecastCache, make_cache_key
+from payload import ColumnarTransactions
+
+TRANSACTIONS = [
+    {"Date": "2024-01-02", "Amount": 20000, "Type": "EXPENSE"},
+    {"Date": "2024-01-01", "Amount": 10000.0, "Type": "expense"},
+    {"Date": "2024-01-01", "Amount": 5000, "Type": "INCOME"},
+]
+
+
+def test_key_ignores_order_and_formatting():
+    reordered = [
+        {"Type": "income", "Amount": 5000.0, "Date": "2024-01-01"},
+        {"Date": "2024-01-02", "Amount": 20000.0, "Type": "expense"},
+        {"Date": "2024-01-01", "Amount": 10000, "Type": "EXPENSE"},
+    ]
+    assert make_cache_key(TRANSACTIONS, "m1", mode="weekly") == make_cache_key(
+        reordered, "m1", mode="weekly"
+    )
+
+
+def test_key_changes_with_data_model_and_options():
+    key = make_cache_key(TRANSACTIONS, "m1", mode="weekly")
+    added = TRANSACTIONS + [{"Date": "2024-01-03", "Amount": 1, "Type": "EXPENSE"}]
+    assert make_cache_key(added, "m1", mode="weekly") != key
+    assert make_cache_key(TRANSACTIONS, "m2", mode="weekly") != key
+    assert make_cache_key(TRANSACTIONS, "m1", mode="daily") != key
+
+
+def test_columnar_key_ignores_row_order():
+    days = np.array([19724, 19723, 19723], dtype=np.int32)
+    amounts = np.array([20000.0, 10000.0, 5000.0])
+    types = np.array([0, 0, 1], dtype=np.uint8)
+    order = np.array([2, 0, 1])
+    key = make_cache_key(ColumnarTransactions(days, amounts, types), "m1")
+    shuffled = ColumnarTransactions(days[order], amounts[order], types[order])
+    assert make_cache_key(shuffled, "m1") == key
+    assert make_cache_key(TRANSACTIONS, "m1") != key
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ForecastCache(max_entries=2)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1" and cache.get("c") == b"3"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_limit_evicts_and_skips_oversized_bodies():
+    cache = ForecastCache(max_bytes=10)
+    cache.put("a", b"x" * 6)
+    cache.put("b", b"y" * 6)
+    assert cache.get("a") is None
+    assert cache.total_bytes == 6
+
+    cache.put("big", b"z" * 11)
+    assert cache.get("big") is None
+    assert cache.get("b") == b"y" * 6
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(forecast_cache.time, "monotonic", lambda: now[0])
+    cache = ForecastCache(ttl_seconds=5)
+    cache.put("a", b"1")
+    now[0] += 4.9
+    assert cache.get("a") == b"1"
+    now[0] += 0.1
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.total_bytes == 0
+
+
+def test_invalidate_by_tag():
+    cache = ForecastCache()
+    cache.put("a", b"1", tag=1)
+    cache.put("b", b"2", tag=2)
+    assert cache.invalidate(1) == 1
+    assert cache.get("a") is None and cache.get("b") == b"2"
+    assert cache.invalidate() == 1
+    assert cache.stats()["entries"] == 0
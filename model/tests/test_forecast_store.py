@@ -0,0 +1,92 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+from forecast_store import ForecastStore, normalize_watermark, variant_key
+from payload import PayloadError
+
+VARIANT = variant_key("weekly", "static", 4, None)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ForecastStore(str(tmp_path / "forecasts.sqlite3")).initialize()
+
+
+def test_entry_served_only_for_same_watermark_and_model(store):
+    store.put(1, VARIANT, "w1", "m1", b"body")
+    assert store.get(1, VARIANT, "w1", "m1") == b"body"
+    assert store.get(1, VARIANT, "w2", "m1") is None
+    assert store.get(1, VARIANT, "w1", "m2") is None
+    assert store.get(2, VARIANT, "w1", "m1") is None
+    assert (store.hits, store.stale, store.misses) == (1, 2, 1)
+
+
+def test_newer_write_replaces_entry(store):
+    store.put("1", VARIANT, "w1", "m1", b"old")
+    store.put(1, VARIANT, "w2", "m1", b"new")
+    assert store.get(1, VARIANT, "w1", "m1") is None
+    assert store.get(1, VARIANT, "w2", "m1") == b"new"
+    assert store.stored_watermarks([1, 2], VARIANT, "m1") == {"1": "w2"}
+    assert store.stored_watermarks([1], VARIANT, "m2") == {}
+    assert store.invalidate(1) == 1
+    assert store.get(1, VARIANT, "w2", "m1") is None
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (42, "42"),
+        (42.0, "42"),
+        (np.int64(42), "42"),
+        ("42", "42"),
+        (datetime.date(2024, 1, 5), "2024-01-05"),
+        (np.datetime64("2024-01-05"), "2024-01-05"),
+    ],
+)
+def test_watermark_normalization(value, expected):
+    assert normalize_watermark(value) == expected
+
+
+@pytest.mark.parametrize("value", [True, "", "x" * 257, [1]])
+def test_invalid_watermark_is_rejected(value):
+    with pytest.raises(PayloadError) as excinfo:
+        normalize_watermark(value)
+    assert excinfo.value.error == "INVALID_WATERMARK"
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    monkeypatch.setattr(app, "forecast_store", store)
+    monkeypatch.setattr(app, "CACHE_ENABLED", False)
+    return app.app.test_client()
+
+
+def request_body(**fields):
+    rng = np.random.default_rng(0)
+    transactions = [
+        {"Date": str(date.date()), "Amount": float(rng.integers(5000, 200000))}
+        for date in pd.date_range("2024-01-01", periods=40)
+    ]
+    return {"userId": 9, "transactions": transactions, **fields}
+
+
+def test_write_through_then_hit_until_watermark_or_model_changes(client, monkeypatch):
+    computed = client.post("/analyze-forecast", json=request_body(watermark=100))
+    assert computed.status_code == 200
+    assert computed.headers.get("X-Forecast-Store") == "MISS"
+
+    stored = client.post("/analyze-forecast", json={"userId": 9, "watermark": 100})
+    assert stored.headers.get("X-Forecast-Store") == "HIT"
+    assert stored.get_data() == computed.get_data()
+
+    newer = client.post("/analyze-forecast", json={"userId": 9, "watermark": 101})
+    assert newer.status_code == 409
+    assert newer.get_json()["error"] == "FORECAST_STALE"
+
+    monkeypatch.setattr(app.model_registry.active, "model_id", "retrained")
+    retrained = client.post("/analyze-forecast", json={"userId": 9, "watermark": 100})
+    assert retrained.status_code == 409
@@ -0,0 +1,35 @@
+import os
+import runpy
+
+import pytest
+
+from conftest import MODEL_ROOT
+
+
+def load_config(monkeypatch, **env):
+    # gunicorn.conf.py menulis os.environ; salinan agar tidak bocor ke test lain
+    monkeypatch.setattr(os, "environ", dict(os.environ))
+    for key in ("FORECAST_WORKERS", "FORECAST_STICKY_ROUTING"):
+        os.environ.pop(key, None)
+    os.environ.update(env)
+    return runpy.run_path(os.path.join(MODEL_ROOT, "gunicorn.conf.py"))
+
+
+def test_single_worker_by_default(monkeypatch):
+    config = load_config(monkeypatch)
+    assert config["workers"] == 1
+    assert os.environ["FORECAST_WORKERS"] == "1"
+
+
+def test_multiple_workers_require_sticky_routing(monkeypatch):
+    with pytest.raises(RuntimeError, match="FORECAST_STICKY_ROUTING"):
+        load_config(monkeypatch, FORECAST_WORKERS="4")
+
+
+def test_multiple_workers_poll_model_folder(monkeypatch):
+    config = load_config(
+        monkeypatch, FORECAST_WORKERS="4", FORECAST_STICKY_ROUTING="true"
+    )
+    assert config["workers"] == 4
+    assert config["WATCH_INTERVAL"] > 0
+    assert os.environ["FORECAST_WORKERS"] == "4"
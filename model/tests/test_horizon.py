@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from horizon import aggregate_buckets, bucket_labels, format_buckets, resolve_horizon
+from payload import PayloadError
+
+PANDAS_PERIODS = {"day": "D", "week": "W-SUN", "month": "M", "quarter": "Q"}
+
+
+def daily(start, days, seed=0):
+    dates = pd.date_range(start, periods=days)
+    values = np.random.default_rng(seed).uniform(10000, 90000, days)
+    return dates, values
+
+
+@pytest.mark.parametrize("bucket", ["day", "week", "month", "quarter"])
+@pytest.mark.parametrize(
+    "start, days",
+    [("2024-12-29", 40), ("2024-02-26", 10), ("2023-03-31", 400), ("2024-01-01", 1)],
+)
+def test_buckets_match_pandas_periods(bucket, start, days):
+    dates, values = daily(start, days)
+    agg = aggregate_buckets(dates.to_numpy(), values, bucket)
+
+    periods = dates.to_period(PANDAS_PERIODS[bucket])
+    expected = pd.Series(values, index=dates).groupby(periods).agg(["sum", "count"])
+    np.testing.assert_array_equal(
+        agg["start"], expected.index.start_time.to_numpy().astype("datetime64[D]")
+    )
+    np.testing.assert_array_equal(
+        agg["end"], expected.index.end_time.to_numpy().astype("datetime64[D]")
+    )
+    np.testing.assert_allclose(agg["total"], expected["sum"].to_numpy(), rtol=1e-12)
+    np.testing.assert_array_equal(agg["days"], expected["count"].to_numpy())
+
+
+def test_iso_week_labels_across_year_end():
+    starts = pd.date_range("2024-12-23", periods=3, freq="7D").to_numpy()
+    iso = pd.DatetimeIndex(starts).isocalendar()
+    assert bucket_labels(starts.astype("datetime64[D]"), "week") == [
+        f"{y}-W{w:02d}" for y, w in zip(iso["year"], iso["week"])
+    ]
+    assert bucket_labels(starts.astype("datetime64[D]"), "week")[1] == "2025-W01"
+
+
+def test_quarter_and_month_labels():
+    starts = np.array(["2024-01-01", "2024-10-01"], dtype="datetime64[D]")
+    assert bucket_labels(starts, "quarter") == ["2024-Q1", "2024-Q4"]
+    assert bucket_labels(starts, "month") == ["2024-01", "2024-10"]
+
+
+def test_partial_edge_buckets_are_incomplete():
+    # Rabu 2024-01-03 .. Selasa 2024-01-16: minggu pertama & terakhir terpotong
+    dates, values = daily("2024-01-03", 14)
+    buckets = format_buckets(pd.DataFrame({"Date": dates, "forecast": values}), "week")
+    assert [b["complete"] for b in buckets] == [False, True, False]
+    assert [b["days"] for b in buckets] == [5, 7, 2]
+    assert buckets[0]["start"] == "2024-01-03"
+    assert buckets[-1]["end"] == "2024-01-16"
+
+
+@pytest.mark.parametrize("horizon_days", [0, -1, 2.5, True, "7", 10**6])
+def test_invalid_horizon_is_rejected(horizon_days):
+    with pytest.raises(PayloadError) as excinfo:
+        resolve_horizon(horizon_days, None, 7)
+    assert excinfo.value.error == "INVALID_HORIZON"
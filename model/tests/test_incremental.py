@@ -0,0 +1,102 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+from feature_state import FeatureState
+
+
+def expenses(start, days, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"Date": str(date.date()), "Amount": float(rng.integers(5000, 200000))}
+        for date in pd.date_range(start, periods=days)
+    ]
+
+
+@pytest.fixture
+def client():
+    app.user_states.clear()
+    yield app.app.test_client()
+    app.user_states.clear()
+
+
+def incremental(client, transactions, cursor=None, user_id=7):
+    body = {"userId": user_id, "transactions": transactions, "mode": "daily"}
+    if cursor is not None:
+        body["cursor"] = cursor
+    return client.post("/analyze-forecast/incremental", json=body)
+
+
+def forecasts(response):
+    return [f["predicted_expense"] for f in response.get_json()["forecast"]]
+
+
+def test_delta_matches_full_sync_of_combined_history(client):
+    history, delta = expenses("2024-01-01", 40), expenses("2024-02-10", 5, seed=1)
+    synced = incremental(client, history)
+    assert synced.status_code == 200
+
+    updated = incremental(client, delta, synced.get_json()["metadata"]["cursor"])
+    assert updated.status_code == 200
+    assert updated.get_json()["metadata"]["incremental"] is True
+
+    full = incremental(client, history + delta, user_id=8)
+    assert forecasts(updated) == forecasts(full)
+
+
+def test_stale_cursor_is_rejected(client):
+    synced = incremental(client, expenses("2024-01-01", 40))
+    cursor = synced.get_json()["metadata"]["cursor"]
+    assert incremental(client, expenses("2024-02-10", 1), cursor).status_code == 200
+
+    response = incremental(client, expenses("2024-02-11", 1), cursor)
+    assert response.status_code == 409
+    assert response.get_json()["error"] == "CURSOR_MISMATCH"
+
+
+def test_backdated_delta_is_rejected_without_touching_state(client):
+    synced = incremental(client, expenses("2024-01-01", 40))
+    cursor = synced.get_json()["metadata"]["cursor"]
+    state = app.user_states[7]
+
+    response = incremental(client, expenses("2024-01-20", 1), cursor)
+    assert response.status_code == 409
+    assert response.get_json()["error"] == "CURSOR_MISMATCH"
+    assert app.user_states[7] is state
+
+    # Cursor lama tetap berlaku setelah delta yang ditolak
+    assert incremental(client, expenses("2024-02-10", 1), cursor).status_code == 200
+
+
+def test_concurrent_deltas_with_same_cursor_commit_once(client, monkeypatch):
+    synced = incremental(client, expenses("2024-01-01", 40))
+    cursor = synced.get_json()["metadata"]["cursor"]
+
+    # Kedua request menyalin state yang sama sebelum salah satunya commit
+    barrier = threading.Barrier(2, timeout=10)
+    append = FeatureState.append_transactions
+
+    def append_together(self, transactions_raw):
+        barrier.wait()
+        return append(self, transactions_raw)
+
+    monkeypatch.setattr(FeatureState, "append_transactions", append_together)
+    statuses = []
+
+    def send(seed):
+        response = incremental(
+            app.app.test_client(), expenses("2024-02-10", 1, seed), cursor
+        )
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=send, args=(seed,)) for seed in (1, 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [200, 409]
+    assert app.user_states[7].n_days == 41
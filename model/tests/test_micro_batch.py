@@ -0,0 +1,87 @@
+import threading
+
+import numpy as np
+import pytest
+
+from micro_batch import MicroBatcher
+
+N_REQUESTS = 8
+
+
+class CountingBooster:
+    """Booster palsu: prediksi = kolom pertama * 2, mencatat setiap predict"""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def inplace_predict(self, X):
+        self.calls.append(len(X))
+        if self.fail:
+            raise RuntimeError("predict gagal")
+        return X[:, 0] * 2
+
+
+def rows(i, n=3):
+    return np.full((n, 4), i, dtype=np.float32)
+
+
+def predict_concurrently(batcher, boosters):
+    results, errors = [None] * len(boosters), [None] * len(boosters)
+
+    def submit(i):
+        try:
+            results[i] = batcher.predict(boosters[i], rows(i), None)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(boosters))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results, errors
+
+
+def batcher_for(n):
+    # Window panjang: leader hanya berhenti menunggu karena semua request sudah masuk
+    return MicroBatcher(window_ms=10000, expected=lambda: n)
+
+
+def test_concurrent_requests_share_one_predict():
+    booster = CountingBooster()
+    results, errors = predict_concurrently(
+        batcher_for(N_REQUESTS), [booster] * N_REQUESTS
+    )
+    assert booster.calls == [3 * N_REQUESTS]
+    assert errors == [None] * N_REQUESTS
+    for i, result in enumerate(results):
+        np.testing.assert_array_equal(result, np.full(3, 2 * i, dtype=np.float32))
+
+
+def test_each_booster_in_batch_gets_its_own_predict():
+    old, new = CountingBooster(), CountingBooster()
+    boosters = [old, new] * (N_REQUESTS // 2)
+    results, _ = predict_concurrently(batcher_for(N_REQUESTS), boosters)
+    assert old.calls == new.calls == [3 * N_REQUESTS // 2]
+    for i, result in enumerate(results):
+        np.testing.assert_array_equal(result, np.full(3, 2 * i, dtype=np.float32))
+
+
+def test_predict_error_reaches_every_follower():
+    booster = CountingBooster(fail=True)
+    results, errors = predict_concurrently(
+        batcher_for(N_REQUESTS), [booster] * N_REQUESTS
+    )
+    assert len(booster.calls) == 1
+    assert all(isinstance(e, RuntimeError) for e in errors)
+
+
+@pytest.mark.parametrize(
+    "batcher", [MicroBatcher(window_ms=0), MicroBatcher(window_ms=10000, max_rows=3)]
+)
+def test_disabled_or_large_requests_predict_directly(batcher):
+    booster = CountingBooster()
+    result = batcher.predict(booster, rows(5), None)
+    np.testing.assert_array_equal(result, np.full(3, 10, dtype=np.float32))
+    assert booster.calls == [3]
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+import app
+from payload import TYPE_EXPENSE, TYPE_INCOME, PayloadError, decode_arrow
+
+pa = pytest.importorskip("pyarrow")
+
+ARROW = "application/vnd.apache.arrow.stream"
+
+
+def arrow_body(types=None, days=10, **metadata):
+    columns = {
+        "date": pa.array(np.arange(19723, 19723 + days, dtype=np.int32)),
+        "amount": pa.array(np.linspace(10000, 50000, days)),
+    }
+    if types is not None:
+        columns["type"] = types
+    table = pa.table(columns).replace_schema_metadata(
+        {key: str(value) for key, value in metadata.items()}
+    )
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def test_metadata_integers_are_parsed():
+    req_data = decode_arrow(
+        arrow_body(deadline_ms=1500, horizon_days=14, userId=42, mode="daily")
+    )
+    assert req_data["deadline_ms"] == 1500
+    assert req_data["horizon_days"] == 14
+    assert req_data["userId"] == 42
+    assert req_data["mode"] == "daily"
+
+
+def test_non_canonical_user_id_stays_string():
+    assert decode_arrow(arrow_body(userId="007"))["userId"] == "007"
+    assert decode_arrow(arrow_body(userId="user-1"))["userId"] == "user-1"
+
+
+@pytest.mark.parametrize(
+    "field, value, error",
+    [
+        ("horizon_days", "abc", "INVALID_HORIZON"),
+        ("horizon_days", 0, "INVALID_HORIZON"),
+        ("deadline_ms", "1.5s", "INVALID_DEADLINE"),
+        ("deadline_ms", -5, "INVALID_DEADLINE"),
+    ],
+)
+def test_invalid_metadata_uses_field_validation(field, value, error):
+    response = app.app.test_client().post(
+        "/analyze-forecast",
+        data=arrow_body(**{field: value}),
+        content_type=ARROW,
+    )
+    assert response.status_code == 400
+    assert response.get_json()["error"] == error
+
+
+def test_horizon_from_metadata_is_applied():
+    client = app.app.test_client()
+    arrow = client.post(
+        "/analyze-forecast", data=arrow_body(horizon_days=14), content_type=ARROW
+    ).get_json()
+    assert len(arrow["forecast"]) == 14
+
+
+def test_dictionary_type_column_is_validated():
+    names = ["EXPENSE", "income", "Expense"]
+    types = pa.array([names[i % 3] for i in range(10)]).dictionary_encode()
+    codes = decode_arrow(arrow_body(types))["transactions"].types
+    expected = [TYPE_EXPENSE, TYPE_INCOME, TYPE_EXPENSE] * 3 + [TYPE_EXPENSE]
+    assert codes.tolist() == expected
+
+
+@pytest.mark.parametrize(
+    "types",
+    [
+        pa.array(["EXPENSE"] * 9 + ["TRANSFER"]),
+        pa.array(["EXPENSE"] * 9 + ["TRANSFER"]).dictionary_encode(),
+        pa.array(["EXPENSE"] * 9 + [None]),
+        pa.array([0] * 9 + [2], pa.uint8()),
+    ],
+)
+def test_unknown_type_is_rejected_not_income(types):
+    with pytest.raises(PayloadError) as excinfo:
+        decode_arrow(arrow_body(types))
+    assert excinfo.value.error == "INVALID_PAYLOAD"
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+from prediction_cache import PredictionCache, ScoringPlan
+
+
+def feature_rows(days, seed=0):
+    return np.random.default_rng(seed).uniform(0, 1, (days, 4)).astype(np.float32)
+
+
+def test_lookup_reuses_identical_overlapping_rows():
+    cache = PredictionCache()
+    rows = feature_rows(10)
+    cache.store("u", "m1", 100, rows, np.arange(10, dtype=np.float32))
+
+    # Hari 105..114: 5 hari overlap, hari 107 berubah, 5 hari baru
+    shifted = np.vstack([rows[5:], feature_rows(5, seed=1)])
+    shifted[2, 0] += 1
+    predictions, missing = cache.lookup("u", "m1", 105, shifted)
+    assert missing.tolist() == [False, False, True, False, False] + [True] * 5
+    np.testing.assert_array_equal(predictions[[0, 1, 3, 4]], [5, 6, 8, 9])
+
+
+def test_other_model_or_user_misses():
+    cache = PredictionCache()
+    rows = feature_rows(5)
+    cache.store("u", "m1", 100, rows, np.zeros(5, dtype=np.float32))
+    assert cache.lookup("u", "m2", 100, rows)[1].all()
+    assert cache.lookup("v", "m1", 100, rows)[1].all()
+
+
+def test_byte_limit_evicts_least_recent_user():
+    rows = feature_rows(4)
+    size = rows.nbytes + 4 * 4
+    cache = PredictionCache(max_bytes=2 * size)
+    for user in ("a", "b"):
+        cache.store(user, "m1", 0, rows, np.zeros(4, dtype=np.float32))
+    cache.lookup("a", "m1", 0, rows)
+    cache.store("c", "m1", 0, rows, np.zeros(4, dtype=np.float32))
+    assert cache.lookup("b", "m1", 0, rows)[1].all()
+    assert not cache.lookup("a", "m1", 0, rows)[1].any()
+    assert cache.stats()["evictions"] == 1
+    assert cache.invalidate("a") == 1 and cache.total_bytes == size
+
+
+def test_scoring_plan_scores_only_missing_rows():
+    cache = PredictionCache()
+    rows = feature_rows(6)
+    cache.store("u", "m1", 0, rows[:4], np.arange(4, dtype=np.float32))
+
+    plan = ScoringPlan(cache, "u", "m1", 0, rows)
+    np.testing.assert_array_equal(plan.to_score, rows[4:])
+    np.testing.assert_array_equal(
+        plan.complete(np.array([40, 50], dtype=np.float32)), [0, 1, 2, 3, 40, 50]
+    )
+    assert cache.stats()["rows_reused"] == 4
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, "CACHE_ENABLED", False)
+    app.prediction_cache.invalidate()
+    yield app.app.test_client()
+    app.prediction_cache.invalidate()
+
+
+def expenses(days, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        {"Date": str(date.date()), "Amount": float(rng.integers(5000, 200000))}
+        for date in pd.date_range("2024-01-01", periods=days)
+    ]
+
+
+def test_cached_predictions_give_same_response_as_cold_scoring(client):
+    history = expenses(120)
+    assert (
+        client.post(
+            "/analyze-forecast", json={"transactions": history[:-3], "userId": 5}
+        ).status_code
+        == 200
+    )
+    reused = app.prediction_cache.stats()["rows_reused"]
+
+    warm = client.post(
+        "/analyze-forecast", json={"transactions": history, "userId": 5}
+    ).get_json()
+    cold = client.post("/analyze-forecast", json={"transactions": history}).get_json()
+    assert app.prediction_cache.stats()["rows_reused"] > reused
+    assert warm["metrics"] == cold["metrics"]
+    assert warm["forecast"] == cold["forecast"]
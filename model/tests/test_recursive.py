@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+from feature_state import FeatureState, forecast_recursive
+from features import COL, aggregate_daily, parse_transactions
+from inference import predict_rows
+
+
+def expenses(days, seed):
+    rng = np.random.default_rng(seed)
+    return [
+        {"Date": str(date.date()), "Amount": float(rng.integers(5000, 200000))}
+        for date in pd.date_range("2024-01-01", periods=days)
+        if rng.random() < 0.8
+    ]
+
+
+@pytest.fixture
+def booster():
+    return app.model_registry.active.booster
+
+
+def test_first_recursive_step_matches_static_forecast():
+    client = app.app.test_client()
+    body = {"transactions": expenses(60, 0), "mode": "daily"}
+    static = client.post("/analyze-forecast", json=body).get_json()
+    recursive = client.post(
+        "/analyze-forecast", json={**body, "forecast_method": "recursive"}
+    ).get_json()
+    assert recursive["forecast"][0] == static["forecast"][0]
+    assert [f["date"] for f in recursive["forecast"]] == [
+        f["date"] for f in static["forecast"]
+    ]
+
+
+def test_batched_users_match_single_user_forecasts(booster):
+    states = [FeatureState.from_transactions(expenses(n, n)) for n in (10, 45, 90)]
+    start_dates, batched = forecast_recursive(booster, states, 14)
+    for state, start, row in zip(states, start_dates, batched):
+        (single_start,), (single,) = forecast_recursive(booster, [state], 14)
+        assert start == single_start
+        np.testing.assert_array_equal(row, single)
+
+
+def test_each_step_sees_previous_predictions(booster):
+    # Referensi: state dibangun ulang dari histori + prediksi sebelumnya setiap step
+    first_date, amounts, counts = aggregate_daily(*parse_transactions(expenses(60, 3)))
+    state = FeatureState.from_daily(first_date, amounts, counts)
+    _, (predictions,) = forecast_recursive(booster, [state], 10)
+
+    for step in range(10):
+        rebuilt = FeatureState.from_daily(first_date, amounts, counts)
+        X = rebuilt.forecast_features(1)[1]
+        expected = max(float(predict_rows(booster, X)[0]), 10000)
+        np.testing.assert_allclose(predictions[step], expected, rtol=1e-5)
+        amounts = np.append(amounts, predictions[step])
+        counts = np.append(counts, X[0, COL["Transaction_Count"]])
+
+
+def test_recursive_forecast_does_not_mutate_input_state(booster):
+    state = FeatureState.from_transactions(expenses(30, 4))
+    before = (state.n_days, list(state.amounts), state.ema, state.cursor)
+    forecast_recursive(booster, [state], 7)
+    assert (state.n_days, list(state.amounts), state.ema, state.cursor) == before
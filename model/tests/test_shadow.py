@@ -0,0 +1,90 @@
+import shutil
+
+import numpy as np
+import pytest
+
+import app
+import shadow
+from features import FEATURE_COLS
+from inference import predict_rows
+from model_registry import ModelRegistry
+from shadow import ShadowEvaluator
+
+
+@pytest.fixture
+def candidate_registry(tmp_path):
+    # Kandidat = salinan model aktif, sehingga metrik kedua model sama
+    shutil.copy(app.model_registry.active.path, tmp_path)
+    registry = ModelRegistry(str(tmp_path))
+    registry.reload()
+    return registry
+
+
+def job(rows=5, seed=0):
+    X = (
+        np.random.default_rng(seed)
+        .uniform(0, 1000, (rows, len(FEATURE_COLS)))
+        .astype(np.float32)
+    )
+    y = np.full(rows, 50000.0)
+    primary = predict_rows(app.model_registry.active.booster, X)
+    return app.model_registry.active.model_id, X, y, primary, None, None
+
+
+def test_sampling_follows_sample_rate(candidate_registry, monkeypatch):
+    draws = iter([0.05, 0.5, 0.2, 0.9])
+    monkeypatch.setattr(shadow.random, "random", lambda: next(draws))
+    evaluator = ShadowEvaluator(candidate_registry, sample_rate=0.25)
+    monkeypatch.setattr(evaluator, "_ensure_workers", lambda: None)
+
+    assert [evaluator.submit(*job()) for _ in range(4)] == [True, False, True, False]
+    assert evaluator.stats()["submitted"] == 2
+
+
+@pytest.mark.parametrize("sample_rate, expected", [(0.0, 0), (1.0, 20)])
+def test_sample_rate_bounds(candidate_registry, monkeypatch, sample_rate, expected):
+    evaluator = ShadowEvaluator(candidate_registry, sample_rate=sample_rate)
+    monkeypatch.setattr(evaluator, "_ensure_workers", lambda: None)
+    assert sum(evaluator.submit(*job()) for _ in range(20)) == expected
+
+
+def test_no_candidate_means_no_submit(tmp_path):
+    evaluator = ShadowEvaluator(ModelRegistry(str(tmp_path)))
+    assert evaluator.submit(*job()) is False
+    assert evaluator.stats()["enabled"] is False
+
+
+def test_full_queue_drops_without_blocking(candidate_registry, monkeypatch):
+    evaluator = ShadowEvaluator(candidate_registry, max_queue=2)
+    monkeypatch.setattr(evaluator, "_ensure_workers", lambda: None)
+    assert [evaluator.submit(*job()) for _ in range(3)] == [True, True, False]
+    assert evaluator.stats()["dropped"] == 1
+
+
+def test_identical_candidate_has_equal_metrics(candidate_registry):
+    evaluator = ShadowEvaluator(candidate_registry)
+    for seed in range(3):
+        assert evaluator.submit(*job(seed=seed))
+    evaluator._queue.join()
+
+    stats = evaluator.stats()
+    assert stats["completed"] == 3 and stats["eval_rows"] == 15
+    assert stats["candidate_mae"] == stats["primary_mae"]
+    assert stats["mae_delta_pct"] == 0.0
+
+
+def test_results_from_another_model_pair_are_discarded(candidate_registry):
+    evaluator = ShadowEvaluator(candidate_registry)
+    evaluator.submit(*job())
+    evaluator._queue.join()
+
+    other = ("other-model",) + job()[1:]
+    evaluator.submit(*other)
+    evaluator._queue.join()
+    assert evaluator.stats()["completed"] == 1
+
+    evaluator.reset()
+    evaluator.submit(*other)
+    evaluator._queue.join()
+    stats = evaluator.stats()
+    assert stats["completed"] == 1 and stats["primary_model_id"] == "other-model"
@@ -0,0 +1,23 @@
+import importlib
+import sys
+
+import pytest
+
+import app
+import startup
+
+
+def test_lean_imports_off_outside_server_process():
+    from xgboost.compat import SKLEARN_INSTALLED
+
+    assert not startup.is_server_process()
+    assert app.STARTUP.lean is False
+    assert SKLEARN_INSTALLED
+
+
+def test_skipped_modules_only_inside_block(monkeypatch):
+    monkeypatch.delitem(sys.modules, "tabnanny", raising=False)
+    with startup.skipped_modules(["tabnanny"]):
+        with pytest.raises(ModuleNotFoundError):
+            importlib.import_module("tabnanny")
+    importlib.import_module("tabnanny")
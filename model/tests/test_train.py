@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import app
+from features import compute_features, expense_features
+from train import STAGING_DIR, partition_features
+
+
+def user_rows(user_id, types, start="2024-01-01"):
+    return [
+        {"userId": user_id, "Date": str(date.date()), "Amount": 1000.0 + i, "Type": t}
+        for i, (date, t) in enumerate(
+            zip(pd.date_range(start, periods=len(types)), types)
+        )
+    ]
+
+
+def test_expense_features_skips_users_below_expense_minimum():
+    transactions = user_rows(1, ["INCOME"] * 10 + ["EXPENSE"] * 3)
+    assert expense_features(transactions, min_expenses=7) is None
+    assert expense_features(transactions, min_expenses=3) is not None
+
+
+def test_expense_features_never_returns_empty_fallback():
+    income_only = user_rows(1, ["INCOME"] * 10)
+    # compute_features (jalur API) tetap memakai 184 hari nol fallback
+    assert len(compute_features(income_only)[1]) == 184
+    assert expense_features(income_only, min_expenses=0) is None
+
+
+def test_partition_features_uses_expense_users_only(tmp_path):
+    rows = (
+        user_rows("expense", ["EXPENSE"] * 20)
+        + user_rows("income", ["INCOME"] * 20)
+        + user_rows("mixed", ["INCOME"] * 10 + ["EXPENSE"] * 3)
+    )
+    path = tmp_path / "part-0.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+    X, y = partition_features(str(path), "userId", "train", 0.0, 7)
+    assert len(X) == len(y) == 20
+    np.testing.assert_array_equal(y, 1000.0 + np.arange(20, dtype=np.float32))
+
+
+def test_staging_dir_is_not_watched_by_any_registry():
+    watched = {
+        app.model_registry.model_dir,
+        app.income_registry.model_dir,
+        app.shadow_registry.model_dir,
+    }
+    assert STAGING_DIR not in {os.path.abspath(path) for path in watched}
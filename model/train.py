@@ -0,0 +1,281 @@
+"""
+Training out-of-core model expense forecast (29 fitur, sama dengan
+prepare_input_data) dari file transaksi yang dipartisi per user.
+
+    python train.py data/transactions/ --version 2025.07
+    python train.py data/transactions/ --output-dir /tmp/models --rounds 2000
+    python train.py part-*.parquet --valid-fraction 0 --nthread 8
+
+Format input sama dengan batch_score.py: setiap file CSV/Parquet berisi
+SEMUA transaksi user-user di dalamnya (kolom userId, Date, Amount, Type).
+Fitur dibangun per user dengan features.expense_features (user dengan
+transaksi EXPENSE < --min-transactions dilewati) lalu dialirkan
+lewat xgb.DataIter (satu partisi per batch) ke ExtMemQuantileDMatrix:
+histogram kuantil dan halaman data disimpan di cache disk (--cache-dir),
+sehingga memori hanya menampung satu partisi + cache host XGBoost.
+Validasi = hari terakhir (--valid-fraction) setiap user, sama seperti
+evaluasi time-series 20% di API.
+
+Output (format native UBJSON, nama sesuai pola ModelRegistry):
+    xgboost_expense_forecast-<version>.model
+    xgboost_expense_forecast-<version>.manifest.json   # fitur, param, data
+Default --output-dir = models/staging: tidak dipantau registry mana pun
+(model aktif = models/*.model, kandidat shadow = models/shadow/). Promosi
+adalah langkah eksplisit:
+    shadow:   salin .model ke models/shadow/ (dievaluasi di background)
+    produksi: salin .model ke models/ lalu reload (watcher / admin endpoint)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from batch_score import default_workers, discover_partitions, iter_users
+from batch_score import read_partition
+from features import FEATURE_COLS, expense_features
+from startup import import_xgboost
+
+xgb = import_xgboost()
+
+# Staging di luar folder yang dipantau registry (models/*.model dan
+# models/shadow/): training tidak pernah langsung mengubah model yang dipakai
+STAGING_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "models", "staging"
+)
+MODEL_PREFIX = "xgboost_expense_forecast"
+
+# Tipe fitur sama dengan model yang sudah ada (kalender & trend = int)
+INT_FEATURES = {
+    "day",
+    "month",
+    "year",
+    "dayofweek",
+    "dayofyear",
+    "weekofyear",
+    "is_weekend",
+    "is_month_start",
+    "is_month_end",
+    "trend",
+}
+FEATURE_TYPES = ["int" if c in INT_FEATURES else "float" for c in FEATURE_COLS]
+
+
+def partition_features(path, user_col, split, valid_fraction, min_transactions):
+    """
+    Matrix fitur (float32) dan target Amount harian semua user di satu
+    partisi. split "train" = hari awal setiap user, "valid" = hari terakhir
+    """
+    df = read_partition(path, user_col)
+    blocks, targets = [], []
+    for _, transactions in iter_users(df, user_col):
+        computed = expense_features(transactions, min_transactions)
+        if computed is None:
+            continue
+        _, amounts, X = computed
+        n_valid = int(len(amounts) * valid_fraction)
+        if split == "train":
+            rows = slice(0, len(amounts) - n_valid)
+        else:
+            rows = slice(len(amounts) - n_valid, len(amounts))
+        blocks.append(X[rows])
+        targets.append(amounts[rows].astype(np.float32))
+
+    if not blocks:
+        return np.empty((0, len(FEATURE_COLS)), np.float32), np.empty(0, np.float32)
+    return np.concatenate(blocks), np.concatenate(targets)
+
+
+class PartitionIter(xgb.DataIter):
+    """DataIter external memory: satu batch = fitur satu partisi"""
+
+    def __init__(self, partitions, options, split, cache_prefix):
+        self.partitions = [path for _, path in partitions]
+        self.options = options
+        self.split = split
+        self.rows = 0
+        self._it = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        while self._it < len(self.partitions):
+            X, y = partition_features(
+                self.partitions[self._it],
+                self.options["user_col"],
+                self.split,
+                self.options["valid_fraction"],
+                self.options["min_transactions"],
+            )
+            self._it += 1
+            if len(X):
+                self.rows += len(X)
+                input_data(
+                    data=X,
+                    label=y,
+                    feature_names=FEATURE_COLS,
+                    feature_types=FEATURE_TYPES,
+                )
+                return True
+        return False
+
+    def reset(self):
+        self._it = 0
+        self.rows = 0
+
+
+def write_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def train_booster(partitions, options, params, args, cache_dir):
+    """
+    Bangun DMatrix external memory (train + valid) dan training booster.
+    DMatrix dibebaskan saat fungsi selesai, sebelum cache_dir dihapus
+    """
+    train_iter = PartitionIter(
+        partitions, options, "train", os.path.join(cache_dir, "train")
+    )
+    dtrain = xgb.ExtMemQuantileDMatrix(
+        train_iter, max_bin=args.max_bin, nthread=args.nthread
+    )
+    evals = [(dtrain, "train")]
+    valid_rows = 0
+    if args.valid_fraction > 0:
+        valid_iter = PartitionIter(
+            partitions, options, "valid", os.path.join(cache_dir, "valid")
+        )
+        dvalid = xgb.ExtMemQuantileDMatrix(
+            valid_iter, max_bin=args.max_bin, nthread=args.nthread, ref=dtrain
+        )
+        evals.append((dvalid, "valid"))
+        valid_rows = dvalid.num_row()
+    print(f"Data: {dtrain.num_row()} baris train, {valid_rows} baris valid")
+
+    evals_result = {}
+    booster = xgb.train(
+        params,
+        dtrain,
+        num_boost_round=args.rounds,
+        evals=evals,
+        evals_result=evals_result,
+        early_stopping_rounds=(args.early_stopping_rounds if valid_rows else None),
+        verbose_eval=50,
+    )
+
+    # Model early-stopped dipotong ke iterasi terbaik sebelum disimpan
+    if valid_rows and args.early_stopping_rounds:
+        booster = booster[: booster.best_iteration + 1]
+    return booster, evals_result, dtrain.num_row(), valid_rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Training out-of-core XGBoost")
+    parser.add_argument("inputs", nargs="+", help="File/folder partisi CSV/Parquet")
+    parser.add_argument(
+        "--output-dir",
+        default=STAGING_DIR,
+        help="Default: models/staging (tidak dipakai API sampai dipromosikan)",
+    )
+    parser.add_argument("--version", help="Default: timestamp UTC")
+    parser.add_argument("--cache-dir", help="Folder cache external memory")
+    parser.add_argument("--user-col", default="userId")
+    parser.add_argument("--valid-fraction", type=float, default=0.2)
+    parser.add_argument(
+        "--min-transactions", type=int, default=7, help="Minimal transaksi EXPENSE/user"
+    )
+    parser.add_argument("--rounds", type=int, default=1000)
+    parser.add_argument("--early-stopping-rounds", type=int, default=50)
+    parser.add_argument("--max-depth", type=int, default=6)
+    parser.add_argument("--eta", type=float, default=0.3)
+    parser.add_argument("--max-bin", type=int, default=256)
+    parser.add_argument("--nthread", type=int, default=default_workers())
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    if not 0 <= args.valid_fraction < 1:
+        parser.error("--valid-fraction harus 0 <= x < 1")
+
+    partitions = discover_partitions(args.inputs)
+    if not partitions:
+        parser.error("Tidak ada file partisi CSV/Parquet")
+
+    version = args.version or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    name = f"{MODEL_PREFIX}-{version}"
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    options = {
+        "user_col": args.user_col,
+        "valid_fraction": args.valid_fraction,
+        "min_transactions": args.min_transactions,
+    }
+    params = {
+        "objective": "reg:squarederror",
+        "tree_method": "hist",
+        "max_depth": args.max_depth,
+        "eta": args.eta,
+        "max_bin": args.max_bin,
+        "nthread": args.nthread,
+        "seed": args.seed,
+        "eval_metric": ["rmse", "mae"],
+    }
+
+    cache_dir = tempfile.mkdtemp(prefix="xgb-extmem-", dir=args.cache_dir)
+    start = time.perf_counter()
+    print(f"{len(partitions)} partisi, cache external memory: {cache_dir}")
+    try:
+        booster, evals_result, train_rows, valid_rows = train_booster(
+            partitions, options, params, args, cache_dir
+        )
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    raw = bytes(booster.save_raw("ubj"))
+
+    best = booster.num_boosted_rounds() - 1
+    final_scores = {
+        split: {metric: round(values[best], 4) for metric, values in metrics.items()}
+        for split, metrics in evals_result.items()
+    }
+    manifest = {
+        "model_file": f"{name}.model",
+        "model_id": hashlib.sha256(raw).hexdigest()[:16],
+        "version": version,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "format": "ubj",
+        "xgboost_version": xgb.__version__,
+        "feature_names": FEATURE_COLS,
+        "feature_types": FEATURE_TYPES,
+        "target": "Amount (Expense Only, harian)",
+        "params": params,
+        "num_boost_round": booster.num_boosted_rounds(),
+        "data": {
+            "partitions": [partition_id for partition_id, _ in partitions],
+            "train_rows": int(train_rows),
+            "valid_rows": int(valid_rows),
+            **options,
+        },
+        "scores": final_scores,
+        "training_seconds": round(time.perf_counter() - start, 3),
+    }
+
+    # Manifest dulu: saat watcher registry melihat file model, manifest sudah ada
+    manifest_path = os.path.join(output_dir, f"{name}.manifest.json")
+    model_path = os.path.join(output_dir, f"{name}.model")
+    write_atomic(manifest_path, json.dumps(manifest, indent=2).encode())
+    write_atomic(model_path, raw)
+
+    print(json.dumps({"model": model_path, "manifest": manifest_path, **final_scores}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
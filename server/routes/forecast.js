@@ -3,6 +3,7 @@ const express = require('express');
 const router = express.Router();
 const pool = require('../config/supa');
 const axios = require('axios');
+const crypto = require('crypto');
 const NodeCache = require('node-cache');
 const winston = require('winston');
 
@@ -112,6 +113,13 @@ const validateAndNormalizeTransactions = (transactions) => {
   return { validTransactions, incomeCount, expenseCount };
 };
 
+// 5b. WATERMARK FORECAST STORE
+// Hash isi transaksi yang dikirim: berubah setiap ada insert/update/delete
+// maupun saat jendela 365 hari bergeser, sehingga forecast tersimpan di Flask
+// hanya dipakai ulang untuk data yang persis sama
+const transactionsWatermark = (transactions) =>
+  crypto.createHash('sha256').update(JSON.stringify(transactions)).digest('hex').slice(0, 32);
+
 // 6. MAIN FORECAST ENDPOINT (FIXED STRUCTURE)
 router.get('/analyze', validateForecastRequest, async (req, res) => {
   const { userId, mode } = req.validatedParams;
@@ -173,7 +181,8 @@ router.get('/analyze', validateForecastRequest, async (req, res) => {
       const pythonRes = await axios.post(PYTHON_API_URL, {
         transactions: validTransactions,
         mode: mode,
-        userId: userId
+        userId: userId,
+        watermark: transactionsWatermark(validTransactions)
       }, {
         timeout: PYTHON_API_TIMEOUT,
         headers: { 'Content-Type': 'application/json' },